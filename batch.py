@@ -0,0 +1,70 @@
+"""
+批处理入口
+把 JSONL 文件中的提示词并行发送给指定 Agent
+
+用法:
+    python batch.py basic requests.jsonl results.jsonl -c 8
+    python batch.py advanced requests.jsonl results.jsonl --prompt-field body --no-resume
+"""
+import argparse
+import sys
+
+from src.batch import BatchRunner, DEFAULT_ID_FIELDS, DEFAULT_PROMPT_FIELDS
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="批量运行 Agent")
+    parser.add_argument("agent_id", help="Agent ID，例如 basic / advanced / custom")
+    parser.add_argument("input", help="输入 JSONL 文件")
+    parser.add_argument("output", help="输出 JSONL 文件（逐条追加写入）")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="并发数")
+    parser.add_argument("--id-field", action="append",
+                        help=f"请求 ID 字段，可重复指定（默认: {', '.join(DEFAULT_ID_FIELDS)}）")
+    parser.add_argument("--prompt-field", action="append",
+                        help=f"提示词字段，可重复指定（默认: {', '.join(DEFAULT_PROMPT_FIELDS)}）")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="不续跑，覆盖已有输出文件")
+    parser.add_argument("--retry-errors", action="store_true",
+                        help="续跑时重新执行之前失败的请求")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="不读取模型响应缓存（需开启 RESPONSE_CACHE）")
+    parser.add_argument("-q", "--quiet", action="store_true", help="不打印每条请求的结果")
+    args = parser.parse_args()
+
+    runner = BatchRunner(
+        args.agent_id,
+        concurrency=args.concurrency,
+        id_fields=args.id_field or DEFAULT_ID_FIELDS,
+        prompt_fields=args.prompt_field or DEFAULT_PROMPT_FIELDS,
+        use_cache=not args.no_cache,
+    )
+
+    def on_result(result):
+        status = "❌" if "error" in result else "✅"
+        print(f"{status} {result['id']}  {result['latency'] * 1000:.0f}ms", flush=True)
+
+    try:
+        summary = runner.run(
+            args.input,
+            args.output,
+            resume=not args.no_resume,
+            retry_errors=args.retry_errors,
+            on_result=None if args.quiet else on_result,
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print("\n" + "=" * 70)
+    print(f"📦 批处理完成: {summary['agent_id']}")
+    print("=" * 70)
+    print(f"处理: {summary['processed']}  跳过(已完成): {summary['skipped']}  失败: {summary['errors']}")
+    print(f"总耗时: {summary['elapsed']}s  吞吐: {summary['throughput']} 条/秒")
+    print(f"延迟: p50 {summary['latency_p50']}s | p90 {summary['latency_p90']}s | p99 {summary['latency_p99']}s")
+
+    sys.exit(1 if summary["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
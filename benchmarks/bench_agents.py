@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+"""
+Agent 框架开销基准测试
+使用本地假模型（MODEL_PROVIDER=fake），不需要任何 API Key，对每个 Agent 定义测量：
+
+- build_ms        冷启动构建 Agent 的耗时
+- reselect_us     再次选择同一 Agent（命中缓存）的耗时
+- invoke_ms       一轮对话（模型零延迟，调用全部工具）的框架开销
+- tool_dispatch_us 每次工具调用经过执行器的额外开销
+- throughput_tps  模型有固定延迟时，并发会话下每秒完成的轮数
+
+另外检查多提供商路由下每个模型步骤只记录一次模型调用。
+
+结果与 benchmarks/baseline.json 对比，超出容忍度时以非零状态码退出。
+基线与机器相关，在新的机器（或 CI 环境）上先用 --save-baseline 重新生成。
+
+用法:
+    python benchmarks/bench_agents.py
+    python benchmarks/bench_agents.py --save-baseline
+    python benchmarks/bench_agents.py --agents basic custom --tolerance 0.3
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(PROJECT_ROOT, "benchmarks", "baseline.json")
+
+# 必须在导入 src.config 之前设置
+os.environ["MODEL_PROVIDER"] = "fake"
+# 基准测试创建的提醒只保存在内存中
+os.environ["REMINDER_STORE_PATH"] = ""
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.config import config  # noqa: E402
+from src.agents.definitions import get_all_agent_infos, get_agent_by_id  # noqa: E402
+from src.agents.loader import AgentLoader  # noqa: E402
+from src.agents.tool_executor import tool_executor  # noqa: E402
+from src.llm import client_pool  # noqa: E402
+from src.llm.fake import sample_args  # noqa: E402
+from src.skills import clear_skill_caches  # noqa: E402
+from src.skills.file_output import file_writer  # noqa: E402
+
+
+# 数值越大越好的指标，其余指标越小越好
+HIGHER_IS_BETTER = {"throughput_tps"}
+
+
+def set_fake_latency(latency: float):
+    """修改假模型延迟，并丢弃已构建的模型和 Agent"""
+    config.MODEL_MAP["fake"]["latency"] = latency
+    client_pool.close()
+    AgentLoader.invalidate_cache()
+
+
+@contextlib.contextmanager
+def quiet():
+    """屏蔽构建 Agent 时的打印输出"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def median_ms(samples: list) -> float:
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def bench_build(agent_id: str, runs: int) -> dict:
+    """冷启动构建和命中缓存的再次选择"""
+    cold = []
+    for _ in range(runs):
+        AgentLoader.invalidate_cache(agent_id)
+        start = time.perf_counter()
+        with quiet():
+            AgentLoader.create_agent_by_id(agent_id)
+        cold.append(time.perf_counter() - start)
+
+    warm = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        with quiet():
+            AgentLoader.create_agent_by_id(agent_id)
+        warm.append(time.perf_counter() - start)
+
+    return {
+        "build_ms": median_ms(cold),
+        "reselect_us": round(statistics.median(warm) * 1_000_000, 3),
+    }
+
+
+def bench_invoke(agent_id: str, runs: int) -> dict:
+    """零延迟模型下一轮对话的框架开销"""
+    with quiet():
+        agent = AgentLoader.create_agent_by_id(agent_id)
+    inputs = {"messages": [{"role": "user", "content": "benchmark"}]}
+    agent.invoke(inputs)  # 预热
+
+    samples = []
+    for _ in range(runs):
+        clear_skill_caches()
+        start = time.perf_counter()
+        agent.invoke(inputs)
+        samples.append(time.perf_counter() - start)
+    return {"invoke_ms": median_ms(samples)}
+
+
+def bench_tool_dispatch(agent_id: str, runs: int) -> dict:
+    """执行器包装相对于直接调用的单次额外开销"""
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    tools = get_agent_by_id(agent_id).get_agent_config()["tools"]
+    calls = [(tool, sample_args(convert_to_openai_tool(tool))) for tool in tools]
+
+    def timed(make_call):
+        start = time.perf_counter()
+        for _ in range(runs):
+            clear_skill_caches()
+            for func, kwargs in calls:
+                make_call(func, kwargs)
+        return time.perf_counter() - start
+
+    direct = timed(lambda func, kwargs: func(**kwargs))
+    wrapped = timed(lambda func, kwargs: tool_executor.wrap(func)(**kwargs))
+    per_call = (wrapped - direct) / (runs * len(calls)) if calls else 0.0
+    return {"tool_dispatch_us": round(max(per_call, 0.0) * 1_000_000, 3)}
+
+
+def bench_throughput(agent_id: str, turns: int, concurrency: int) -> dict:
+    """固定模型延迟下的并发吞吐"""
+    with quiet():
+        agent = AgentLoader.create_agent_by_id(agent_id)
+    inputs = {"messages": [{"role": "user", "content": "benchmark"}]}
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                await agent.ainvoke(inputs)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(turns)))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(run())
+    return {"throughput_tps": round(turns / elapsed, 3)}
+
+
+def check_routed_model_calls(agent_id: str):
+    """多提供商路由下，每个模型步骤只记录一次模型调用（内部的提供商调用不重复计数）
+
+    Returns:
+        不符合时返回问题描述，否则返回 None
+    """
+    from src.agents.instrumentation import InstrumentationHandler
+    from src.utils.metrics import MetricsRegistry
+
+    # 两个假模型提供商参与路由
+    # get_routing_providers 是类方法，读取类属性
+    settings = type(config)
+    settings.MODEL_MAP["fake_routed"] = dict(settings.MODEL_MAP["fake"])
+    routing = settings.MODEL_ROUTING
+    settings.MODEL_ROUTING = "fake,fake_routed"
+    client_pool.close()
+    AgentLoader.invalidate_cache()
+    try:
+        with quiet():
+            agent = AgentLoader.create_agent_by_id(agent_id)
+        registry = MetricsRegistry()
+        handler = InstrumentationHandler(agent_id, "fake", registry=registry)
+        inputs = {"messages": [{"role": "user", "content": "benchmark"}]}
+        final_state = None
+        for state in agent.stream(inputs, {"callbacks": [handler]}, stream_mode="values"):
+            final_state = state
+    finally:
+        settings.MODEL_ROUTING = routing
+        del settings.MODEL_MAP["fake_routed"]
+        client_pool.close()
+        AgentLoader.invalidate_cache()
+
+    steps = sum(1 for message in final_state["messages"] if message.type == "ai")
+    recorded = sum(item["count"] for item in registry.snapshot()
+                   if item["metric"] == "model_latency_ms")
+    if recorded != steps:
+        return f"{agent_id}: 路由下 {steps} 个模型步骤记录了 {recorded} 次模型调用"
+    return None
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """与基线对比，返回退化项列表"""
+    regressions = []
+    for agent_id, metrics in results.items():
+        for name, value in metrics.items():
+            base = baseline.get(agent_id, {}).get(name)
+            if not base:
+                continue
+            if name in HIGHER_IS_BETTER:
+                change = (base - value) / base
+            else:
+                change = (value - base) / base
+            if change > tolerance:
+                regressions.append({
+                    "agent_id": agent_id, "metric": name,
+                    "baseline": base, "current": value,
+                    "change": round(change, 3),
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent 框架开销基准测试")
+    parser.add_argument("--agents", nargs="*", help="只测试指定的 Agent ID")
+    parser.add_argument("-n", "--runs", type=int, default=20, help="每项测量的重复次数")
+    parser.add_argument("--turns", type=int, default=200, help="吞吐测试的总轮数")
+    parser.add_argument("-c", "--concurrency", type=int, default=32, help="吞吐测试的并发数")
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="吞吐测试中假模型每次调用的延迟（秒）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="允许相对基线退化的比例（默认 0.2 即 20%%）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出")
+    args = parser.parse_args()
+
+    agent_ids = args.agents or [info["id"] for info in get_all_agent_infos()]
+    results = {}
+
+    # 在临时目录中运行，避免有副作用的技能（如写文件）污染项目目录
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench_agents_") as workdir:
+        os.chdir(workdir)
+        try:
+            set_fake_latency(0.0)
+            for agent_id in agent_ids:
+                results[agent_id] = {}
+                results[agent_id].update(bench_build(agent_id, args.runs))
+                results[agent_id].update(bench_invoke(agent_id, args.runs))
+                results[agent_id].update(bench_tool_dispatch(agent_id, args.runs))
+
+            set_fake_latency(args.latency)
+            for agent_id in agent_ids:
+                results[agent_id].update(
+                    bench_throughput(agent_id, args.turns, args.concurrency)
+                )
+            set_fake_latency(0.0)
+            check_failures = [
+                problem for problem in map(check_routed_model_calls, agent_ids) if problem
+            ]
+            # 后台写入的文件写完后再删除临时目录
+            file_writer.flush(10)
+        finally:
+            os.chdir(cwd)
+
+    regressions = []
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+
+    if args.json:
+        print(json.dumps({"results": results, "regressions": regressions,
+                          "check_failures": check_failures},
+                         ensure_ascii=False, indent=2))
+    else:
+        print("=" * 70)
+        print("⏱️  Agent 框架开销基准测试（假模型）")
+        print("=" * 70)
+        for agent_id, metrics in results.items():
+            print(f"\n[{agent_id}]")
+            for name, value in metrics.items():
+                print(f"    {name:<18} {value}")
+        print()
+        if args.save_baseline:
+            print(f"💾 基线已保存: {args.baseline}")
+        elif not os.path.exists(args.baseline):
+            print("ℹ️  未找到基线文件，使用 --save-baseline 生成")
+        elif regressions:
+            print(f"❌ 发现 {len(regressions)} 项退化（容忍度 {args.tolerance:.0%}）:")
+            for item in regressions:
+                print(f"    {item['agent_id']}.{item['metric']}: "
+                      f"{item['baseline']} -> {item['current']} (+{item['change']:.0%})")
+        else:
+            print("✅ 与基线相比没有退化")
+        if check_failures:
+            print(f"❌ 埋点检查失败 {len(check_failures)} 项:")
+            for problem in check_failures:
+                print(f"    {problem}")
+        else:
+            print("✅ 路由下的模型调用埋点正确")
+
+    sys.exit(1 if regressions or check_failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""
+启动耗时基准测试
+测量从启动解释器到显示 Agent 列表的耗时，并检查期间是否导入了重量级模块
+
+用法:
+    python benchmarks/bench_startup.py            # 默认运行 10 次
+    python benchmarks/bench_startup.py -n 30 --importtime
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 启动阶段不应出现的模块
+HEAVY_MODULES = [
+    "langchain",
+    "langchain.agents",
+    "langchain_core",
+    "langgraph",
+    "langchain_openai",
+    "langchain_anthropic",
+    "langchain_google_genai",
+    "openai",
+    "anthropic",
+]
+
+# 子进程中执行的启动路径：与 main.py 显示菜单之前的步骤一致
+STARTUP_CODE = """
+import json, sys
+from src.agents.loader import AgentLoader
+agents = AgentLoader.load_all_agents()
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"agents": len(agents), "heavy": heavy}}))
+"""
+
+# 对照组：直接导入 LangChain 的耗时
+EAGER_CODE = "import langchain.agents"
+
+
+def run_once(code: str, extra_args=None):
+    """在全新的解释器中执行代码，返回 (耗时秒数, 标准输出, 标准错误)"""
+    cmd = [sys.executable] + (extra_args or []) + ["-c", code]
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="0")
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=PROJECT_ROOT, env=env,
+                          capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip() or f"exit code {proc.returncode}")
+    return elapsed, proc.stdout, proc.stderr
+
+
+def summarize(samples: list) -> dict:
+    """计算耗时统计（毫秒）"""
+    ordered = sorted(samples)
+    p90 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+    return {
+        "min_ms": round(ordered[0] * 1000, 2),
+        "median_ms": round(statistics.median(ordered) * 1000, 2),
+        "p90_ms": round(p90 * 1000, 2),
+    }
+
+
+def top_imports(stderr: str, limit: int = 15) -> list:
+    """解析 -X importtime 输出，返回累计耗时最高的模块"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us.strip()), name.strip()))
+    rows.sort(reverse=True)
+    return [{"module": name, "cumulative_ms": us / 1000} for us, name in rows[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动耗时基准测试")
+    parser.add_argument("-n", "--runs", type=int, default=10, help="重复次数")
+    parser.add_argument("--importtime", action="store_true",
+                        help="额外输出 -X importtime 的模块耗时排行")
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出")
+    args = parser.parse_args()
+
+    code = STARTUP_CODE.format(heavy=HEAVY_MODULES)
+
+    # 预热一次，生成字节码缓存和 Agent 索引缓存
+    _, stdout, _ = run_once(code)
+    result = json.loads(stdout)
+
+    samples = [run_once(code)[0] for _ in range(args.runs)]
+    report = {
+        "runs": args.runs,
+        "agents": result["agents"],
+        "heavy_modules_loaded": result["heavy"],
+        "startup": summarize(samples),
+    }
+
+    try:
+        eager = [run_once(EAGER_CODE)[0] for _ in range(max(1, args.runs // 2))]
+        report["eager_langchain_import"] = summarize(eager)
+    except RuntimeError:
+        report["eager_langchain_import"] = None
+
+    if args.importtime:
+        _, _, stderr = run_once(code, ["-X", "importtime"])
+        report["top_imports"] = top_imports(stderr)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print("=" * 70)
+        print("⏱️  启动耗时基准测试")
+        print("=" * 70)
+        print(f"Agent 数量: {report['agents']}  运行次数: {report['runs']}")
+        s = report["startup"]
+        print(f"显示 Agent 列表: min {s['min_ms']}ms | median {s['median_ms']}ms | p90 {s['p90_ms']}ms")
+        if report["eager_langchain_import"]:
+            e = report["eager_langchain_import"]
+            print(f"对照 import langchain.agents: median {e['median_ms']}ms")
+        if report["heavy_modules_loaded"]:
+            print(f"❌ 启动阶段导入了重量级模块: {', '.join(report['heavy_modules_loaded'])}")
+        else:
+            print("✅ 启动阶段未导入 LangChain 或模型 SDK")
+        for row in report.get("top_imports", []):
+            print(f"    {row['cumulative_ms']:>9.2f}ms  {row['module']}")
+
+    sys.exit(1 if report["heavy_modules_loaded"] else 0)
+
+
+if __name__ == "__main__":
+    main()
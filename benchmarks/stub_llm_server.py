@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+"""
+本地 OpenAI 兼容桩服务
+用于在不访问真实模型的情况下测试路由、故障切换、连接池和缓存。
+
+- 第一次调用（最后一条是用户消息且带有工具）时调用第一个工具，其余情况直接回复
+- 支持普通响应和流式（SSE）响应
+- 延迟和故障率可以在启动时指定，也可以在运行中通过 POST /control 调整，
+  用来模拟提供商变慢或故障
+
+用法:
+    python benchmarks/stub_llm_server.py --port 18081 --delay 0.05
+    python benchmarks/stub_llm_server.py --port 18082 --fail-rate 1.0
+
+    # 让 deepseek 和 openai 都指向桩服务并开启路由
+    DEEPSEEK_BASE_URL=http://127.0.0.1:18081/v1 OPENAI_BASE_URL=http://127.0.0.1:18082/v1 \\
+    MODEL_ROUTING=deepseek,openai python main.py
+
+    # 运行中让服务变慢或出错
+    curl -X POST localhost:18081/control -d '{"delay": 2.0, "fail_rate": 0.5}'
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubState:
+    """可在运行中调整的桩服务参数"""
+
+    def __init__(self, delay: float, jitter: float, fail_rate: float, fail_status: int):
+        self.delay = delay
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.requests = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def update(self, values: dict):
+        with self._lock:
+            for name in ("delay", "jitter", "fail_rate", "fail_status"):
+                if name in values:
+                    setattr(self, name, type(getattr(self, name))(values[name]))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "delay": self.delay, "jitter": self.jitter,
+                "fail_rate": self.fail_rate, "fail_status": self.fail_status,
+                "requests": self.requests, "failures": self.failures,
+            }
+
+    def next_request(self):
+        """登记一次请求，返回 (延迟秒数, 是否失败)"""
+        with self._lock:
+            self.requests += 1
+            failed = random.random() < self.fail_rate
+            if failed:
+                self.failures += 1
+            delay = self.delay + random.uniform(0, self.jitter)
+        return delay, failed
+
+
+def build_reply(body: dict, count: int) -> tuple:
+    """根据请求生成回复消息和 finish_reason"""
+    messages = body.get("messages", [])
+    tools = body.get("tools") or []
+    if messages and messages[-1].get("role") == "user" and tools:
+        function = tools[0]["function"]
+        properties = function.get("parameters", {}).get("properties", {})
+        args = {name: "test" for name in properties}
+        return {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{
+                "id": f"call_{count}",
+                "type": "function",
+                "function": {"name": function["name"],
+                             "arguments": json.dumps(args, ensure_ascii=False)},
+            }],
+        }, "tool_calls"
+    return {"role": "assistant", "content": f"桩服务回复 #{count}（{len(messages)} 条消息）"}, "stop"
+
+
+def make_handler(state: StubState, name: str):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, status: int, payload: dict):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _read_json(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            if self.path == "/control":
+                self._send_json(200, state.snapshot())
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            body = self._read_json()
+            if self.path == "/control":
+                state.update(body)
+                self._send_json(200, state.snapshot())
+                return
+            if not self.path.endswith("/chat/completions"):
+                self._send_json(404, {"error": "not found"})
+                return
+
+            delay, failed = state.next_request()
+            time.sleep(delay)
+            if failed:
+                self._send_json(state.fail_status, {
+                    "error": {"message": f"{name} 模拟故障", "type": "server_error"}
+                })
+                return
+
+            message, finish = build_reply(body, state.requests)
+            usage = {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+            base = {"id": f"stub-{state.requests}", "created": int(time.time()), "model": name}
+            if body.get("stream"):
+                self._stream(base, message, finish, usage)
+            else:
+                self._send_json(200, {
+                    **base, "object": "chat.completion",
+                    "choices": [{"index": 0, "message": message, "finish_reason": finish}],
+                    "usage": usage,
+                })
+
+        def _stream(self, base: dict, message: dict, finish: str, usage: dict):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def send(payload):
+                data = payload if isinstance(payload, bytes) else (
+                    "data: " + json.dumps(payload, ensure_ascii=False) + "\n\n"
+                ).encode("utf-8")
+                self.wfile.write(b"%x\r\n" % len(data) + data + b"\r\n")
+                self.wfile.flush()
+
+            def chunk(delta, finish_reason=None, **extra):
+                return {**base, "object": "chat.completion.chunk",
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                        **extra}
+
+            if message.get("tool_calls"):
+                for idx, call in enumerate(message["tool_calls"]):
+                    send(chunk({"role": "assistant", "tool_calls": [{"index": idx, **call}]}))
+            else:
+                for word in message["content"].split(" "):
+                    send(chunk({"role": "assistant", "content": word + " "}))
+            send(chunk({}, finish, usage=usage))
+            send(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容桩服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18081)
+    parser.add_argument("--delay", type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="额外的随机延迟上限（秒）")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="请求失败的概率")
+    parser.add_argument("--fail-status", type=int, default=500, help="失败时返回的状态码")
+    parser.add_argument("--name", default="stub", help="响应中的模型名")
+    args = parser.parse_args()
+
+    state = StubState(args.delay, args.jitter, args.fail_rate, args.fail_status)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state, args.name))
+    print(f"🧪 桩服务已启动: http://{args.host}:{args.port}/v1 "
+          f"(delay={args.delay}s, fail_rate={args.fail_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
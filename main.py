@@ -1,12 +1,45 @@
 """
 LangChain 智能代理交互式选择器
 从 definitions 文件夹动态加载预定义的 Agent
+
+环境变量由 src.config 统一加载；LangChain 和模型 SDK 在菜单显示之后
+才在后台预热导入，不阻塞启动。
 """
-from dotenv import load_dotenv
+import os
+import threading
+import uuid
+
+from src.config import config
+from src.agents.checkpoint import (
+    SessionAgentMismatch,
+    SessionCheckpointer,
+    get_checkpoint_store,
+)
 from src.agents.loader import AgentLoader
+from src.agents.memory import content_text, memory_for_agent
+from src.llm.priority import PRIORITY_INTERACTIVE, request_priority
+from src.utils import extract_response
+
+
+def preload_heavy_modules():
+    """在后台线程中预先导入 LangChain，用户选择 Agent 时无需再等待"""
+    def _preload():
+        try:
+            import langchain.agents  # noqa: F401
+        except Exception:
+            # 预热失败不影响主流程，创建 Agent 时会再次导入并报告错误
+            pass
+    
+    threading.Thread(target=_preload, name="preload-langchain", daemon=True).start()
 
-# 加载环境变量
-load_dotenv()
+
+def resume_reminders():
+    """在后台线程中恢复上次运行时未触发的提醒，到期后照常通知"""
+    if not config.REMINDER_STORE_PATH or not os.path.exists(config.REMINDER_STORE_PATH):
+        return
+    
+    from src.skills.reminders import get_reminder_scheduler
+    threading.Thread(target=get_reminder_scheduler, name="resume-reminders", daemon=True).start()
 
 
 def display_agents():
@@ -52,9 +85,110 @@ def create_selected_agent(choice):
     return agent
 
 
+def stream_agent_response(agent, inputs):
+    """流式输出 Agent 的回复
+    
+    助手的 token 和工具调用事件在到达时立即打印；
+    如果模型没有流式返回文本，最后通过 extract_response 打印完整回复。
+    
+    Args:
+        agent: Agent 实例
+        inputs: 传给 Agent 的输入
+    
+    Returns:
+        最终的 Agent 状态
+    """
+    final_state = None
+    streamed_text = False
+    # 当前光标是否停在一行中间（调用方已打印了助手前缀）
+    mid_line = True
+    # 工具事件之后的文本需要重新打印助手前缀
+    need_prefix = False
+    
+    def print_event(line: str):
+        nonlocal mid_line, need_prefix
+        if mid_line:
+            print()
+        print(f"   {line}")
+        mid_line = False
+        need_prefix = True
+    
+    for mode, payload in agent.stream(inputs, stream_mode=["messages", "values"]):
+        if mode == "values":
+            final_state = payload
+            continue
+        
+        message, _metadata = payload
+        message_type = getattr(message, "type", "")
+        
+        if message_type == "tool":
+            # 工具执行结果
+            result = content_text(message.content).replace("\n", " ")
+            if len(result) > 80:
+                result = result[:80] + "..."
+            print_event(f"📎 {message.name}: {result}")
+            continue
+        
+        if message_type not in ("AIMessageChunk", "ai"):
+            continue
+        
+        # 工具调用事件（名称只出现在第一个分块中）
+        for tool_chunk in getattr(message, "tool_call_chunks", None) or []:
+            if tool_chunk.get("name"):
+                print_event(f"🔧 调用工具: {tool_chunk['name']}")
+        
+        text = content_text(message.content)
+        if text:
+            if need_prefix:
+                print("🤖 助手: ", end="")
+                need_prefix = False
+            print(text, end="", flush=True)
+            streamed_text = True
+            mid_line = True
+    
+    if not streamed_text and final_state is not None:
+        if need_prefix:
+            print("🤖 助手: ", end="")
+        print(extract_response(final_state), end="")
+    print()
+    
+    return final_state
+
+
+def open_checkpoint(agent_info, memory):
+    """配置了检查点存储时，按用户输入的会话 ID 恢复历史
+    
+    Returns:
+        SessionCheckpointer 实例；未配置存储时返回 None
+    """
+    store = get_checkpoint_store()
+    if store is None:
+        return None
+    
+    session_id = input("💾 输入会话 ID 恢复历史（直接回车新建会话）: ").strip()
+    session_id = session_id or uuid.uuid4().hex[:12]
+    checkpointer = SessionCheckpointer(store, session_id, agent_info['id'], memory)
+    try:
+        resumed = checkpointer.resume()
+    except SessionAgentMismatch as e:
+        # 不把其他 Agent 的历史混入当前对话，改用新的会话
+        session_id = uuid.uuid4().hex[:12]
+        checkpointer = SessionCheckpointer(store, session_id, agent_info['id'], memory)
+        resumed = False
+        print(f"⚠️  {e}，已新建会话")
+    if resumed:
+        print(f"♻️  已恢复会话 {session_id}（{memory.stats()['turns']} 轮历史）")
+    else:
+        print(f"🆕 会话 ID: {session_id}（下次输入该 ID 可恢复本次对话）")
+    return checkpointer
+
+
 def chat_loop(agent, agent_info):
     """对话循环"""
     print(f"\n💬 开始与 {agent_info['name']} 对话")
+    # 每次进入对话都使用新的会话记忆
+    memory = memory_for_agent(agent_info['id'])
+    checkpointer = open_checkpoint(agent_info, memory)
     print("提示: 输入 'back' 返回 Agent 选择，输入 'quit' 退出程序\n")
     
     while True:
@@ -72,10 +206,19 @@ def chat_loop(agent, agent_info):
         
         try:
             print("\n🤖 助手: ", end="", flush=True)
-            response = agent.invoke(
-                {"messages": [{"role": "user", "content": user_input}]}
-            )
-            print(response)
+            inputs = {"messages": memory.build_messages(user_input)}
+            
+            # 交互式请求在限流队列中优先于批处理
+            with request_priority(PRIORITY_INTERACTIVE):
+                if config.STREAM_OUTPUT:
+                    response = stream_agent_response(agent, inputs)
+                else:
+                    response = agent.invoke(inputs)
+                    print(extract_response(response))
+            if response is not None:
+                memory.add_turn(user_input, extract_response(response))
+                if checkpointer is not None:
+                    checkpointer.flush()
             print()
         except Exception as e:
             print(f"\n❌ 错误: {str(e)}\n")
@@ -87,10 +230,17 @@ def main():
     print("🎯  欢迎使用 LangChain 智能代理交互系统")
     print("=" * 70)
     
+    preloaded = False
+    resume_reminders()
+    
     while True:
         # 显示 Agent 列表（从 definitions 文件夹动态加载）
         agents = display_agents()
         
+        if config.PRELOAD_MODULES and not preloaded:
+            preload_heavy_modules()
+            preloaded = True
+        
         # 获取用户选择
         choice = get_user_choice(agents)
         
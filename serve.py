@@ -0,0 +1,59 @@
+"""
+HTTP 服务入口
+把所有 Agent 以 HTTP 接口提供出去（同步调用和 SSE 流式调用）
+
+用法:
+    python serve.py --port 8000
+    python serve.py --fake            # 使用本地假模型，完全离线
+
+    curl localhost:8000/agents
+    curl -X POST localhost:8000/agents/basic/invoke -d '{"input": "北京天气怎么样"}'
+    curl -N -X POST localhost:8000/agents/basic/stream -d '{"input": "北京天气怎么样"}'
+    curl localhost:8000/metrics
+"""
+import argparse
+import asyncio
+import os
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="以 HTTP 服务运行 Agent")
+    parser.add_argument("--host", help="监听地址（默认 SERVER_HOST）")
+    parser.add_argument("--port", type=int, help="监听端口（默认 SERVER_PORT）")
+    parser.add_argument("-c", "--concurrency", type=int,
+                        help="同时执行的请求数（默认 SERVER_MAX_CONCURRENCY）")
+    parser.add_argument("--max-queue", type=int, help="排队请求数上限（默认 SERVER_MAX_QUEUE）")
+    parser.add_argument("--fake", action="store_true",
+                        help="使用本地假模型（MODEL_PROVIDER=fake），不访问网络")
+    parser.add_argument("--no-preload", action="store_true",
+                        help="启动时不预先构建 Agent")
+    args = parser.parse_args()
+
+    # 必须在导入配置之前设置
+    if args.fake:
+        os.environ["MODEL_PROVIDER"] = "fake"
+        os.environ["MODEL_ROUTING"] = ""
+
+    from src.agents import get_all_agent_infos
+    from src.server import AgentServer
+    from src.skills.reminders import get_reminder_scheduler
+
+    # 恢复上次运行时未触发的提醒
+    get_reminder_scheduler()
+
+    server = AgentServer(
+        host=args.host,
+        port=args.port,
+        max_concurrency=args.concurrency,
+        max_queue=args.max_queue,
+    )
+    preload = [] if args.no_preload else [info["id"] for info in get_all_agent_infos()]
+    try:
+        asyncio.run(server.serve_forever(preload=preload))
+    except KeyboardInterrupt:
+        print("\n👋 服务已停止")
+
+
+if __name__ == "__main__":
+    main()
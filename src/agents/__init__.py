@@ -3,16 +3,48 @@
 """
 from .agent_factory import AgentFactory
 from .loader import AgentLoader
+from .checkpoint import (
+    FileCheckpointStore,
+    SQLiteCheckpointStore,
+    SessionAgentMismatch,
+    SessionCheckpointer,
+    get_checkpoint_store,
+)
+from .memory import ConversationMemory, memory_for_agent
+from .prompt_prefix import PromptPrefix, get_prompt_prefix
+from ..llm.concurrency import provider_limiter
+from .session import AgentSession, arun_sessions
 from .definitions import (
     get_all_agent_definitions,
+    get_all_agent_infos,
     get_agent_by_id,
-    AVAILABLE_AGENTS,
 )
 
+
+def __getattr__(name):
+    # AVAILABLE_AGENTS 会导入全部定义模块，延迟到真正访问时
+    if name == "AVAILABLE_AGENTS":
+        return get_all_agent_definitions()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     'AgentFactory',
     'AgentLoader',
+    'AgentSession',
+    'ConversationMemory',
+    'FileCheckpointStore',
+    'SQLiteCheckpointStore',
+    'SessionAgentMismatch',
+    'SessionCheckpointer',
+    'get_checkpoint_store',
+    'memory_for_agent',
+    'PromptPrefix',
+    'get_prompt_prefix',
+    'arun_sessions',
+    'provider_limiter',
     'get_all_agent_definitions',
+    'get_all_agent_infos',
     'get_agent_by_id',
     'AVAILABLE_AGENTS',
 ]
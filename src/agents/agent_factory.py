@@ -2,29 +2,23 @@
 代理工厂模块
 用于创建不同类型的代理
 """
-from langchain.agents import create_agent
-from ..config import config
 from ..skills import BASIC_SKILLS, ADVANCED_SKILLS, get_all_skills
+from .loader import AgentLoader
 
 
 class AgentFactory:
-    """代理工厂类"""
+    """代理工厂类
+    
+    所有代理都通过 AgentLoader.build_agent 构建，共享 Agent 缓存和模型连接池。
+    """
     
     @staticmethod
     def create_basic_agent():
         """创建基础代理（只包含基础技能）"""
-        model_config = config.get_model_config()
-        
-        # 配置 DeepSeek
-        if config.MODEL_PROVIDER == "deepseek":
-            config.setup_deepseek()
-        
-        print(f"🤖 创建基础代理")
-        print(f"📋 模型: {model_config['name']}")
-        print(f"🛠️  技能: 天气查询、计算器、搜索\n")
-        
-        agent = create_agent(
-            model=model_config["model"],
+        return AgentLoader.build_agent(
+            agent_id="factory_basic",
+            name="基础代理",
+            version="factory",
             tools=BASIC_SKILLS,
             system_prompt="""你是一个智能助手，拥有以下基础技能：
             1. 查询天气信息
@@ -33,23 +27,14 @@ class AgentFactory:
             
             请根据用户的问题，选择合适的工具来回答。回答要简洁、准确、友好。""",
         )
-        
-        return agent
     
     @staticmethod
     def create_advanced_agent():
         """创建高级代理（包含所有技能）"""
-        model_config = config.get_model_config()
-        
-        if config.MODEL_PROVIDER == "deepseek":
-            config.setup_deepseek()
-        
-        print(f"🤖 创建高级代理")
-        print(f"📋 模型: {model_config['name']}")
-        print(f"🛠️  技能: 全部技能\n")
-        
-        agent = create_agent(
-            model=model_config["model"],
+        return AgentLoader.build_agent(
+            agent_id="factory_advanced",
+            name="高级代理",
+            version="factory",
             tools=get_all_skills(),
             system_prompt="""你是一个功能强大的智能助手，拥有多种技能：
             
@@ -59,8 +44,6 @@ class AgentFactory:
             
             请根据用户需求，灵活运用这些技能，提供专业、高效的服务。""",
         )
-        
-        return agent
     
     @staticmethod
     def create_custom_agent(tools: list, system_prompt: str):
@@ -73,19 +56,10 @@ class AgentFactory:
         Returns:
             自定义代理
         """
-        model_config = config.get_model_config()
-        
-        if config.MODEL_PROVIDER == "deepseek":
-            config.setup_deepseek()
-        
-        print(f"🤖 创建自定义代理")
-        print(f"📋 模型: {model_config['name']}")
-        print(f"🛠️  技能数量: {len(tools)}\n")
-        
-        agent = create_agent(
-            model=model_config["model"],
+        return AgentLoader.build_agent(
+            agent_id="factory_custom",
+            name="自定义代理",
+            version="factory",
             tools=tools,
             system_prompt=system_prompt,
         )
-        
-        return agent
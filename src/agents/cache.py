@@ -0,0 +1,118 @@
+"""
+Agent 缓存模块
+进程级缓存已构建的 Agent 图，避免重复编译和重复创建模型客户端
+"""
+import threading
+from collections import OrderedDict
+
+
+def _freeze(value):
+    """把配置值转换为可哈希的形式"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, set):
+        return tuple(sorted(_freeze(v) for v in value))
+    return value
+
+
+def _tool_key(tool):
+    """获取工具的稳定标识"""
+    name = getattr(tool, "name", None) or getattr(tool, "__name__", None)
+    module = getattr(tool, "__module__", "")
+    return f"{module}.{name}" if name else repr(tool)
+
+
+def make_agent_key(agent_id: str, version: str, tools: list,
+                   system_prompt: str, model_config: dict, options: dict = None) -> tuple:
+    """生成 Agent 缓存键
+
+    Args:
+        agent_id: Agent ID
+        version: 定义版本号
+        tools: 工具列表
+        system_prompt: 系统提示词
+        model_config: Config.get_model_config() 的返回值
+        options: 影响构建结果的其他开关（提示词缓存标记、性能埋点等）
+
+    Returns:
+        可哈希的缓存键
+    """
+    return (
+        agent_id,
+        version,
+        tuple(_tool_key(tool) for tool in tools),
+        system_prompt,
+        _freeze(model_config),
+        _freeze(options or {}),
+    )
+
+
+class AgentCache:
+    """线程安全的 LRU Agent 缓存"""
+
+    def __init__(self, max_size: int = 32):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """查询缓存，命中时刷新 LRU 顺序"""
+        with self._lock:
+            agent = self._entries.get(key)
+            if agent is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return agent
+
+    def put(self, key, agent):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = agent
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, agent_id: str = None) -> int:
+        """使缓存失效
+
+        Args:
+            agent_id: 只清除该 Agent 的条目；为 None 时清空全部
+
+        Returns:
+            被清除的条目数
+        """
+        with self._lock:
+            if agent_id is None:
+                count = len(self._entries)
+                self._entries.clear()
+                return count
+            keys = [key for key in self._entries if key[0] == agent_id]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def stats(self) -> dict:
+        """获取缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,330 @@
+"""
+会话检查点模块
+把会话记忆持久化到可替换的存储后端，进程重启后可按会话 ID 恢复。
+
+- 每轮只追加新产生的变更记录（新一轮对话、淘汰和摘要更新），不写完整快照
+- 按会话 ID 直接定位（SQLite 主键 / 每个会话一个文件），不扫描其他会话
+- 记录数明显多于当前状态时自动压缩为一份快照，限制恢复时需要重放的记录数
+
+存储后端:
+    SQLiteCheckpointStore  单个 SQLite 文件（WAL 模式），适合多会话的服务
+    FileCheckpointStore    每个会话一个只追加的 JSONL 文件，便于查看和备份
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from ..config import config
+
+
+class SessionAgentMismatch(ValueError):
+    """会话属于另一个 Agent，不能在当前 Agent 中恢复"""
+
+
+class CheckpointStore(ABC):
+    """检查点存储后端接口"""
+
+    @abstractmethod
+    def append(self, session_id: str, records: list, agent_id: str = None):
+        """追加记录"""
+
+    @abstractmethod
+    def load(self, session_id: str):
+        """读取会话
+
+        Returns:
+            (agent_id, 记录列表)；会话不存在时返回 None
+        """
+
+    @abstractmethod
+    def compact(self, session_id: str, records: list, agent_id: str = None):
+        """用快照记录替换会话的全部记录"""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """删除会话"""
+
+    @abstractmethod
+    def list_sessions(self) -> list:
+        """列出会话 [{"session_id", "agent_id", "updated_at"}, ...]（最近更新的在前）"""
+
+    def close(self):
+        """释放资源"""
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """SQLite 检查点存储"""
+
+    def __init__(self, db_path: str):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY,"
+            " agent_id TEXT,"
+            " next_seq INTEGER NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            " session_id TEXT NOT NULL,"
+            " seq INTEGER NOT NULL,"
+            " record TEXT NOT NULL,"
+            " PRIMARY KEY (session_id, seq)) WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    def _insert(self, session_id: str, records: list, agent_id: str, start_seq: int):
+        self._db.executemany(
+            "INSERT INTO records (session_id, seq, record) VALUES (?, ?, ?)",
+            [(session_id, start_seq + idx, json.dumps(record, ensure_ascii=False))
+             for idx, record in enumerate(records)],
+        )
+        self._db.execute(
+            "INSERT INTO sessions (session_id, agent_id, next_seq, updated_at)"
+            " VALUES (?, ?, ?, ?)"
+            " ON CONFLICT(session_id) DO UPDATE SET"
+            " agent_id = COALESCE(excluded.agent_id, agent_id),"
+            " next_seq = excluded.next_seq, updated_at = excluded.updated_at",
+            (session_id, agent_id, start_seq + len(records), time.time()),
+        )
+
+    def append(self, session_id: str, records: list, agent_id: str = None):
+        if not records:
+            return
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT next_seq FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            self._insert(session_id, records, agent_id, row[0] if row else 0)
+
+    def load(self, session_id: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT agent_id FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            rows = self._db.execute(
+                "SELECT record FROM records WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+        return row[0], [json.loads(record) for (record,) in rows]
+
+    def compact(self, session_id: str, records: list, agent_id: str = None):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM records WHERE session_id = ?", (session_id,))
+            self._insert(session_id, records, agent_id, 0)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM records WHERE session_id = ?", (session_id,))
+            cursor = self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        return cursor.rowcount > 0
+
+    def list_sessions(self) -> list:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT session_id, agent_id, updated_at FROM sessions ORDER BY updated_at DESC"
+            ).fetchall()
+        return [
+            {"session_id": session_id, "agent_id": agent_id, "updated_at": updated_at}
+            for session_id, agent_id, updated_at in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class FileCheckpointStore(CheckpointStore):
+    """只追加的 JSONL 文件检查点存储（每个会话一个文件）
+
+    文件第一行是会话元数据，之后每行一条记录。进程在写入中途退出时
+    可能留下不完整的最后一行，读取时会跳过。
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self, session_id: str) -> str:
+        # 会话 ID 可能包含任意字符，文件名使用其摘要
+        digest = hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{digest}.jsonl")
+
+    @staticmethod
+    def _lines(session_id: str, records: list, agent_id: str, with_meta: bool) -> str:
+        rows = []
+        if with_meta:
+            rows.append({"type": "meta", "session_id": session_id, "agent_id": agent_id})
+        rows.extend(records)
+        return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+    @staticmethod
+    def _ends_with_newline(path: str) -> bool:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def append(self, session_id: str, records: list, agent_id: str = None):
+        if not records:
+            return
+        path = self._path(session_id)
+        with self._lock:
+            exists = os.path.exists(path)
+            text = self._lines(session_id, records, agent_id, with_meta=not exists)
+            if exists and not self._ends_with_newline(path):
+                # 上次写入中断留下了半行，先换行，避免与新记录粘连
+                text = "\n" + text
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(text)
+
+    def load(self, session_id: str):
+        path = self._path(session_id)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return None
+
+        agent_id = None
+        records = []
+        for line in lines:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if row.get("type") == "meta":
+                agent_id = row.get("agent_id")
+            else:
+                records.append(row)
+        return agent_id, records
+
+    def compact(self, session_id: str, records: list, agent_id: str = None):
+        path = self._path(session_id)
+        tmp_path = path + ".tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self._lines(session_id, records, agent_id, with_meta=True))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            try:
+                os.remove(self._path(session_id))
+                return True
+            except FileNotFoundError:
+                return False
+
+    def list_sessions(self) -> list:
+        sessions = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".jsonl"):
+                continue
+            path = os.path.join(self.directory, name)
+            with open(path, "r", encoding="utf-8") as f:
+                try:
+                    meta = json.loads(f.readline())
+                except json.JSONDecodeError:
+                    continue
+            sessions.append({
+                "session_id": meta.get("session_id"),
+                "agent_id": meta.get("agent_id"),
+                "updated_at": os.path.getmtime(path),
+            })
+        return sorted(sessions, key=lambda item: item["updated_at"], reverse=True)
+
+
+class SessionCheckpointer:
+    """把一个会话的记忆变更增量写入检查点存储"""
+
+    def __init__(self, store: CheckpointStore, session_id: str, agent_id: str,
+                 memory, compact_threshold: int = None):
+        """
+        Args:
+            store: 检查点存储
+            session_id: 会话 ID
+            agent_id: Agent ID
+            memory: ConversationMemory 实例
+            compact_threshold: 存储中的记录数超过该值且超过当前状态的两倍时压缩
+        """
+        self.store = store
+        self.session_id = session_id
+        self.agent_id = agent_id
+        self.memory = memory
+        self.compact_threshold = compact_threshold or config.CHECKPOINT_COMPACT_RECORDS
+        self._stored = 0
+        self.compactions = 0
+
+    def resume(self) -> bool:
+        """从存储中恢复记忆
+
+        Returns:
+            是否找到并恢复了该会话
+
+        Raises:
+            SessionAgentMismatch: 会话属于另一个 Agent
+        """
+        loaded = self.store.load(self.session_id)
+        if loaded is None:
+            return False
+        agent_id, records = loaded
+        if agent_id and agent_id != self.agent_id:
+            raise SessionAgentMismatch(f"会话 {self.session_id} 属于 Agent {agent_id}")
+        self.memory.restore(records)
+        self._stored = len(records)
+        return True
+
+    def flush(self):
+        """写入自上次写入以来的变更，必要时压缩"""
+        records = self.memory.drain_journal()
+        if not records:
+            return
+        self.store.append(self.session_id, records, agent_id=self.agent_id)
+        self._stored += len(records)
+
+        if self._stored > self.compact_threshold:
+            snapshot = self.memory.snapshot()
+            if self._stored > 2 * len(snapshot):
+                self.store.compact(self.session_id, snapshot, agent_id=self.agent_id)
+                self._stored = len(snapshot)
+                self.compactions += 1
+
+
+_checkpoint_store = None
+_checkpoint_store_lock = threading.Lock()
+
+
+def get_checkpoint_store():
+    """按配置获取进程级共享的检查点存储
+
+    Returns:
+        CheckpointStore 实例；CHECKPOINT_STORE=off 时返回 None
+    """
+    global _checkpoint_store
+    if config.CHECKPOINT_STORE == "off":
+        return None
+    if _checkpoint_store is None:
+        with _checkpoint_store_lock:
+            if _checkpoint_store is None:
+                if config.CHECKPOINT_STORE == "file":
+                    _checkpoint_store = FileCheckpointStore(config.CHECKPOINT_DIR)
+                else:
+                    _checkpoint_store = SQLiteCheckpointStore(config.CHECKPOINT_PATH)
+    return _checkpoint_store
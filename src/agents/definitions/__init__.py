@@ -1,46 +1,208 @@
 """
 Agent 定义模块
 存放所有预定义的 Agent 配置
+
+定义文件在启动时只读取元数据（AGENT_INFO 字面量），不会被导入；
+模块在第一次被选中时才真正导入。新增 Agent 只需在本目录放置定义文件。
 """
-from . import basic_agent
-from . import advanced_agent
-from . import custom_agent
+import ast
+import importlib
+import json
+import os
+import threading
 
 
-# 所有可用的 Agent 定义
-AVAILABLE_AGENTS = [
-    basic_agent,
-    advanced_agent,
-    custom_agent,
-]
+# 定义文件所在目录
+_DEFINITIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 元数据索引的磁盘缓存，按文件 mtime 和大小校验
+_INDEX_CACHE_FILE = os.path.join(_DEFINITIONS_DIR, "__pycache__", "agent_index.json")
+
+# 未指定 order 的定义排在最后，按文件名排序
+_DEFAULT_ORDER = 1_000_000
+
+_lock = threading.Lock()
+_index = None       # agent_id -> {"module": 模块名, "info": 元数据}
+_ordered_ids = None  # 按显示顺序排列的 agent_id
+_modules = {}       # agent_id -> 已导入的定义模块
+
+
+def _parse_agent_info(path: str):
+    """从定义文件中静态解析 AGENT_INFO，不执行模块代码
+
+    Returns:
+        元数据字典；文件不是 Agent 定义或 AGENT_INFO 不是字面量时返回 None
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    if "AGENT_INFO" not in source:
+        return None
+    tree = ast.parse(source, filename=path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets = [node.target]
+        else:
+            continue
+        if any(isinstance(t, ast.Name) and t.id == "AGENT_INFO" for t in targets):
+            try:
+                return ast.literal_eval(node.value)
+            except ValueError:
+                return None
+    return None
+
+
+def _load_index_cache() -> dict:
+    """读取磁盘上的元数据缓存"""
+    try:
+        with open(_INDEX_CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index_cache(entries: dict):
+    """写入元数据缓存，失败时忽略
+
+    例如只读目录，或 AGENT_INFO 中含有集合、bytes 等无法写成 JSON 的字面量。
+    先写临时文件再原子替换，写到一半失败不会留下损坏的缓存。
+    """
+    tmp_path = f"{_INDEX_CACHE_FILE}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(_INDEX_CACHE_FILE), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp_path, _INDEX_CACHE_FILE)
+    except (OSError, TypeError, ValueError):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _build_index():
+    """扫描定义目录，建立 id -> 模块 的索引（每个进程只执行一次）"""
+    global _index, _ordered_ids
+
+    cached = _load_index_cache()
+    entries = {}
+    dirty = False
+
+    for filename in os.listdir(_DEFINITIONS_DIR):
+        if not filename.endswith(".py") or filename.startswith("_"):
+            continue
+        path = os.path.join(_DEFINITIONS_DIR, filename)
+        stat = os.stat(path)
+        signature = [stat.st_mtime_ns, stat.st_size]
+
+        entry = cached.get(filename)
+        if entry is None or entry.get("signature") != signature:
+            entry = {"signature": signature, "info": _parse_agent_info(path)}
+            dirty = True
+        entries[filename] = entry
+
+    if dirty or len(entries) != len(cached):
+        _save_index_cache(entries)
+
+    index = {}
+    for filename, entry in entries.items():
+        info = entry["info"]
+        if not info or "id" not in info:
+            continue
+        if info["id"] in index:
+            raise ValueError(
+                f"Agent ID 重复: {info['id']} "
+                f"({index[info['id']]['module']}, {filename[:-3]})"
+            )
+        index[info["id"]] = {"module": filename[:-3], "info": info}
+
+    _ordered_ids = sorted(
+        index,
+        key=lambda agent_id: (
+            index[agent_id]["info"].get("order", _DEFAULT_ORDER),
+            index[agent_id]["module"],
+        ),
+    )
+    _index = index
+
+
+def _ensure_index():
+    """按需构建索引"""
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _build_index()
+    return _index
+
+
+def _import_definition(agent_id: str):
+    """导入指定 Agent 的定义模块（带缓存）"""
+    module = _modules.get(agent_id)
+    if module is None:
+        entry = _ensure_index()[agent_id]
+        module = importlib.import_module(f".{entry['module']}", __name__)
+        _modules[agent_id] = module
+    return module
+
+
+def get_all_agent_infos():
+    """获取所有 Agent 的元数据（不导入定义模块）
+
+    Returns:
+        按显示顺序排列的元数据列表
+    """
+    index = _ensure_index()
+    return [index[agent_id]["info"] for agent_id in _ordered_ids]
+
+
+def get_agent_info_by_id(agent_id: str):
+    """根据 ID 获取 Agent 元数据（不导入定义模块）"""
+    entry = _ensure_index().get(agent_id)
+    return entry["info"] if entry else None
 
 
 def get_all_agent_definitions():
-    """获取所有 Agent 定义"""
-    return AVAILABLE_AGENTS
+    """获取所有 Agent 定义（会导入全部定义模块）"""
+    _ensure_index()
+    return [_import_definition(agent_id) for agent_id in _ordered_ids]
 
 
 def get_agent_by_id(agent_id: str):
     """根据 ID 获取 Agent 定义
-    
+
     Args:
         agent_id: Agent ID
-        
+
     Returns:
         Agent 定义模块，如果未找到则返回 None
     """
-    for agent_module in AVAILABLE_AGENTS:
-        info = agent_module.get_agent_info()
-        if info["id"] == agent_id:
-            return agent_module
-    return None
+    if agent_id not in _ensure_index():
+        return None
+    return _import_definition(agent_id)
+
+
+def reload_index():
+    """丢弃索引，下次访问时重新扫描定义目录"""
+    global _index, _ordered_ids
+    with _lock:
+        _index = None
+        _ordered_ids = None
+        _modules.clear()
+
+
+def __getattr__(name):
+    # AVAILABLE_AGENTS 保持兼容，但只在被访问时才导入全部定义
+    if name == "AVAILABLE_AGENTS":
+        return get_all_agent_definitions()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = [
     'AVAILABLE_AGENTS',
     'get_all_agent_definitions',
+    'get_all_agent_infos',
+    'get_agent_info_by_id',
     'get_agent_by_id',
-    'basic_agent',
-    'advanced_agent',
-    'custom_agent',
+    'reload_index',
 ]
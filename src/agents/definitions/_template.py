@@ -5,7 +5,7 @@ Agent 定义模板
 from ...skills import BASIC_SKILLS  # 根据需要导入技能
 
 
-# Agent 元数据
+# Agent 元数据（必须是字面量字典，启动时只静态读取，不导入本模块）
 AGENT_INFO = {
     "id": "template",  # 唯一标识符，使用小写字母和下划线
     "name": "模板 Agent",  # 显示名称
@@ -13,6 +13,7 @@ AGENT_INFO = {
     "icon": "🤖",  # 显示图标（emoji）
     "version": "1.0.0",  # 版本号
     "author": "Your Name",  # 作者
+    "order": 100,  # 可选：列表中的显示顺序，越小越靠前
 }
 
 
@@ -23,6 +24,8 @@ AGENT_CONFIG = {
     
     在这里描述 Agent 的角色、能力和行为准则。
     可以使用多行文本。""",
+    # 可选：会话记忆的 token 预算，未配置时使用全局默认值
+    # "memory": {"max_tokens": 2000, "summary_tokens": 300},
 }
 
 
@@ -13,6 +13,7 @@ AGENT_INFO = {
     "icon": "🔷",
     "version": "1.0.0",
     "author": "System",
+    "order": 1,
 }
 
 
@@ -2,7 +2,7 @@
 自定义 Agent 定义
 可以根据需求自定义技能组合
 """
-from ...skills import BASIC_SKILLS
+from ...skills import skill_registry
 
 
 # Agent 元数据
@@ -13,12 +13,13 @@ AGENT_INFO = {
     "icon": "⚙️",
     "version": "1.0.0",
     "author": "User",
+    "order": 3,
 }
 
 
 # Agent 配置
 AGENT_CONFIG = {
-    "tools": BASIC_SKILLS[:2],  # 只使用前两个技能：天气和计算
+    "tools": skill_registry.select(tags=["weather", "math"]),  # 按标签选择：天气和计算
     "system_prompt": """你是一个专注于天气查询和数学计算的助手。
     
     你的专长领域：
@@ -26,6 +27,8 @@ AGENT_CONFIG = {
     🔢  数学计算 - 快速计算各种数学表达式
     
     请专注于这两个领域，提供专业的服务。""",
+    # 天气和计算多为独立的短问答，保留较短的历史即可
+    "memory": {"max_tokens": 1000, "summary_tokens": 200},
 }
 
 
@@ -0,0 +1,229 @@
+"""
+Agent 性能埋点模块
+通过 LangChain 回调记录每一轮对话中模型调用的延迟和 token 数、每个工具调用的耗时
+以及整轮的总耗时，输出为 JSONL 事件，并按 Agent ID 和提供商聚合为直方图。
+
+关闭埋点（默认）时 Agent 上不挂任何回调，没有额外开销。
+"""
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from ..config import config
+from ..utils.metrics import JsonlEventWriter, MetricsRegistry
+
+
+# 进程级共享的指标注册表
+metrics = MetricsRegistry()
+
+_event_writer = None
+_event_writer_lock = threading.Lock()
+
+
+def get_event_writer():
+    """按配置获取共享的 JSONL 事件输出，未配置路径时返回 None"""
+    global _event_writer
+    if not config.INSTRUMENTATION_EVENTS_PATH:
+        return None
+    if _event_writer is None:
+        with _event_writer_lock:
+            if _event_writer is None:
+                _event_writer = JsonlEventWriter(config.INSTRUMENTATION_EVENTS_PATH)
+    return _event_writer
+
+
+def _token_usage(response) -> dict:
+    """从 LLMResult 中提取 token 用量"""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return {
+                    "input_tokens": usage.get("input_tokens", 0),
+                    "output_tokens": usage.get("output_tokens", 0),
+                }
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return {
+        "input_tokens": usage.get("prompt_tokens", 0),
+        "output_tokens": usage.get("completion_tokens", 0),
+    }
+
+
+def _routed_provider(response):
+    """多提供商路由时实际处理请求的提供商（见 RoutedChatModel），未路由时返回 None"""
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "response_metadata", None)
+            if metadata and metadata.get("routed_provider"):
+                return metadata["routed_provider"]
+    return None
+
+
+class InstrumentationHandler(BaseCallbackHandler):
+    """记录单个 Agent 的调用耗时和 token 用量"""
+
+    # 回调内部只做简单记录，直接在调用线程中执行
+    run_inline = True
+
+    def __init__(self, agent_id: str, provider: str,
+                 registry: MetricsRegistry = None, writer: JsonlEventWriter = None):
+        self.agent_id = agent_id
+        self.provider = provider
+        self.registry = registry or metrics
+        self.writer = writer
+        self._lock = threading.Lock()
+        self._roots = {}   # run_id -> 所属轮次的根 run_id
+        self._starts = {}  # run_id -> 开始时间
+        self._turns = {}   # 根 run_id -> 本轮累计数据
+        self._tool_names = {}  # run_id -> 工具名
+        self._first_token = set()
+
+    # ---- 内部工具 ----
+
+    def _start(self, run_id, parent_run_id):
+        """登记一个 run，返回其所属的根 run_id"""
+        now = time.perf_counter()
+        with self._lock:
+            root = self._roots.get(parent_run_id) if parent_run_id else None
+            if root is None:
+                root = run_id
+                self._turns[root] = {
+                    "model_calls": 0, "tool_calls": 0,
+                    "input_tokens": 0, "output_tokens": 0,
+                    "model_ms": 0.0, "tool_ms": 0.0,
+                }
+            self._roots[run_id] = root
+            self._starts[run_id] = now
+        return root
+
+    def _finish(self, run_id):
+        """结束一个 run，返回 (根 run_id, 耗时毫秒)"""
+        with self._lock:
+            root = self._roots.pop(run_id, None)
+            start = self._starts.pop(run_id, None)
+            self._first_token.discard(run_id)
+        if start is None:
+            return None, 0.0
+        return root, (time.perf_counter() - start) * 1000
+
+    def _emit(self, event: dict, provider: str = None):
+        event.update(agent_id=self.agent_id, provider=provider or self.provider)
+        if self.writer is not None:
+            self.writer.write(event)
+
+    def _record(self, name: str, value: float, provider: str = None):
+        self.registry.record(name, value, agent_id=self.agent_id,
+                             provider=provider or self.provider)
+
+    # ---- 整轮 ----
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end_chain(run_id, error=None)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end_chain(run_id, error=error)
+
+    def _end_chain(self, run_id, error):
+        root, elapsed_ms = self._finish(run_id)
+        if root != run_id:
+            return
+        with self._lock:
+            turn = self._turns.pop(root, {})
+        for field in ("model_ms", "tool_ms"):
+            if field in turn:
+                turn[field] = round(turn[field], 3)
+        self._record("turn_latency_ms", elapsed_ms)
+        event = {"type": "turn", "run_id": str(run_id), "latency_ms": round(elapsed_ms, 3), **turn}
+        if error is not None:
+            event["error"] = str(error)
+        self._emit(event)
+
+    # ---- 模型调用 ----
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        with self._lock:
+            if run_id in self._first_token:
+                return
+            self._first_token.add(run_id)
+            start = self._starts.get(run_id)
+        if start is not None:
+            self._record("model_ttft_ms", (time.perf_counter() - start) * 1000)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        root, elapsed_ms = self._finish(run_id)
+        usage = _token_usage(response)
+        provider = _routed_provider(response)
+        with self._lock:
+            turn = self._turns.get(root)
+            if turn is not None:
+                turn["model_calls"] += 1
+                turn["model_ms"] += elapsed_ms
+                turn["input_tokens"] += usage["input_tokens"]
+                turn["output_tokens"] += usage["output_tokens"]
+        self._record("model_latency_ms", elapsed_ms, provider)
+        self._record("model_input_tokens", usage["input_tokens"], provider)
+        self._record("model_output_tokens", usage["output_tokens"], provider)
+        self._emit({"type": "model_call", "run_id": str(run_id),
+                    "latency_ms": round(elapsed_ms, 3), **usage}, provider)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        _root, elapsed_ms = self._finish(run_id)
+        self._record("model_error_latency_ms", elapsed_ms)
+        self._emit({"type": "model_call", "run_id": str(run_id),
+                    "latency_ms": round(elapsed_ms, 3), "error": str(error)})
+
+    # ---- 工具调用 ----
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id)
+        with self._lock:
+            self._tool_names[run_id] = (serialized or {}).get("name", "unknown")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end_tool(run_id, error=None)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end_tool(run_id, error=error)
+
+    def _end_tool(self, run_id, error):
+        root, elapsed_ms = self._finish(run_id)
+        with self._lock:
+            name = self._tool_names.pop(run_id, "unknown")
+            turn = self._turns.get(root)
+            if turn is not None:
+                turn["tool_calls"] += 1
+                turn["tool_ms"] += elapsed_ms
+        self.registry.record("tool_latency_ms", elapsed_ms, agent_id=self.agent_id,
+                             provider=self.provider, tool=name)
+        event = {"type": "tool_call", "run_id": str(run_id), "tool": name,
+                 "latency_ms": round(elapsed_ms, 3)}
+        if error is not None:
+            event["error"] = str(error)
+        self._emit(event)
+
+
+def instrument_agent(agent, agent_id: str, provider: str = None):
+    """为 Agent 挂上埋点回调
+
+    Args:
+        agent: Agent 实例
+        agent_id: Agent ID（聚合标签）
+        provider: 模型提供商（聚合标签）；多提供商路由时模型调用按实际处理的提供商聚合
+
+    Returns:
+        挂好回调的 Agent（Runnable）
+    """
+    handler = InstrumentationHandler(
+        agent_id, config.get_provider_name(provider), writer=get_event_writer()
+    )
+    return agent.with_config({"callbacks": [handler]})
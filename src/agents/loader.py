@@ -1,30 +1,35 @@
 """
 Agent 加载器
 从 definitions 文件夹动态加载和创建 Agent
+
+LangChain 只在真正需要构建 Agent 时才导入，保证启动和列出 Agent 足够快。
 """
-from langchain.agents import create_agent
+import asyncio
+
 from ..config import config
-from .definitions import get_all_agent_definitions, get_agent_by_id
+from ..llm import client_pool
+from .cache import AgentCache, make_agent_key
+from .prompt_prefix import get_prompt_prefix
+from .definitions import get_all_agent_infos, get_agent_by_id
 
 
 class AgentLoader:
     """Agent 加载器类"""
     
+    # 进程级 Agent 缓存，所有会话共享
+    _cache = AgentCache(config.AGENT_CACHE_SIZE)
+    
     @staticmethod
     def load_all_agents():
-        """加载所有可用的 Agent 信息
+        """加载所有可用的 Agent 信息（只读取元数据，不导入定义模块）
         
         Returns:
             字典，键为序号，值为 Agent 信息
         """
-        agent_definitions = get_all_agent_definitions()
-        agents = {}
-        
-        for idx, agent_module in enumerate(agent_definitions, 1):
-            info = agent_module.get_agent_info()
-            agents[str(idx)] = info
-        
-        return agents
+        return {
+            str(idx): info
+            for idx, info in enumerate(get_all_agent_infos(), 1)
+        }
     
     @staticmethod
     def create_agent_by_choice(choice: str):
@@ -36,13 +41,12 @@ class AgentLoader:
         Returns:
             创建的 Agent 实例，失败返回 None
         """
-        agent_definitions = get_all_agent_definitions()
+        agent_infos = get_all_agent_infos()
         
         try:
             idx = int(choice) - 1
-            if 0 <= idx < len(agent_definitions):
-                agent_module = agent_definitions[idx]
-                return AgentLoader._create_agent_from_definition(agent_module)
+            if 0 <= idx < len(agent_infos):
+                return AgentLoader.create_agent_by_id(agent_infos[idx]["id"])
         except (ValueError, IndexError):
             pass
         
@@ -63,6 +67,20 @@ class AgentLoader:
             return AgentLoader._create_agent_from_definition(agent_module)
         return None
     
+    @staticmethod
+    async def acreate_agent_by_id(agent_id: str):
+        """异步根据 Agent ID 创建 Agent
+        
+        构建过程在线程中执行，不阻塞事件循环；已缓存的 Agent 直接返回。
+        
+        Args:
+            agent_id: Agent 的唯一标识符
+            
+        Returns:
+            创建的 Agent 实例，失败返回 None
+        """
+        return await asyncio.to_thread(AgentLoader.create_agent_by_id, agent_id)
+    
     @staticmethod
     def _create_agent_from_definition(agent_module):
         """从定义模块创建 Agent
@@ -76,29 +94,100 @@ class AgentLoader:
         info = agent_module.get_agent_info()
         config_data = agent_module.get_agent_config()
         
-        # 获取模型配置
-        model_config = config.get_model_config()
+        return AgentLoader.build_agent(
+            agent_id=info["id"],
+            name=info["name"],
+            version=info["version"],
+            tools=config_data["tools"],
+            system_prompt=config_data["system_prompt"],
+        )
+    
+    @staticmethod
+    def build_agent(agent_id: str, name: str, version: str,
+                    tools: list, system_prompt: str):
+        """构建 Agent，相同定义和模型配置直接复用缓存
+        
+        Args:
+            agent_id: Agent ID
+            name: 显示名称
+            version: 定义版本号
+            tools: 工具列表
+            system_prompt: 系统提示词
+            
+        Returns:
+            创建的 Agent 实例
+        """
+        # 获取模型配置（启用路由时以参与路由的提供商列表作为模型配置）
+        routing = config.get_routing_providers()
+        if routing:
+            model_config = {
+                "name": "路由: " + " / ".join(config.get_model_config(p)["name"] for p in routing),
+                "routing": routing,
+                "hedge_delay": config.ROUTER_HEDGE_DELAY,
+            }
+        else:
+            model_config = config.get_model_config()
+        
+        # 规范化的提示词前缀（工具按名称排序），每个定义只计算一次
+        prefix = get_prompt_prefix(agent_id, version, tools, system_prompt)
+        # 运行时切换提示词缓存标记或性能埋点后，不能复用按旧开关构建的 Agent
+        options = {
+            "cache_control": config.use_cache_control(routing or None),
+            "instrumentation": bool(config.INSTRUMENTATION),
+        }
+        key = make_agent_key(agent_id, version, prefix.tools, prefix.system_prompt,
+                             model_config, options)
+        
+        agent = AgentLoader._cache.get(key)
+        if agent is not None:
+            print(f"♻️  复用已缓存的 {name}\n")
+            return agent
         
-        # 配置 DeepSeek
-        if config.MODEL_PROVIDER == "deepseek":
-            config.setup_deepseek()
+        # 延迟导入 LangChain（导入开销远大于启动的其他部分）
+        from langchain.agents import create_agent
         
         # 打印创建信息
-        print(f"🤖 创建 {info['name']}")
+        print(f"🤖 创建 {name}")
         print(f"📋 模型: {model_config['name']}")
-        print(f"🛠️  技能数量: {len(config_data['tools'])}")
-        print(f"📝 版本: {info['version']}")
+        print(f"🛠️  技能数量: {len(tools)}")
+        print(f"📝 版本: {version}")
+        print(f"🧷 提示词前缀: {prefix.digest}")
         print()
         
-        # 创建 Agent
+        # 创建 Agent（模型实例按提供商共享，复用 HTTP 连接池；
+        # 工具经过执行器包装，同一步中的多个调用并发执行并各自限时，
+        # 工具对象和 schema 每个技能只生成一次）
         agent = create_agent(
-            model=model_config["model"],
-            tools=config_data["tools"],
-            system_prompt=config_data["system_prompt"],
+            model=client_pool.get_model(),
+            tools=prefix.agent_tools,
+            system_prompt=prefix.system_message(cache_control=options["cache_control"]),
         )
         
+        # 性能埋点（关闭时不挂回调，没有额外开销）
+        if options["instrumentation"]:
+            from .instrumentation import instrument_agent
+            agent = instrument_agent(agent, agent_id)
+        
+        AgentLoader._cache.put(key, agent)
         return agent
     
+    @staticmethod
+    def invalidate_cache(agent_id: str = None) -> int:
+        """使 Agent 缓存失效
+        
+        Args:
+            agent_id: 只清除该 Agent；为 None 时清空全部
+            
+        Returns:
+            被清除的条目数
+        """
+        return AgentLoader._cache.invalidate(agent_id)
+    
+    @staticmethod
+    def cache_stats() -> dict:
+        """获取 Agent 缓存的命中统计"""
+        return AgentLoader._cache.stats()
+    
     @staticmethod
     def get_agent_info_by_choice(choice: str):
         """根据选择获取 Agent 信息
@@ -0,0 +1,307 @@
+"""
+会话记忆模块
+为每个会话维护按 token 预算截断的多轮对话历史。
+
+- 历史只保留用户输入和助手的最终回复，不保留中间的工具调用消息
+- 每条消息的 token 数在加入时计算一次并缓存，总数增量维护
+- 超出预算时按整轮淘汰最早的对话，淘汰的内容增量合并进摘要，
+  一次淘汰到低水位以下，避免每轮都改写摘要
+- 预算可以在 Agent 定义的 AGENT_CONFIG["memory"] 中单独配置
+- 每次变更记录为日志条目，供检查点存储增量写入和重放恢复
+"""
+import re
+import threading
+
+from ..config import config
+
+
+# 中日韩字符按每字一个 token 估算，其余字符按约 4 个字符一个 token 估算
+_CJK_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+# 每条消息的固定开销（角色标记等）
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PREFIX = "以下是之前对话的摘要，请在回答时参考：\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本的 token 数（不依赖具体模型的分词器）"""
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def content_text(content) -> str:
+    """从消息内容中提取文本（兼容字符串和内容块列表）"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block)
+            for block in content
+            if not isinstance(block, dict) or block.get("type") == "text"
+        )
+    return str(content or "")
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def extractive_summarizer(summary: str, evicted: list, max_tokens: int) -> str:
+    """默认摘要器：把淘汰的每轮对话压缩成一行，超出摘要预算时丢弃最早的行
+
+    Args:
+        summary: 已有摘要
+        evicted: 被淘汰的消息列表 [{"role": ..., "content": ...}, ...]
+        max_tokens: 摘要的 token 预算
+
+    Returns:
+        合并后的摘要
+    """
+    lines = summary.splitlines() if summary else []
+    for message in evicted:
+        label = "用户" if message["role"] == "user" else "助手"
+        lines.append(f"- {label}: {_clip(message['content'], 120)}")
+
+    total = sum(estimate_tokens(line) for line in lines)
+    while lines and total > max_tokens:
+        total -= estimate_tokens(lines.pop(0))
+    return "\n".join(lines)
+
+
+def model_summarizer(model):
+    """使用聊天模型生成摘要的摘要器
+
+    每次只把上一版摘要和新淘汰的对话交给模型，不会重新处理全部历史。
+
+    Args:
+        model: LangChain 聊天模型
+
+    Returns:
+        摘要器函数，签名同 extractive_summarizer
+    """
+    def summarize(summary: str, evicted: list, max_tokens: int) -> str:
+        dialogue = "\n".join(
+            f"{'用户' if m['role'] == 'user' else '助手'}: {m['content']}" for m in evicted
+        )
+        prompt = (
+            f"请把已有摘要和新的对话合并成一份不超过 {max_tokens} 个 token 的摘要，"
+            f"保留用户的偏好、已知事实和未完成的事项，只输出摘要。\n\n"
+            f"已有摘要:\n{summary or '（无）'}\n\n新的对话:\n{dialogue}"
+        )
+        return content_text(model.invoke(prompt).content).strip()
+
+    return summarize
+
+
+class ConversationMemory:
+    """按 token 预算截断的会话记忆"""
+
+    def __init__(self, max_tokens: int = None, summary_tokens: int = None,
+                 low_watermark: float = None, summarizer=None):
+        """
+        Args:
+            max_tokens: 历史（含摘要）的 token 预算，0 表示不保留历史
+            summary_tokens: 摘要的 token 预算，0 表示淘汰的内容直接丢弃
+            low_watermark: 超出预算时淘汰到预算的多少比例以下
+            summarizer: 摘要器函数，默认使用 extractive_summarizer
+        """
+        self.max_tokens = config.MEMORY_MAX_TOKENS if max_tokens is None else max_tokens
+        self.summary_tokens = (
+            config.MEMORY_SUMMARY_TOKENS if summary_tokens is None else summary_tokens
+        )
+        self.low_watermark = low_watermark or config.MEMORY_LOW_WATERMARK
+        self.summarizer = summarizer or extractive_summarizer
+        self._turns = []  # [(消息列表, token 数), ...]
+        self._tokens = 0
+        self._summary = ""
+        self._summary_message = None
+        self._journal = []  # 尚未持久化的变更记录
+        self._lock = threading.Lock()
+        self.evicted_turns = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_tokens > 0
+
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    @property
+    def tokens(self) -> int:
+        """当前历史（含摘要）的 token 数"""
+        return self._tokens + self._summary_cost()
+
+    def _summary_cost(self) -> int:
+        if self._summary_message is None:
+            return 0
+        return self._summary_message[1]
+
+    def build_messages(self, user_input: str) -> list:
+        """构建本轮发送给 Agent 的消息列表：摘要 + 历史窗口 + 本轮输入
+
+        Args:
+            user_input: 用户输入
+
+        Returns:
+            消息字典列表
+        """
+        messages = []
+        with self._lock:
+            if self._summary_message is not None:
+                messages.append(self._summary_message[0])
+            for turn, _tokens in self._turns:
+                messages.extend(turn)
+        messages.append({"role": "user", "content": user_input})
+        return messages
+
+    def add_turn(self, user_input: str, reply) -> None:
+        """记录一轮对话，超出预算时淘汰最早的对话并更新摘要
+
+        Args:
+            user_input: 用户输入
+            reply: 助手回复（文本或消息内容）
+        """
+        if not self.enabled:
+            return
+        turn = [
+            {"role": "user", "content": user_input},
+            {"role": "assistant", "content": content_text(reply)},
+        ]
+        tokens = sum(
+            estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in turn
+        )
+        with self._lock:
+            self._append_turn(turn, tokens)
+            self._journal.append({"type": "turn", "messages": turn, "tokens": tokens})
+            if self.tokens > self.max_tokens:
+                self._evict()
+
+    def _append_turn(self, turn: list, tokens: int):
+        self._turns.append((turn, tokens))
+        self._tokens += tokens
+
+    def _pop_turns(self, count: int) -> list:
+        """移除最早的 count 轮，返回其中的消息"""
+        evicted = []
+        for turn, tokens in self._turns[:count]:
+            self._tokens -= tokens
+            evicted.extend(turn)
+        del self._turns[:count]
+        self.evicted_turns += count
+        return evicted
+
+    def _set_summary(self, summary: str):
+        self._summary = summary
+        if summary:
+            message = {"role": "user", "content": SUMMARY_PREFIX + summary}
+            self._summary_message = (
+                message, estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+            )
+        else:
+            self._summary_message = None
+
+    def _evict(self):
+        """淘汰最早的若干轮，直到低于低水位（至少保留最近一轮）"""
+        target = int(self.max_tokens * self.low_watermark)
+        total = self.tokens
+        count = 0
+        while count < len(self._turns) - 1 and total > target:
+            total -= self._turns[count][1]
+            count += 1
+        if not count:
+            return
+
+        evicted = self._pop_turns(count)
+        if self.summary_tokens > 0:
+            self._set_summary(self.summarizer(self._summary, evicted, self.summary_tokens))
+        self._journal.append({"type": "evict", "turns": count, "summary": self._summary})
+
+    # ---- 持久化 ----
+
+    def drain_journal(self) -> list:
+        """取出自上次调用以来的变更记录"""
+        with self._lock:
+            journal, self._journal = self._journal, []
+        return journal
+
+    def snapshot(self) -> list:
+        """当前状态的完整记录（用于压缩检查点）"""
+        with self._lock:
+            records = []
+            if self._summary:
+                records.append({"type": "summary", "summary": self._summary})
+            records.extend(
+                {"type": "turn", "messages": turn, "tokens": tokens}
+                for turn, tokens in self._turns
+            )
+        return records
+
+    def restore(self, records: list):
+        """按顺序重放记录恢复状态（turn 记录中缓存了 token 数，无需重新估算）
+
+        Args:
+            records: snapshot() 或 drain_journal() 产生的记录
+        """
+        with self._lock:
+            for record in records:
+                kind = record.get("type")
+                if kind == "turn":
+                    self._append_turn(record["messages"], record["tokens"])
+                elif kind == "evict":
+                    self._pop_turns(record["turns"])
+                    self._set_summary(record.get("summary", ""))
+                elif kind == "summary":
+                    self._set_summary(record.get("summary", ""))
+                elif kind == "clear":
+                    self._turns.clear()
+                    self._tokens = 0
+                    self._set_summary("")
+
+    def clear(self):
+        """清空历史和摘要"""
+        with self._lock:
+            self._turns.clear()
+            self._tokens = 0
+            self._set_summary("")
+            self._journal.append({"type": "clear"})
+
+    def stats(self) -> dict:
+        """获取记忆概况"""
+        return {
+            "turns": len(self._turns),
+            "tokens": self.tokens,
+            "max_tokens": self.max_tokens,
+            "summary_tokens": self._summary_cost(),
+            "evicted_turns": self.evicted_turns,
+        }
+
+
+def memory_for_agent(agent_id: str, summarizer=None) -> ConversationMemory:
+    """按 Agent 定义中的 AGENT_CONFIG["memory"] 创建会话记忆
+
+    未找到定义（如 AgentFactory 创建的 Agent）或未配置时使用全局默认值。
+
+    Args:
+        agent_id: Agent ID
+        summarizer: 摘要器函数
+
+    Returns:
+        ConversationMemory 实例
+    """
+    from .definitions import get_agent_by_id
+
+    options = {}
+    agent_module = get_agent_by_id(agent_id)
+    if agent_module is not None:
+        options = dict(agent_module.get_agent_config().get("memory") or {})
+    return ConversationMemory(
+        max_tokens=options.get("max_tokens"),
+        summary_tokens=options.get("summary_tokens"),
+        low_watermark=options.get("low_watermark"),
+        summarizer=summarizer,
+    )
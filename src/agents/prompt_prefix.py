@@ -0,0 +1,135 @@
+"""
+提示词前缀模块
+为每个 Agent 定义生成字节稳定的系统提示词和工具列表，使提供商的提示词缓存可以命中。
+
+每次请求的开头都是工具定义和系统提示词，只要这部分逐字节不变，提供商就可以复用
+上一轮已经处理过的前缀，降低首 token 延迟和输入费用：
+
+- 系统提示词规范化：去掉三引号字符串带来的公共缩进和行尾空白
+- 工具按名称排序，不受技能列表拼接顺序的影响
+- 工具 schema 按固定键顺序序列化后计算摘要，便于确认不同进程 / 版本的前缀是否一致
+- 每个定义只计算一次，之后直接复用
+- 需要显式缓存标记的提供商（Anthropic）在系统提示词块上加 cache_control，
+  缓存范围覆盖之前的工具定义；OpenAI / DeepSeek 等自动按前缀缓存，只需前缀稳定
+"""
+import hashlib
+import inspect
+import json
+import threading
+
+from .cache import _tool_key
+from .tool_executor import tool_executor
+
+
+def canonical_prompt(text: str) -> str:
+    """规范化系统提示词：去掉公共缩进、首尾空行和行尾空白，统一换行符"""
+    text = inspect.cleandoc(text.replace("\r\n", "\n"))
+    return "\n".join(line.rstrip() for line in text.split("\n"))
+
+
+def tool_name(tool) -> str:
+    """获取工具名（函数名或工具对象的 name）"""
+    if isinstance(tool, dict):
+        return tool.get("name") or tool.get("function", {}).get("name", "")
+    return getattr(tool, "name", None) or getattr(tool, "__name__", "")
+
+
+def sort_tools(tools: list) -> list:
+    """按工具名排序（同名时保持原顺序）"""
+    return sorted(tools, key=tool_name)
+
+
+def _tool_schema(tool, agent_tool) -> dict:
+    """工具 schema：@skill 登记的技能复用注册表中生成好的 schema"""
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+    from ..skills.registry import get_skill_meta
+
+    spec = get_skill_meta(tool)
+    if spec is not None and tool is spec.tool:
+        return spec.tool_schema
+
+    return convert_to_openai_tool(agent_tool)
+
+
+class PromptPrefix:
+    """一个 Agent 定义的规范化提示词前缀"""
+
+    def __init__(self, system_prompt: str, tools: list):
+        """
+        Args:
+            system_prompt: 原始系统提示词
+            tools: 原始工具列表（技能函数或工具对象）
+        """
+        self.system_prompt = canonical_prompt(system_prompt)
+        self.tools = sort_tools(tools)
+        # 经过执行器包装并预先转换好的工具对象，创建 Agent 时不再重复生成 schema
+        self.agent_tools = tool_executor.as_tools(self.tools)
+        self.tool_schemas = [
+            _tool_schema(tool, agent_tool)
+            for tool, agent_tool in zip(self.tools, self.agent_tools)
+        ]
+        self.text = json.dumps(
+            {"system": self.system_prompt, "tools": self.tool_schemas},
+            ensure_ascii=False, sort_keys=True, separators=(",", ":"),
+        )
+        self.digest = hashlib.sha256(self.text.encode("utf-8")).hexdigest()[:16]
+        self._cached_message = None
+
+    def system_message(self, cache_control: bool = False):
+        """生成传给 create_agent 的系统提示词
+
+        Args:
+            cache_control: 是否加入 Anthropic 风格的缓存断点
+
+        Returns:
+            带缓存断点时返回 SystemMessage，否则返回字符串
+        """
+        if not cache_control:
+            return self.system_prompt
+        if self._cached_message is None:
+            from langchain_core.messages import SystemMessage
+
+            self._cached_message = SystemMessage(content=[{
+                "type": "text",
+                "text": self.system_prompt,
+                "cache_control": {"type": "ephemeral"},
+            }])
+        return self._cached_message
+
+    def stats(self) -> dict:
+        """获取前缀概况"""
+        from .memory import estimate_tokens
+
+        return {
+            "digest": self.digest,
+            "tools": [tool_name(tool) for tool in self.tools],
+            "chars": len(self.text),
+            "tokens": estimate_tokens(self.text),
+        }
+
+
+_prefixes = {}
+_prefixes_lock = threading.Lock()
+
+
+def get_prompt_prefix(agent_id: str, version: str, tools: list, system_prompt: str) -> PromptPrefix:
+    """获取 Agent 定义的提示词前缀（每个定义只计算一次）
+
+    Args:
+        agent_id: Agent ID
+        version: 定义版本号
+        tools: 工具列表
+        system_prompt: 系统提示词
+
+    Returns:
+        PromptPrefix 实例
+    """
+    key = (agent_id, version, system_prompt, tuple(_tool_key(tool) for tool in tools))
+    prefix = _prefixes.get(key)
+    if prefix is None:
+        with _prefixes_lock:
+            prefix = _prefixes.get(key)
+            if prefix is None:
+                prefix = PromptPrefix(system_prompt, tools)
+                _prefixes[key] = prefix
+    return prefix
@@ -0,0 +1,145 @@
+"""
+异步会话模块
+在一个事件循环中同时服务多个对话；模型调用的并发按提供商由 llm.concurrency 限制
+"""
+import asyncio
+import time
+import uuid
+
+from ..config import config
+from ..llm.priority import PRIORITY_INTERACTIVE, request_priority
+from ..utils import extract_response
+from .checkpoint import SessionCheckpointer, get_checkpoint_store
+from .loader import AgentLoader
+from .memory import ConversationMemory, memory_for_agent
+
+
+class AgentSession:
+    """单个对话会话
+
+    多个会话可以共享同一个 Agent 实例，每次模型调用由 provider_limiter
+    控制同一提供商的在途请求数。每个会话有自己的会话记忆；配置了检查点存储时，
+    按 session_id 恢复之前的历史，并在每轮结束后增量写入。
+
+    构造函数会同步读取检查点，在事件循环中请使用 AgentSession.acreate()。
+    """
+
+    def __init__(self, agent, agent_id: str, session_id: str = None,
+                 provider: str = None, memory: ConversationMemory = None,
+                 store=None, priority: int = PRIORITY_INTERACTIVE):
+        self.agent = agent
+        self.agent_id = agent_id
+        self.session_id = session_id or uuid.uuid4().hex
+        self.provider = config.get_provider_name(provider)
+        self.memory = memory or memory_for_agent(agent_id)
+        self.priority = priority
+        self.turns = 0
+
+        store = store or get_checkpoint_store()
+        self.checkpointer = None
+        self.resumed = False
+        if store is not None:
+            self.checkpointer = SessionCheckpointer(store, self.session_id, agent_id, self.memory)
+            self.resumed = self.checkpointer.resume()
+
+    @classmethod
+    async def acreate(cls, agent, agent_id: str, **kwargs) -> "AgentSession":
+        """在线程中创建会话（恢复检查点是阻塞 I/O），参数同构造函数"""
+        return await asyncio.to_thread(cls, agent, agent_id, **kwargs)
+
+    def _build_input(self, user_input: str) -> dict:
+        """构建 Agent 输入（包含按预算截断的历史）"""
+        return {"messages": self.memory.build_messages(user_input)}
+
+    async def ainvoke(self, user_input: str):
+        """异步发送一条用户消息
+
+        Args:
+            user_input: 用户输入
+
+        Returns:
+            Agent 的完整响应
+        """
+        inputs = self._build_input(user_input)
+        with request_priority(self.priority):
+            response = await self.agent.ainvoke(inputs)
+        await self._finish_turn(user_input, response)
+        return response
+
+    async def astream(self, user_input: str):
+        """异步发送一条用户消息，逐个产出流式事件
+
+        本轮完整结束后才写入会话记忆；中途取消或出错时本轮不计入历史。
+
+        Args:
+            user_input: 用户输入
+
+        Yields:
+            (mode, payload)，与 agent.astream(stream_mode=["messages", "values"]) 相同
+        """
+        inputs = self._build_input(user_input)
+        final_state = None
+        with request_priority(self.priority):
+            async for mode, payload in self.agent.astream(
+                inputs, stream_mode=["messages", "values"]
+            ):
+                if mode == "values":
+                    final_state = payload
+                yield mode, payload
+        if final_state is not None:
+            await self._finish_turn(user_input, final_state)
+
+    async def _finish_turn(self, user_input: str, response):
+        """把本轮写入会话记忆和检查点"""
+        self.memory.add_turn(user_input, extract_response(response))
+        if self.checkpointer is not None:
+            await asyncio.to_thread(self.checkpointer.flush)
+        self.turns += 1
+
+
+async def arun_conversation(session: AgentSession, user_inputs: list) -> list:
+    """在一个会话中依次发送多条消息
+
+    Returns:
+        每一轮的结果字典列表，包含响应和耗时
+    """
+    results = []
+    for user_input in user_inputs:
+        start = time.perf_counter()
+        try:
+            response = await session.ainvoke(user_input)
+            results.append({
+                "input": user_input,
+                "output": extract_response(response),
+                "latency": time.perf_counter() - start,
+            })
+        except Exception as e:
+            results.append({
+                "input": user_input,
+                "error": str(e),
+                "latency": time.perf_counter() - start,
+            })
+    return results
+
+
+async def arun_sessions(agent_id: str, conversations: list) -> list:
+    """在同一个事件循环中并发运行多个对话
+
+    Args:
+        agent_id: Agent ID
+        conversations: 对话列表，每个对话是一组按顺序发送的用户输入
+
+    Returns:
+        与 conversations 一一对应的结果列表
+    """
+    agent = await AgentLoader.acreate_agent_by_id(agent_id)
+    if agent is None:
+        raise ValueError(f"未找到 Agent: {agent_id}")
+
+    sessions = await asyncio.gather(*(
+        AgentSession.acreate(agent, agent_id) for _ in conversations
+    ))
+    return await asyncio.gather(*(
+        arun_conversation(session, user_inputs)
+        for session, user_inputs in zip(sessions, conversations)
+    ))
@@ -0,0 +1,156 @@
+"""
+工具执行模块
+为 Agent 的工具调用提供共享线程池、单工具超时和错误隔离
+
+模型在一步中返回多个工具调用时，LangGraph 会并发派发这些调用；
+同步技能在共享线程池中执行，异步技能直接在事件循环中执行。
+单个工具超时或抛出异常只影响它自己的结果（以错误文本返回给模型），
+同一步中的其他工具照常完成，结果按调用顺序返回。
+"""
+import asyncio
+import functools
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from ..config import config
+
+
+# 技能可以通过该属性声明自己的超时时间（秒）
+TIMEOUT_ATTR = "__skill_timeout__"
+
+
+class ToolExecutor:
+    """并发工具执行器"""
+
+    def __init__(self, max_workers: int = None, default_timeout: float = None):
+        self.max_workers = max_workers or config.TOOL_MAX_WORKERS
+        self.default_timeout = default_timeout or config.TOOL_TIMEOUT
+        self._pool = None
+        self._wrapped = {}
+        self._tools = {}
+        self._lock = threading.Lock()
+        self.timeouts = 0
+        self.failures = 0
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        """按需创建共享线程池"""
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="tool"
+                    )
+        return self._pool
+
+    def _timeout_for(self, func) -> float:
+        return getattr(func, TIMEOUT_ATTR, None) or self.default_timeout
+
+    def _timeout_message(self, name: str, timeout: float) -> str:
+        with self._lock:
+            self.timeouts += 1
+        return f"❌ 工具 {name} 执行超时（{timeout}s）"
+
+    def _error_message(self, name: str, error: Exception) -> str:
+        with self._lock:
+            self.failures += 1
+        return f"❌ 工具 {name} 执行失败: {error}"
+
+    def wrap(self, func):
+        """包装技能函数：限时执行并把异常转换为错误文本
+
+        包装后的函数保留原函数的签名和文档，工具 schema 不变。
+        注意：超时的同步技能无法被强制终止，只是不再等待其结果。
+        """
+        if isinstance(func, type) or not callable(func) or hasattr(func, "args_schema"):
+            # 已经是 LangChain 工具对象等，交给框架处理
+            return func
+
+        with self._lock:
+            wrapped = self._wrapped.get(func)
+        if wrapped is not None:
+            return wrapped
+
+        name = getattr(func, "__name__", repr(func))
+        timeout = self._timeout_for(func)
+
+        # 是否超时只看任务有没有在时限内结束：技能自己抛出的 TimeoutError
+        # 按执行失败处理，不计为超时
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapped(*args, **kwargs):
+                task = asyncio.ensure_future(func(*args, **kwargs))
+                try:
+                    done, _ = await asyncio.wait({task}, timeout=timeout)
+                except asyncio.CancelledError:
+                    task.cancel()
+                    raise
+                if not done:
+                    task.cancel()
+                    return self._timeout_message(name, timeout)
+                try:
+                    return task.result()
+                except Exception as e:
+                    return self._error_message(name, e)
+        else:
+            @functools.wraps(func)
+            def wrapped(*args, **kwargs):
+                future = self.pool.submit(func, *args, **kwargs)
+                done, _ = wait([future], timeout=timeout)
+                if not done:
+                    future.cancel()
+                    return self._timeout_message(name, timeout)
+                try:
+                    return future.result()
+                except Exception as e:
+                    return self._error_message(name, e)
+
+        with self._lock:
+            self._wrapped[func] = wrapped
+        return wrapped
+
+    def as_tool(self, func):
+        """包装技能并转换为 LangChain 工具对象
+
+        工具 schema 由函数签名和文档生成，开销较大；每个技能只转换一次，
+        之后创建 Agent 时直接复用。
+        """
+        if isinstance(func, type) or not callable(func) or hasattr(func, "args_schema"):
+            return func
+
+        with self._lock:
+            tool = self._tools.get(func)
+        if tool is not None:
+            return tool
+
+        from langchain_core.tools import tool as make_tool
+
+        tool = make_tool(self.wrap(func))
+        with self._lock:
+            tool = self._tools.setdefault(func, tool)
+        return tool
+
+    def as_tools(self, tools: list) -> list:
+        """把工具列表转换为 LangChain 工具对象"""
+        return [self.as_tool(tool) for tool in tools]
+
+    def stats(self) -> dict:
+        """获取执行统计"""
+        return {
+            "max_workers": self.max_workers,
+            "default_timeout": self.default_timeout,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+        }
+
+    def shutdown(self):
+        """关闭线程池"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+# 进程级共享的工具执行器
+tool_executor = ToolExecutor()
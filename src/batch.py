@@ -0,0 +1,216 @@
+"""
+批处理模块
+把 JSONL 文件中的请求并行发送给指定 Agent，结果逐条写入输出 JSONL
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import nullcontext
+
+from .agents.loader import AgentLoader
+from .llm.priority import PRIORITY_BATCH, request_priority
+from .utils import extract_response
+
+
+# 未指定字段名时依次尝试的字段
+DEFAULT_ID_FIELDS = ("request_id", "id")
+DEFAULT_PROMPT_FIELDS = ("prompt", "input", "body")
+
+
+def _pick(record: dict, fields):
+    """返回记录中第一个存在的字段值"""
+    for field in fields:
+        if field in record and record[field] not in (None, ""):
+            return record[field]
+    return None
+
+
+def _percentile(ordered: list, q: float) -> float:
+    """计算已排序列表的分位数"""
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def load_completed_ids(output_path: str, retry_errors: bool = False) -> set:
+    """读取已有输出文件中完成的请求 ID，用于断点续跑
+
+    Args:
+        output_path: 输出文件路径
+        retry_errors: 为 True 时失败的请求不算完成，会重新执行
+
+    Returns:
+        已完成的请求 ID 集合
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 崩溃时可能留下半行，忽略即可
+                continue
+            if not isinstance(record, dict):
+                continue
+            if retry_errors and "error" in record:
+                continue
+            completed.add(record.get("id"))
+    return completed
+
+
+class BatchRunner:
+    """JSONL 批处理执行器"""
+
+    def __init__(self, agent_id: str, concurrency: int = 4,
+                 id_fields=DEFAULT_ID_FIELDS, prompt_fields=DEFAULT_PROMPT_FIELDS,
+                 use_cache: bool = True):
+        self.agent_id = agent_id
+        self.use_cache = use_cache
+        self.concurrency = max(1, concurrency)
+        self.id_fields = tuple(id_fields)
+        self.prompt_fields = tuple(prompt_fields)
+
+    def _iter_items(self, input_path: str):
+        """逐行读取输入文件
+
+        Yields:
+            (请求 ID, 提示词, 错误信息)；正常的行错误信息为 None，
+            无法解析或不是 JSON 对象的行为 (line-N, None, 错误信息)
+        """
+        with open(input_path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield f"line-{line_no}", None, f"无法解析的输入行: {e}"
+                    continue
+                if not isinstance(record, dict):
+                    yield f"line-{line_no}", None, \
+                        f"输入行不是 JSON 对象: {type(record).__name__}"
+                    continue
+                item_id = _pick(record, self.id_fields)
+                item_id = str(item_id) if item_id is not None else f"line-{line_no}"
+                yield item_id, _pick(record, self.prompt_fields), None
+
+    def _cache_context(self):
+        """不使用缓存时跳过模型响应缓存的读取"""
+        if self.use_cache:
+            return nullcontext()
+        from .llm.response_cache import bypass_response_cache
+        return bypass_response_cache()
+
+    def _run_item(self, agent, item_id: str, prompt) -> dict:
+        """执行单个请求，异常被转换为错误记录"""
+        start = time.perf_counter()
+        result = {"id": item_id, "agent_id": self.agent_id}
+        try:
+            if prompt is None:
+                raise ValueError(f"缺少提示词字段: {', '.join(self.prompt_fields)}")
+            # 批处理请求在限流队列中排在交互式会话之后
+            with self._cache_context(), request_priority(PRIORITY_BATCH):
+                response = agent.invoke(
+                    {"messages": [{"role": "user", "content": str(prompt)}]}
+                )
+            result["output"] = extract_response(response)
+        except Exception as e:
+            result["error"] = str(e)
+        result["latency"] = round(time.perf_counter() - start, 4)
+        return result
+
+    def _write(self, out, result: dict):
+        """追加一条结果并立即刷盘，保证崩溃后可以续跑"""
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+
+    @staticmethod
+    def _open_output(output_path: str, resume: bool):
+        """打开输出文件；续跑时补齐崩溃留下的半行"""
+        if not resume:
+            return open(output_path, "w", encoding="utf-8")
+        needs_newline = False
+        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            with open(output_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        out = open(output_path, "a", encoding="utf-8")
+        if needs_newline:
+            out.write("\n")
+        return out
+
+    def run(self, input_path: str, output_path: str, resume: bool = True,
+            retry_errors: bool = False, on_result=None) -> dict:
+        """执行批处理
+
+        Args:
+            input_path: 输入 JSONL 路径
+            output_path: 输出 JSONL 路径（追加写入）
+            resume: 是否跳过输出文件中已完成的请求
+            retry_errors: 续跑时是否重试失败的请求
+            on_result: 每完成一条请求时的回调，参数为结果字典
+
+        Returns:
+            汇总统计
+        """
+        agent = AgentLoader.create_agent_by_id(self.agent_id)
+        if agent is None:
+            raise ValueError(f"未找到 Agent: {self.agent_id}")
+
+        completed = load_completed_ids(output_path, retry_errors) if resume else set()
+        latencies = []
+        errors = 0
+        skipped = 0
+        start = time.perf_counter()
+
+        def record(result):
+            nonlocal errors
+            self._write(out, result)
+            latencies.append(result["latency"])
+            if "error" in result:
+                errors += 1
+            if on_result:
+                on_result(result)
+
+        def collect(futures):
+            for future in futures:
+                record(future.result())
+
+        with self._open_output(output_path, resume) as out, \
+                ThreadPoolExecutor(max_workers=self.concurrency,
+                                   thread_name_prefix="batch") as executor:
+            pending = set()
+            # 输入文件流式读取，在途任务数限制为并发数的两倍
+            for item_id, prompt, error in self._iter_items(input_path):
+                if item_id in completed:
+                    skipped += 1
+                    continue
+                if error is not None:
+                    # 输入行无法使用，记为错误后继续处理其余请求
+                    record({"id": item_id, "agent_id": self.agent_id,
+                            "error": error, "latency": 0.0})
+                    continue
+                if len(pending) >= self.concurrency * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending.add(executor.submit(self._run_item, agent, item_id, prompt))
+            collect(wait(pending).done)
+
+        elapsed = time.perf_counter() - start
+        ordered = sorted(latencies)
+        return {
+            "agent_id": self.agent_id,
+            "processed": len(latencies),
+            "skipped": skipped,
+            "errors": errors,
+            "elapsed": round(elapsed, 3),
+            "throughput": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+            "latency_p50": _percentile(ordered, 0.5),
+            "latency_p90": _percentile(ordered, 0.9),
+            "latency_p99": _percentile(ordered, 0.99),
+        }
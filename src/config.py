@@ -21,24 +21,150 @@ class Config:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
     
+    # Agent 缓存容量（已构建的 Agent 图数量，0 表示关闭缓存）
+    AGENT_CACHE_SIZE = int(os.getenv("AGENT_CACHE_SIZE", "32"))
+    
+    # 交互模式下显示菜单后是否在后台预热导入 LangChain
+    PRELOAD_MODULES = os.getenv("PRELOAD_MODULES", "true").lower() == "true"
+    
+    # 交互模式下是否流式输出助手回复
+    STREAM_OUTPUT = os.getenv("STREAM_OUTPUT", "true").lower() == "true"
+    
+    # HTTP 连接池配置（每个模型提供商共享一个连接池）
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "60"))
+    
+    # 模型响应缓存: off / memory / sqlite
+    RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "off").lower()
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "0"))
+    RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", ".cache/responses.sqlite3")
+    
+    # 工具执行：共享线程池大小和单个工具的默认超时（秒）
+    TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "16"))
+    TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "30"))
+    
+    # 性能埋点：开启后记录每轮的模型/工具耗时和 token 数
+    INSTRUMENTATION = os.getenv("INSTRUMENTATION", "false").lower() == "true"
+    # 埋点事件的 JSONL 输出路径，留空则只聚合直方图
+    INSTRUMENTATION_EVENTS_PATH = os.getenv("INSTRUMENTATION_EVENTS_PATH", "")
+    
+    # 是否为纯函数技能启用结果缓存
+    SKILL_CACHE = os.getenv("SKILL_CACHE", "true").lower() == "true"
+    
+    # CPU 密集技能的子进程数：0 表示不启用，auto 表示与 CPU 核数相同
+    SKILL_PROCESSES = (
+        os.cpu_count() or 1
+        if os.getenv("SKILL_PROCESSES", "0").lower() == "auto"
+        else int(os.getenv("SKILL_PROCESSES", "0"))
+    )
+    # 子进程中单个技能任务的执行时间上限（秒）
+    SKILL_PROCESS_TIMEOUT = float(os.getenv("SKILL_PROCESS_TIMEOUT", "10"))
+    # 子进程启动方式: spawn / forkserver / fork
+    SKILL_PROCESS_START_METHOD = os.getenv("SKILL_PROCESS_START_METHOD", "spawn")
+    
+    # 提示词缓存：是否为支持显式缓存标记的提供商（如 Anthropic）在系统提示词上加 cache_control
+    PROMPT_CACHE = os.getenv("PROMPT_CACHE", "true").lower() == "true"
+    
+    # 技能的文件输出：是否在后台线程中合并写入
+    FILE_OUTPUT_ASYNC = os.getenv("FILE_OUTPUT_ASYNC", "true").lower() == "true"
+    # 收到写入后最多等待多少秒再批量写出；排队内容达到多少字符时立即写出
+    FILE_OUTPUT_FLUSH_INTERVAL = float(os.getenv("FILE_OUTPUT_FLUSH_INTERVAL", "0.05"))
+    FILE_OUTPUT_BATCH_SIZE = int(os.getenv("FILE_OUTPUT_BATCH_SIZE", "65536"))
+    # 写出后是否 fsync（每批每个文件一次）
+    FILE_OUTPUT_FSYNC = os.getenv("FILE_OUTPUT_FSYNC", "true").lower() == "true"
+    
+    # 提醒日志路径，留空表示提醒只保存在内存中（重启后丢失）
+    REMINDER_STORE_PATH = os.getenv("REMINDER_STORE_PATH", ".cache/reminders.jsonl")
+    # 日志记录数超过该值（且超过待触发提醒数的两倍）时重写为快照
+    REMINDER_COMPACT_RECORDS = int(os.getenv("REMINDER_COMPACT_RECORDS", "10000"))
+    
+    # 会话记忆：历史（含摘要）的 token 预算，0 表示每轮只发送当前输入
+    MEMORY_MAX_TOKENS = int(os.getenv("MEMORY_MAX_TOKENS", "2000"))
+    # 淘汰的早期对话合并成摘要的 token 预算
+    MEMORY_SUMMARY_TOKENS = int(os.getenv("MEMORY_SUMMARY_TOKENS", "300"))
+    # 超出预算时淘汰到预算的该比例以下
+    MEMORY_LOW_WATERMARK = float(os.getenv("MEMORY_LOW_WATERMARK", "0.75"))
+    
+    # 会话检查点存储: off / sqlite / file
+    CHECKPOINT_STORE = os.getenv("CHECKPOINT_STORE", "off").lower()
+    CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", ".cache/sessions.sqlite3")
+    CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", ".cache/sessions")
+    # 单个会话的记录数超过该值（且超过当前状态的两倍）时压缩为快照
+    CHECKPOINT_COMPACT_RECORDS = int(os.getenv("CHECKPOINT_COMPACT_RECORDS", "64"))
+    
+    # 多提供商路由：逗号分隔的提供商列表（如 deepseek,openai），留空则只使用 MODEL_PROVIDER
+    MODEL_ROUTING = os.getenv("MODEL_ROUTING", "")
+    # 首选提供商多少秒未返回时向次选提供商发出对冲请求，0 表示不对冲
+    ROUTER_HEDGE_DELAY = float(os.getenv("ROUTER_HEDGE_DELAY", "0"))
+    # 熔断：最近 ROUTER_WINDOW 次调用（至少 ROUTER_MIN_CALLS 次）的错误率达到阈值时熔断，
+    # ROUTER_COOLDOWN 秒后放行探测请求
+    ROUTER_ERROR_THRESHOLD = float(os.getenv("ROUTER_ERROR_THRESHOLD", "0.5"))
+    ROUTER_WINDOW = int(os.getenv("ROUTER_WINDOW", "20"))
+    ROUTER_MIN_CALLS = int(os.getenv("ROUTER_MIN_CALLS", "5"))
+    ROUTER_COOLDOWN = float(os.getenv("ROUTER_COOLDOWN", "30"))
+    # 延迟滑动平均的权重（越大越偏向最近的调用）
+    ROUTER_EWMA_ALPHA = float(os.getenv("ROUTER_EWMA_ALPHA", "0.3"))
+    # 参与路由的提供商在 SDK 内部的重试次数（由路由器负责故障切换）
+    ROUTER_PROVIDER_RETRIES = int(os.getenv("ROUTER_PROVIDER_RETRIES", "0"))
+    # 同步调用对冲时使用的线程数
+    ROUTER_MAX_WORKERS = int(os.getenv("ROUTER_MAX_WORKERS", "32"))
+    
+    # 客户端限流：各提供商的 RPM/TPM 通过 <PROVIDER>_RPM / <PROVIDER>_TPM 设置（0 表示不限制）
+    # 令牌桶容量相当于多少秒的配额
+    RATE_LIMIT_BURST_SECONDS = float(os.getenv("RATE_LIMIT_BURST_SECONDS", "5"))
+    # 低优先级请求（如批处理）最长被插队的时间（秒）
+    RATE_LIMIT_STARVATION_SECONDS = float(os.getenv("RATE_LIMIT_STARVATION_SECONDS", "30"))
+    
+    # HTTP 服务（serve.py）：监听地址、同时执行的请求数、排队上限和保留的会话数
+    SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+    SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+    SERVER_MAX_CONCURRENCY = int(os.getenv("SERVER_MAX_CONCURRENCY", "64"))
+    # 排队的请求超过该值时直接返回 503
+    SERVER_MAX_QUEUE = int(os.getenv("SERVER_MAX_QUEUE", "256"))
+    SERVER_MAX_SESSIONS = int(os.getenv("SERVER_MAX_SESSIONS", "1024"))
+    # 长连接空闲多少秒后关闭
+    SERVER_KEEPALIVE_TIMEOUT = float(os.getenv("SERVER_KEEPALIVE_TIMEOUT", "15"))
+    
     # 模型映射
     MODEL_MAP = {
         "deepseek": {
             "model": "openai:deepseek-chat",
             "name": "DeepSeek V3",
+            "api_key_env": "DEEPSEEK_API_KEY",
             "base_url": "https://api.deepseek.com",
+            "max_concurrency": 16,
         },
         "anthropic": {
             "model": "anthropic:claude-sonnet-4-5",
             "name": "Anthropic Claude Sonnet 4.5",
+            "api_key_env": "ANTHROPIC_API_KEY",
+            "max_concurrency": 8,
+            # 需要在请求中显式标记缓存断点（cache_control）
+            "cache_control": True,
         },
         "openai": {
             "model": "openai:gpt-4o",
             "name": "OpenAI GPT-4o",
+            "api_key_env": "OPENAI_API_KEY",
+            "max_concurrency": 16,
         },
         "google": {
             "model": "google:gemini-2.0-flash-exp",
             "name": "Google Gemini 2.0 Flash",
+            "api_key_env": "GOOGLE_API_KEY",
+            "max_concurrency": 8,
+        },
+        # 本地假模型：不访问网络，用于基准测试和离线测试
+        "fake": {
+            "model": "fake:scripted",
+            "name": "Fake 本地模型",
+            "max_concurrency": 64,
+            "latency": float(os.getenv("FAKE_LLM_LATENCY", "0")),
+            "token_latency": float(os.getenv("FAKE_LLM_TOKEN_LATENCY", "0")),
+            "tokens": int(os.getenv("FAKE_LLM_TOKENS", "20")),
         },
     }
     
@@ -48,6 +174,89 @@ class Config:
         provider = provider or cls.MODEL_PROVIDER
         return cls.MODEL_MAP.get(provider, cls.MODEL_MAP["deepseek"])
     
+    @classmethod
+    def get_provider_name(cls, provider: Optional[str] = None) -> str:
+        """获取实际生效的模型提供商（与 get_model_config 的回退逻辑一致）"""
+        provider = provider or cls.MODEL_PROVIDER
+        return provider if provider in cls.MODEL_MAP else "deepseek"
+    
+    @classmethod
+    def get_routing_providers(cls) -> list:
+        """获取参与路由的提供商列表（忽略 MODEL_MAP 中不存在的名称，并去重）
+        
+        少于两个有效提供商时返回空列表，即不启用路由。
+        """
+        providers = []
+        for name in cls.MODEL_ROUTING.split(","):
+            name = name.strip().lower()
+            if name in cls.MODEL_MAP and name not in providers:
+                providers.append(name)
+        return providers if len(providers) > 1 else []
+    
+    @classmethod
+    def get_max_concurrency(cls, provider: Optional[str] = None) -> int:
+        """获取提供商允许的最大并发请求数
+        
+        可通过环境变量 <PROVIDER>_MAX_CONCURRENCY 覆盖 MODEL_MAP 中的配置
+        """
+        provider = cls.get_provider_name(provider)
+        override = os.getenv(f"{provider.upper()}_MAX_CONCURRENCY")
+        if override:
+            return int(override)
+        return cls.MODEL_MAP[provider].get("max_concurrency", 8)
+    
+    @classmethod
+    def get_rate_limits(cls, provider: Optional[str] = None) -> dict:
+        """获取提供商的限流配置 {"rpm": ..., "tpm": ...}
+        
+        环境变量 <PROVIDER>_RPM / <PROVIDER>_TPM 优先，其次是 MODEL_MAP 中的 rpm/tpm 字段
+        """
+        provider = cls.get_provider_name(provider)
+        limits = {}
+        for name in ("rpm", "tpm"):
+            override = os.getenv(f"{provider.upper()}_{name.upper()}")
+            limits[name] = int(override) if override else cls.MODEL_MAP[provider].get(name, 0)
+        return limits
+    
+    @classmethod
+    def use_cache_control(cls, providers: Optional[list] = None) -> bool:
+        """是否在提示词中加入显式缓存标记
+        
+        只有全部提供商都支持时才加入（路由时请求可能发往其中任何一个）
+        """
+        if not cls.PROMPT_CACHE:
+            return False
+        providers = providers or [cls.get_provider_name()]
+        return all(cls.get_model_config(p).get("cache_control", False) for p in providers)
+    
+    @classmethod
+    def get_api_key(cls, provider: Optional[str] = None) -> Optional[str]:
+        """获取提供商的 API Key"""
+        model_config = cls.get_model_config(provider)
+        env_name = model_config.get("api_key_env")
+        return os.getenv(env_name) if env_name else None
+    
+    @classmethod
+    def get_base_url(cls, provider: Optional[str] = None) -> Optional[str]:
+        """获取提供商的接口地址
+        
+        可通过环境变量 <PROVIDER>_BASE_URL 覆盖（例如指向本地桩服务）
+        """
+        provider = cls.get_provider_name(provider)
+        return os.getenv(f"{provider.upper()}_BASE_URL") or cls.MODEL_MAP[provider].get("base_url")
+    
+    @classmethod
+    def get_pool_config(cls, provider: Optional[str] = None) -> dict:
+        """获取提供商的连接池配置，MODEL_MAP 中的 pool 字段可覆盖全局默认值"""
+        pool = {
+            "max_connections": cls.HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": cls.HTTP_MAX_KEEPALIVE,
+            "keepalive_expiry": cls.HTTP_KEEPALIVE_EXPIRY,
+            "timeout": cls.HTTP_TIMEOUT,
+        }
+        pool.update(cls.get_model_config(provider).get("pool", {}))
+        return pool
+    
     @classmethod
     def setup_deepseek(cls):
         """配置 DeepSeek 环境"""
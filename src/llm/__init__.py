@@ -0,0 +1,10 @@
+"""
+模型访问模块
+管理模型客户端以及模型调用链路上的公共能力
+"""
+from .clients import ClientPool, client_pool
+
+__all__ = [
+    'ClientPool',
+    'client_pool',
+]
@@ -0,0 +1,229 @@
+"""
+模型客户端连接池
+每个模型提供商只创建一个聊天模型实例，所有 Agent 和会话共享其 HTTP 连接池，
+连接和 TLS 会话在请求之间保持复用。
+"""
+import threading
+
+from ..config import config
+
+
+class ClientPool:
+    """按提供商复用聊天模型及其 HTTP 客户端"""
+
+    def __init__(self):
+        self._models = {}
+        self._http_clients = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _pool_key(provider: str) -> tuple:
+        """连接池键：提供商配置、地址或池参数变化时重新创建"""
+        model_config = config.get_model_config(provider)
+        pool = config.get_pool_config(provider)
+        return (
+            provider,
+            model_config["model"],
+            config.get_base_url(provider),
+            tuple(sorted(pool.items())),
+        )
+
+    def get_model(self, provider: str = None, max_retries: int = None):
+        """获取提供商共享的聊天模型实例
+
+        Args:
+            provider: 提供商名称，默认使用 Config.MODEL_PROVIDER；
+                未指定且配置了 MODEL_ROUTING 时返回多提供商路由模型
+            max_retries: 覆盖 SDK 内部的重试次数（None 表示使用 SDK 默认值）
+
+        Returns:
+            聊天模型实例（BaseChatModel），异步调用时按提供商限制并发
+        """
+        if provider is None and config.get_routing_providers():
+            return self.get_routed_model()
+        provider = config.get_provider_name(provider)
+        key = self._pool_key(provider)
+        if max_retries is not None:
+            key += (("max_retries", max_retries),)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                from .limited import LimitedChatModel
+
+                model = LimitedChatModel(
+                    model=self._build_model(provider, max_retries), provider=provider
+                )
+                self._models[key] = model
+        return model
+
+    def get_routed_model(self, providers: list = None):
+        """获取在多个提供商之间路由的共享模型实例
+
+        路由状态（延迟、错误率、熔断）由所有 Agent 共享。
+
+        Args:
+            providers: 参与路由的提供商，默认使用 MODEL_ROUTING
+
+        Returns:
+            RoutedChatModel 实例
+        """
+        providers = providers or config.get_routing_providers()
+        key = ("routed", tuple(self._pool_key(p) for p in providers), config.ROUTER_HEDGE_DELAY)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        from .router import ProviderRouter, RoutedChatModel
+
+        # 由路由器负责切换提供商，SDK 内部的重试只会推迟故障切换
+        models = {
+            provider: self.get_model(provider, max_retries=config.ROUTER_PROVIDER_RETRIES)
+            for provider in providers
+        }
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = RoutedChatModel(
+                    router=ProviderRouter(providers),
+                    models=models,
+                    hedge_delay=config.ROUTER_HEDGE_DELAY,
+                )
+                self._models[key] = model
+        return model
+
+    @staticmethod
+    def _common_kwargs(provider: str) -> dict:
+        """各提供商通用的模型参数（响应缓存、限流器）"""
+        from .rate_limit import get_rate_limiter
+        from .response_cache import get_response_cache
+
+        kwargs = {}
+        cache = get_response_cache()
+        if cache is not None:
+            kwargs["cache"] = cache
+        limiter = get_rate_limiter(provider)
+        if limiter is not None:
+            kwargs["rate_limiter"] = limiter
+            kwargs["callbacks"] = [limiter.usage_handler]
+        return kwargs
+
+    def _build_model(self, provider: str, max_retries: int = None):
+        """创建聊天模型"""
+        model_string = config.get_model_config(provider)["model"]
+        prefix, _, model_name = model_string.partition(":")
+
+        if prefix == "openai":
+            return self._build_openai_model(provider, model_name, max_retries)
+        if prefix == "fake":
+            return self._build_fake_model(provider)
+
+        # 其他提供商的 SDK 客户端由模型实例持有，共享实例即共享连接池
+        from langchain.chat_models import init_chat_model
+
+        kwargs = self._common_kwargs(provider)
+        api_key = config.get_api_key(provider)
+        base_url = config.get_base_url(provider)
+        if api_key:
+            kwargs["api_key"] = api_key
+        if base_url:
+            kwargs["base_url"] = base_url
+        if max_retries is not None:
+            kwargs["max_retries"] = max_retries
+        return init_chat_model(model_string, **kwargs)
+
+    def _build_openai_model(self, provider: str, model_name: str, max_retries: int = None):
+        """创建 OpenAI 兼容模型（OpenAI、DeepSeek 等），显式注入可调的 httpx 连接池"""
+        import httpx
+        from langchain_openai import ChatOpenAI
+
+        pool = config.get_pool_config(provider)
+        limits = httpx.Limits(
+            max_connections=pool["max_connections"],
+            max_keepalive_connections=pool["max_keepalive_connections"],
+            keepalive_expiry=pool["keepalive_expiry"],
+        )
+        timeout = httpx.Timeout(pool["timeout"])
+        http_client = httpx.Client(limits=limits, timeout=timeout)
+        http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        self._http_clients.setdefault(provider, []).append(
+            (http_client, http_async_client)
+        )
+
+        kwargs = self._common_kwargs(provider)
+        api_key = config.get_api_key(provider)
+        base_url = config.get_base_url(provider)
+        if api_key:
+            kwargs["api_key"] = api_key
+        if base_url:
+            kwargs["base_url"] = base_url
+        if max_retries is not None:
+            kwargs["max_retries"] = max_retries
+
+        return ChatOpenAI(
+            model=model_name,
+            timeout=pool["timeout"],
+            http_client=http_client,
+            http_async_client=http_async_client,
+            **kwargs,
+        )
+
+    def _build_fake_model(self, provider: str):
+        """创建本地假模型（参数来自 MODEL_MAP 中的 latency/token_latency/tokens）"""
+        from .fake import FakeChatModel
+
+        model_config = config.get_model_config(provider)
+        return FakeChatModel(
+            latency=model_config.get("latency", 0.0),
+            token_latency=model_config.get("token_latency", 0.0),
+            tokens=model_config.get("tokens", 20),
+            **self._common_kwargs(provider),
+        )
+
+    def stats(self) -> dict:
+        """获取连接池概况"""
+        return {
+            "models": [
+                {"provider": key[0], "model": key[1], "base_url": key[2]}
+                for key in self._models
+                if key[0] != "routed"
+            ],
+            "routing": [
+                model.router.stats()
+                for key, model in self._models.items()
+                if key[0] == "routed"
+            ],
+            "http_clients": {
+                provider: len(clients)
+                for provider, clients in self._http_clients.items()
+            },
+        }
+
+    def close(self):
+        """关闭所有同步 HTTP 客户端并清空连接池
+
+        异步客户端需要在事件循环中调用 aclose() 关闭。
+        """
+        with self._lock:
+            for clients in self._http_clients.values():
+                for http_client, _async_client in clients:
+                    http_client.close()
+            self._http_clients.clear()
+            self._models.clear()
+
+    async def aclose(self):
+        """在事件循环中关闭所有 HTTP 客户端并清空连接池"""
+        with self._lock:
+            clients = [c for group in self._http_clients.values() for c in group]
+            self._http_clients.clear()
+            self._models.clear()
+        for http_client, async_client in clients:
+            http_client.close()
+            await async_client.aclose()
+
+
+# 进程级共享的客户端连接池
+client_pool = ClientPool()
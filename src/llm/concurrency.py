@@ -0,0 +1,81 @@
+"""
+提供商并发限制模块
+按模型提供商限制同时在途的模型调用数（MODEL_MAP 中的 max_concurrency，
+可用 <PROVIDER>_MAX_CONCURRENCY 覆盖）。
+
+- 名额只在单次模型调用期间占用；工具执行和 Agent 的其他步骤不占名额
+- ClientPool 用 limited.LimitedChatModel 包装每个提供商的模型，多提供商路由时
+  按实际发出请求的提供商计数（对冲请求各占各自提供商的名额）
+- 只限制异步调用（会话和 HTTP 服务）；同步调用直接透传
+- 本模块不依赖 LangChain，导入 agents 包时不会拉起 LangChain
+"""
+import asyncio
+import weakref
+
+from ..config import config
+
+
+class ProviderLimiter:
+    """按模型提供商限制并发的异步信号量集合
+
+    信号量与事件循环绑定，因此按事件循环分别维护。
+    """
+
+    def __init__(self):
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._waiting = {}
+        self._active = {}
+
+    def _get_semaphore(self, provider: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        per_loop = self._semaphores.setdefault(loop, {})
+        semaphore = per_loop.get(provider)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(config.get_max_concurrency(provider))
+            per_loop[provider] = semaphore
+        return semaphore
+
+    def slot(self, provider: str):
+        """获取一个并发名额，用法: async with limiter.slot(provider): ..."""
+        return _ProviderSlot(self, provider)
+
+    def stats(self) -> dict:
+        """获取各提供商的排队数和执行数"""
+        providers = set(self._waiting) | set(self._active)
+        return {
+            provider: {
+                "waiting": self._waiting.get(provider, 0),
+                "active": self._active.get(provider, 0),
+                "limit": config.get_max_concurrency(provider),
+            }
+            for provider in sorted(providers)
+        }
+
+
+class _ProviderSlot:
+    """ProviderLimiter.slot() 返回的异步上下文管理器"""
+
+    def __init__(self, limiter: ProviderLimiter, provider: str):
+        self._limiter = limiter
+        self._provider = provider
+        self._semaphore = None
+
+    async def __aenter__(self):
+        limiter, provider = self._limiter, self._provider
+        self._semaphore = limiter._get_semaphore(provider)
+        limiter._waiting[provider] = limiter._waiting.get(provider, 0) + 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            limiter._waiting[provider] -= 1
+        limiter._active[provider] = limiter._active.get(provider, 0) + 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._limiter._active[self._provider] -= 1
+        self._semaphore.release()
+        return False
+
+
+# 进程级共享的并发限制器
+provider_limiter = ProviderLimiter()
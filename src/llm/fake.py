@@ -0,0 +1,193 @@
+"""
+本地假模型
+确定性的聊天模型，不访问网络，用于基准测试和离线测试。
+
+- 可配置每次调用的延迟、逐 token 延迟和输出 token 数
+- 按脚本产生工具调用；未提供脚本时，第一步调用所有已绑定的工具（参数按 schema 生成），
+  拿到工具结果后返回最终回复
+"""
+import asyncio
+import json
+import time
+from typing import Any, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+# 按参数名生成示例参数
+SAMPLE_STRING_ARGS = {
+    "city": "北京",
+    "expression": "2024 * 365",
+    "query": "LangChain",
+    "timezone": "Asia/Shanghai",
+    "task": "开会",
+    "time": "10分钟后",
+    "data": "示例数据",
+    "format_type": "json",
+    "filename": "fake_output.txt",
+    "content": "示例内容",
+}
+
+
+def _sample_value(name: str, schema: dict):
+    """根据参数 schema 生成示例值"""
+    kind = schema.get("type")
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 1.0
+    if kind == "boolean":
+        return True
+    if kind == "array":
+        singular = name[:-3] + "y" if name.endswith("ies") else name.rstrip("s")
+        item = _sample_value(singular, schema.get("items", {"type": "string"}))
+        return [item, item]
+    if kind == "object":
+        return {}
+    return SAMPLE_STRING_ARGS.get(name, "test")
+
+
+def sample_args(tool_schema: dict) -> dict:
+    """为 OpenAI 格式的工具 schema 生成必填参数"""
+    parameters = tool_schema["function"].get("parameters", {})
+    properties = parameters.get("properties", {})
+    required = parameters.get("required", list(properties))
+    return {name: _sample_value(name, properties[name]) for name in required}
+
+
+class FakeChatModel(BaseChatModel):
+    """确定性的本地聊天模型"""
+
+    latency: float = 0.0
+    """每次调用的固定延迟（秒）"""
+    token_latency: float = 0.0
+    """流式输出时每个 token 的额外延迟（秒）"""
+    tokens: int = 20
+    """最终回复的 token 数"""
+    script: Optional[list] = None
+    """脚本：按工具循环的轮次取第 N 步，每步为 {"tool_calls": [...]} 或 {"content": "..."}"""
+    bound_tools: list = []
+    """已绑定工具的 OpenAI 格式 schema"""
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-scripted"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"latency": self.latency, "tokens": self.tokens}
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        """绑定工具（记录 schema，供脚本生成工具调用）"""
+        return self.model_copy(
+            update={"bound_tools": [convert_to_openai_tool(tool) for tool in tools]}
+        )
+
+    # ---- 回复生成 ----
+
+    @staticmethod
+    def _step_index(messages) -> int:
+        """当前是最后一条用户消息之后的第几次模型调用"""
+        steps = 0
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            if isinstance(message, AIMessage):
+                steps += 1
+        return steps
+
+    def _final_text(self, messages) -> str:
+        words = [f"tok{i}" for i in range(max(1, self.tokens))]
+        return f"[fake] 共 {len(messages)} 条消息 " + " ".join(words)
+
+    def _next_message(self, messages) -> AIMessage:
+        step = self._step_index(messages)
+        input_tokens = sum(len(str(m.content)) for m in messages) // 4
+
+        if self.script is not None:
+            action = self.script[step] if step < len(self.script) else {}
+        elif step == 0 and self.bound_tools:
+            action = {"tool_calls": [
+                {"name": tool["function"]["name"], "args": sample_args(tool)}
+                for tool in self.bound_tools
+            ]}
+        else:
+            action = {}
+
+        tool_calls = [
+            {"name": call["name"], "args": call.get("args", {}),
+             "id": f"fake_call_{step}_{idx}", "type": "tool_call"}
+            for idx, call in enumerate(action.get("tool_calls", []))
+        ]
+        content = "" if tool_calls else action.get("content") or self._final_text(messages)
+        output_tokens = max(1, len(content.split())) if content else len(tool_calls) * 10
+        return AIMessage(
+            content=content,
+            tool_calls=tool_calls,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+    def _chunks(self, message: AIMessage):
+        """把完整回复拆成流式分块"""
+        if message.tool_calls:
+            yield AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {
+                        "name": call["name"],
+                        "args": json.dumps(call["args"], ensure_ascii=False),
+                        "id": call["id"],
+                        "index": idx,
+                    }
+                    for idx, call in enumerate(message.tool_calls)
+                ],
+                usage_metadata=message.usage_metadata,
+            )
+            return
+        words = message.content.split(" ")
+        for idx, word in enumerate(words):
+            text = word if idx == 0 else " " + word
+            last = idx == len(words) - 1
+            yield AIMessageChunk(
+                content=text, usage_metadata=message.usage_metadata if last else None
+            )
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        if self.latency:
+            time.sleep(self.latency)
+        for chunk in self._chunks(self._next_message(messages)):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            if run_manager and chunk.content:
+                run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for chunk in self._chunks(self._next_message(messages)):
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            if run_manager and chunk.content:
+                await run_manager.on_llm_new_token(
+                    chunk.content, chunk=ChatGenerationChunk(message=chunk)
+                )
+            yield ChatGenerationChunk(message=chunk)
+
@@ -0,0 +1,56 @@
+"""
+并发受限的模型包装
+每次异步调用期间占用 concurrency.provider_limiter 中对应提供商的一个名额。
+"""
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from .concurrency import provider_limiter
+
+
+# 内层模型调用不继承外层回调：回调只挂在外层运行上，避免 token 和模型调用被记录两次
+_INNER_CONFIG = {"callbacks": []}
+
+
+class LimitedChatModel(BaseChatModel):
+    """每次异步调用期间占用一个提供商并发名额的聊天模型包装"""
+
+    model: Any
+    """被包装的聊天模型（或绑定了工具的 Runnable）"""
+    provider: str
+    """计数所用的提供商名称"""
+
+    @property
+    def _llm_type(self) -> str:
+        return "limited"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"provider": self.provider}
+
+    def bind_tools(self, tools, **kwargs):
+        """为被包装的模型绑定工具"""
+        return self.model_copy(update={"model": self.model.bind_tools(tools, **kwargs)})
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        message = self.model.invoke(messages, config=_INNER_CONFIG, stop=stop, **kwargs)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        async with provider_limiter.slot(self.provider):
+            message = await self.model.ainvoke(
+                messages, config=_INNER_CONFIG, stop=stop, **kwargs
+            )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        for chunk in self.model.stream(messages, config=_INNER_CONFIG, stop=stop, **kwargs):
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        async with provider_limiter.slot(self.provider):
+            async for chunk in self.model.astream(
+                    messages, config=_INNER_CONFIG, stop=stop, **kwargs):
+                yield ChatGenerationChunk(message=chunk)
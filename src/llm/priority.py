@@ -0,0 +1,40 @@
+"""
+请求优先级
+模型请求在客户端限流器中排队时使用的优先级，通过上下文变量传递，
+对同一线程或协程（及其创建的子任务）中的模型调用生效。
+"""
+import contextlib
+import contextvars
+
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_DEFAULT = 1
+PRIORITY_BATCH = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_DEFAULT: "default",
+    PRIORITY_BATCH: "batch",
+}
+
+_priority = contextvars.ContextVar("request_priority", default=PRIORITY_DEFAULT)
+
+
+def current_priority() -> int:
+    """获取当前上下文的请求优先级"""
+    return _priority.get()
+
+
+@contextlib.contextmanager
+def request_priority(priority: int):
+    """在上下文中设置模型请求的排队优先级
+
+    用法:
+        with request_priority(PRIORITY_BATCH):
+            agent.invoke(...)
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
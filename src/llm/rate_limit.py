@@ -0,0 +1,324 @@
+"""
+客户端限流模块
+按模型提供商在本地限制请求速率，在触发提供商的 429 之前就排队等待。
+
+- 每个提供商两个令牌桶：每分钟请求数（RPM）和每分钟 token 数（TPM）
+- 请求在发出前占用一个请求令牌；调用结束后按实际 token 用量扣减 TPM 桶
+  （可以扣成负数，之后的请求等到桶回正再放行）
+- 等待中的请求按优先级排队：交互式会话优先于默认请求，默认请求优先于批处理；
+  同一优先级内先到先得，低优先级请求等待超过 RATE_LIMIT_STARVATION_SECONDS 后
+  不再被插队，避免饿死
+- 请求优先级通过 priority.request_priority() 上下文设置
+- stats() 提供排队深度、等待时间分布和令牌余量
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from ..config import config
+from ..utils.metrics import Histogram
+from .priority import PRIORITY_NAMES, current_priority
+
+
+# 当前上下文中最近一次放行请求的限流器，用于把随后的 token 用量记到它名下
+_acquired_by = contextvars.ContextVar("rate_limit_acquired_by", default=None)
+
+
+class TokenBucket:
+    """令牌桶（非线程安全，由调用方加锁）"""
+
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, needed: float) -> float:
+        """距离桶中有 needed 个令牌还需要的秒数"""
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+
+class _Ticket:
+    """排队中的请求"""
+
+    __slots__ = ("priority", "enqueued_at", "event", "loop", "future", "cancelled")
+
+    def __init__(self, priority: int, loop=None, future=None):
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.event = threading.Event() if future is None else None
+        self.loop = loop
+        self.future = future
+        self.cancelled = False
+
+
+class _UsageHandler(BaseCallbackHandler):
+    """模型调用结束后按实际 token 用量扣减 TPM 桶"""
+
+    run_inline = True
+
+    def __init__(self, limiter: "ProviderRateLimiter"):
+        self.limiter = limiter
+
+    def on_llm_end(self, response, **kwargs):
+        # 命中响应缓存的调用没有经过限流器，不扣减
+        if _acquired_by.get() is not self.limiter:
+            return
+        _acquired_by.set(None)
+        total = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    total += usage.get("total_tokens") or (
+                        usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+                    )
+        if not total:
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            total = usage.get("total_tokens", 0)
+        if total:
+            self.limiter.debit_tokens(total)
+
+
+class ProviderRateLimiter(BaseRateLimiter):
+    """单个提供商的 RPM/TPM 限流器和优先级调度器
+
+    作为 LangChain 聊天模型的 rate_limiter 参数使用：模型在每次真正发出请求前
+    调用 acquire()/aacquire()。放行顺序由后台调度线程统一决定。
+    """
+
+    def __init__(self, provider: str, rpm: int = 0, tpm: int = 0,
+                 burst_seconds: float = None, starvation_seconds: float = None):
+        """
+        Args:
+            provider: 提供商名称
+            rpm: 每分钟请求数上限，0 表示不限制
+            tpm: 每分钟 token 数上限，0 表示不限制
+            burst_seconds: 令牌桶容量相当于多少秒的配额
+            starvation_seconds: 低优先级请求最长被插队的时间
+        """
+        burst_seconds = burst_seconds or config.RATE_LIMIT_BURST_SECONDS
+        self.provider = provider
+        self.rpm = rpm
+        self.tpm = tpm
+        self.starvation_seconds = starvation_seconds or config.RATE_LIMIT_STARVATION_SECONDS
+        self._requests = TokenBucket(rpm, burst_seconds) if rpm else None
+        self._tokens = TokenBucket(tpm, burst_seconds) if tpm else None
+        self._queues = {priority: deque() for priority in sorted(PRIORITY_NAMES)}
+        self._cond = threading.Condition()
+        self._dispatcher = None
+        self.usage_handler = _UsageHandler(self)
+        # 统计
+        self.granted = 0
+        self.queued = 0
+        self.max_queue_depth = 0
+        self.tokens_debited = 0
+        self._wait_ms = Histogram()
+
+    # ---- 令牌 ----
+
+    def _wait_time(self, now: float) -> float:
+        """距离可以放行下一个请求还需要的秒数（调用方持有锁）"""
+        wait = 0.0
+        if self._requests is not None:
+            self._requests.refill(now)
+            wait = self._requests.wait_time(1.0)
+        if self._tokens is not None:
+            self._tokens.refill(now)
+            # 只要 TPM 桶没有欠账就放行，实际用量在调用结束后扣减
+            wait = max(wait, self._tokens.wait_time(1e-9))
+        return wait
+
+    def _consume(self):
+        """占用一个请求令牌（调用方持有锁）"""
+        if self._requests is not None:
+            self._requests.tokens -= 1.0
+        self.granted += 1
+
+    def debit_tokens(self, count: int):
+        """按实际用量扣减 TPM 桶"""
+        if self._tokens is None:
+            return
+        with self._cond:
+            self._tokens.refill(time.monotonic())
+            self._tokens.tokens -= count
+            self.tokens_debited += count
+
+    def _refund(self):
+        """放行后请求已取消，归还请求令牌"""
+        with self._cond:
+            if self._requests is not None:
+                self._requests.tokens = min(self._requests.capacity, self._requests.tokens + 1.0)
+            self.granted -= 1
+            self._cond.notify_all()
+
+    # ---- 排队 ----
+
+    def _queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _next_ticket(self, now: float):
+        """选出下一个放行的请求（调用方持有锁）"""
+        head = None
+        for queue in self._queues.values():
+            while queue and queue[0].cancelled:
+                queue.popleft()
+            if not queue:
+                continue
+            if head is None:
+                head = queue
+            elif now - queue[0].enqueued_at > self.starvation_seconds \
+                    and queue[0].enqueued_at < head[0].enqueued_at:
+                # 低优先级请求等待太久，按到达顺序放行
+                head = queue
+        return head
+
+    def _enqueue(self, ticket: _Ticket):
+        with self._cond:
+            self._queues[ticket.priority].append(ticket)
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self._queue_depth())
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch_loop, name=f"rate-limit-{self.provider}", daemon=True
+                )
+                self._dispatcher.start()
+            self._cond.notify_all()
+
+    def _dispatch_loop(self):
+        """后台调度：令牌可用时按优先级放行排在最前的请求"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                queue = self._next_ticket(now)
+                if queue is None:
+                    self._cond.wait()
+                    continue
+                wait = self._wait_time(now)
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                ticket = queue.popleft()
+                self._consume()
+                self._wait_ms.record((now - ticket.enqueued_at) * 1000)
+                self._grant(ticket)
+
+    def _grant(self, ticket: _Ticket):
+        if ticket.event is not None:
+            ticket.event.set()
+            return
+        try:
+            ticket.loop.call_soon_threadsafe(self._resolve, ticket.future)
+        except RuntimeError:
+            # 事件循环已关闭，在调度线程外归还令牌，避免在持锁时重入
+            threading.Thread(target=self._refund, daemon=True).start()
+
+    def _resolve(self, future):
+        if future.done():
+            self._refund()
+        else:
+            future.set_result(True)
+
+    def _try_fast_path(self) -> bool:
+        """队列为空且令牌充足时直接放行"""
+        with self._cond:
+            if self._queue_depth() or self._wait_time(time.monotonic()) > 0:
+                return False
+            self._consume()
+            self._wait_ms.record(0.0)
+        _acquired_by.set(self)
+        return True
+
+    # ---- BaseRateLimiter 接口 ----
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        if self._try_fast_path():
+            return True
+        if not blocking:
+            return False
+        ticket = _Ticket(current_priority())
+        self._enqueue(ticket)
+        ticket.event.wait()
+        _acquired_by.set(self)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        if self._try_fast_path():
+            return True
+        if not blocking:
+            return False
+        loop = asyncio.get_running_loop()
+        ticket = _Ticket(current_priority(), loop=loop, future=loop.create_future())
+        self._enqueue(ticket)
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            ticket.cancelled = True
+            raise
+        _acquired_by.set(self)
+        return True
+
+    # ---- 指标 ----
+
+    def stats(self) -> dict:
+        """获取排队深度、等待时间分布和令牌余量"""
+        with self._cond:
+            now = time.monotonic()
+            self._wait_time(now)
+            return {
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "queue_depth": {
+                    PRIORITY_NAMES[priority]: len(queue)
+                    for priority, queue in self._queues.items()
+                },
+                "max_queue_depth": self.max_queue_depth,
+                "queued": self.queued,
+                "granted": self.granted,
+                "tokens_debited": self.tokens_debited,
+                "request_tokens": (round(self._requests.tokens, 3)
+                                   if self._requests is not None else None),
+                "tpm_tokens": (round(self._tokens.tokens, 3)
+                               if self._tokens is not None else None),
+                "wait_ms": self._wait_ms.summary(),
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str):
+    """获取提供商共享的限流器
+
+    Returns:
+        ProviderRateLimiter 实例；该提供商未配置 RPM 和 TPM 时返回 None
+    """
+    limits = config.get_rate_limits(provider)
+    if not limits["rpm"] and not limits["tpm"]:
+        return None
+    key = (provider, limits["rpm"], limits["tpm"])
+    limiter = _limiters.get(key)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(key)
+            if limiter is None:
+                limiter = ProviderRateLimiter(provider, limits["rpm"], limits["tpm"])
+                _limiters[key] = limiter
+    return limiter
+
+
+def rate_limit_stats() -> dict:
+    """获取所有提供商限流器的统计"""
+    return {key[0]: limiter.stats() for key, limiter in list(_limiters.items())}
@@ -0,0 +1,262 @@
+"""
+模型响应缓存
+作为 LangChain 的 BaseCache 挂到共享的聊天模型上，两级存储：
+进程内 LRU 和磁盘 SQLite。缓存键由消息列表、工具定义和模型参数共同决定。
+
+除精确键外还会生成规范化键：去掉每次运行都会变化的消息 ID、工具调用 ID
+和响应元数据，并折叠空白，使多轮、带工具调用的对话在重放时也能命中。
+"""
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+from ..config import config
+
+
+# 为 True 时当前上下文中的模型调用不读取缓存
+_bypass = contextvars.ContextVar("response_cache_bypass", default=False)
+
+# 规范化时丢弃的字段（每次运行都会变化，与语义无关）
+_VOLATILE_KEYS = {"response_metadata", "usage_metadata"}
+# 取值为字符串时丢弃的字段（序列化对象的 id 是类路径列表，需要保留）
+_VOLATILE_STRING_KEYS = {"id", "tool_call_id"}
+
+
+@contextmanager
+def bypass_response_cache():
+    """在该上下文中跳过缓存读取，响应仍会写入缓存以刷新旧值
+
+    用法:
+        with bypass_response_cache():
+            agent.invoke(...)
+    """
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def _strip_volatile(value):
+    """递归去掉易变字段并折叠字符串中的空白"""
+    if isinstance(value, dict):
+        return {
+            k: _strip_volatile(v)
+            for k, v in value.items()
+            if k not in _VOLATILE_KEYS
+            and not (k in _VOLATILE_STRING_KEYS and isinstance(v, str))
+        }
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+
+def normalize_prompt(prompt: str) -> str:
+    """规范化序列化后的消息列表"""
+    try:
+        data = json.loads(prompt)
+    except ValueError:
+        return " ".join(prompt.split())
+    return json.dumps(_strip_volatile(data), sort_keys=True, ensure_ascii=False,
+                      separators=(",", ":"))
+
+
+def _hash_key(kind: str, prompt: str, llm_string: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(llm_string.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(prompt.encode("utf-8"))
+    return f"{kind}:{digest.hexdigest()}"
+
+
+class ResponseCache(BaseCache):
+    """两级模型响应缓存（内存 LRU + 可选 SQLite）"""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 0,
+                 db_path: str = None, normalize: bool = True):
+        """
+        Args:
+            max_size: 内存层最多保存的条目数
+            ttl: 过期时间（秒），0 表示永不过期
+            db_path: SQLite 文件路径，为 None 时只使用内存层
+            normalize: 是否同时使用规范化键查找
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.normalize = normalize
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.normalized_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str):
+        """打开 SQLite 存储"""
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL)"
+        )
+        self._db.commit()
+
+    def _keys(self, prompt: str, llm_string: str) -> list:
+        keys = [_hash_key("exact", prompt, llm_string)]
+        if self.normalize:
+            keys.append(_hash_key("norm", normalize_prompt(prompt), llm_string))
+        return keys
+
+    def _expires_at(self):
+        return time.time() + self.ttl if self.ttl else None
+
+    def _memory_get(self, key: str):
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.time():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return value
+
+    def _memory_put(self, key: str, value, expires_at):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def _db_get(self, key: str):
+        row = self._db.execute(
+            "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
+            return None
+        return loads(value), expires_at
+
+    def lookup(self, prompt: str, llm_string: str):
+        """查找缓存（BaseCache 接口）"""
+        if _bypass.get():
+            self.bypassed += 1
+            return None
+
+        keys = self._keys(prompt, llm_string)
+        with self._lock:
+            for idx, key in enumerate(keys):
+                value = self._memory_get(key)
+                if value is None and self._db is not None:
+                    found = self._db_get(key)
+                    if found is not None:
+                        value, expires_at = found
+                        self._memory_put(key, value, expires_at)
+                if value is not None:
+                    if idx == 0:
+                        self.hits += 1
+                    else:
+                        self.normalized_hits += 1
+                    return value
+            self.misses += 1
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val):
+        """写入缓存（BaseCache 接口）"""
+        expires_at = self._expires_at()
+        keys = self._keys(prompt, llm_string)
+        serialized = dumps(return_val) if self._db is not None else None
+        with self._lock:
+            for key in keys:
+                self._memory_put(key, return_val, expires_at)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at)"
+                    " VALUES (?, ?, ?)",
+                    [(key, serialized, expires_at) for key in keys],
+                )
+                self._db.commit()
+
+    def clear(self, **kwargs):
+        """清空缓存（BaseCache 接口）"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def purge_expired(self) -> int:
+        """删除磁盘层中已过期的条目
+
+        Returns:
+            删除的条目数
+        """
+        if self._db is None:
+            return 0
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at < ?",
+                (time.time(),),
+            )
+            self._db.commit()
+            return cursor.rowcount
+
+    def stats(self) -> dict:
+        """获取缓存统计信息"""
+        total = self.hits + self.normalized_hits + self.misses
+        return {
+            "memory_size": len(self._memory),
+            "hits": self.hits,
+            "normalized_hits": self.normalized_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": (self.hits + self.normalized_hits) / total if total else 0.0,
+        }
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """按配置获取进程级共享的响应缓存
+
+    Returns:
+        ResponseCache 实例；RESPONSE_CACHE=off 时返回 None
+    """
+    global _response_cache
+    if config.RESPONSE_CACHE == "off":
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(
+                    max_size=config.RESPONSE_CACHE_SIZE,
+                    ttl=config.RESPONSE_CACHE_TTL,
+                    db_path=(config.RESPONSE_CACHE_PATH
+                             if config.RESPONSE_CACHE == "sqlite" else None),
+                )
+    return _response_cache
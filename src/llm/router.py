@@ -0,0 +1,377 @@
+"""
+多提供商路由模块
+在 MODEL_ROUTING 列出的多个提供商之间选择最快的健康提供商，并在失败时自动切换。
+
+- 每个提供商维护延迟的指数滑动平均和最近 N 次调用的错误率
+- 请求优先发给平均延迟最低的健康提供商；尚无延迟数据的提供商优先试探一次
+- 错误率超过阈值时熔断，冷却期过后放行一个探测请求，成功则恢复
+- 对冲请求：首选提供商在 hedge_delay 秒内未返回时，同时向次选提供商发出请求，
+  采用先返回的结果
+- 调用失败时立即切换到下一个候选提供商
+
+流式输出不做对冲，只在收到第一个分块之前出错时切换提供商。
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from ..config import config
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class AllProvidersFailedError(RuntimeError):
+    """所有候选提供商都调用失败"""
+
+    def __init__(self, errors: list):
+        self.errors = errors
+        detail = "; ".join(f"{provider}: {error}" for provider, error in errors)
+        super().__init__(f"所有模型提供商均调用失败 ({detail})")
+
+
+class ProviderHealth:
+    """单个提供商的延迟、错误率和熔断状态"""
+
+    def __init__(self, name: str, window: int, alpha: float):
+        self.name = name
+        self.alpha = alpha
+        self.latency = None  # 延迟的指数滑动平均（秒）
+        self.outcomes = deque(maxlen=window)  # 最近调用是否成功
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.calls = 0
+        self.failures = 0
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "latency_ms": round(self.latency * 1000, 3) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "calls": self.calls,
+            "failures": self.failures,
+        }
+
+
+class ProviderRouter:
+    """按延迟和健康状况为每个请求排列候选提供商"""
+
+    def __init__(self, providers: list, error_threshold: float = None,
+                 min_calls: int = None, cooldown: float = None,
+                 window: int = None, alpha: float = None):
+        """
+        Args:
+            providers: 参与路由的提供商（顺序作为延迟相同时的优先级）
+            error_threshold: 触发熔断的错误率
+            min_calls: 窗口内至少有多少次调用才计算错误率
+            cooldown: 熔断后多少秒放行探测请求
+            window: 统计错误率的最近调用数
+            alpha: 延迟滑动平均的权重
+        """
+        self.providers = list(providers)
+        self.error_threshold = error_threshold or config.ROUTER_ERROR_THRESHOLD
+        self.min_calls = min_calls or config.ROUTER_MIN_CALLS
+        self.cooldown = cooldown or config.ROUTER_COOLDOWN
+        window = window or config.ROUTER_WINDOW
+        alpha = alpha or config.ROUTER_EWMA_ALPHA
+        self._health = {name: ProviderHealth(name, window, alpha) for name in self.providers}
+        self._lock = threading.Lock()
+        self.hedges = 0
+        self.failovers = 0
+
+    def candidates(self) -> list:
+        """按优先级排列本次请求的候选提供商
+
+        熔断中的提供商不参与；冷却期已过的提供商作为探测请求放在最前。
+        所有提供商都熔断时，按熔断时间先后全部尝试，而不是直接失败。
+        """
+        now = time.monotonic()
+        with self._lock:
+            probes, healthy = [], []
+            for order, name in enumerate(self.providers):
+                health = self._health[name]
+                if health.state == CLOSED:
+                    latency = health.latency if health.latency is not None else 0.0
+                    healthy.append((latency, order, name))
+                elif (not probes and not health.probing
+                      and now - health.opened_at >= self.cooldown):
+                    # 每次最多放行一个探测请求，且放在首位保证会被发出
+                    health.state = HALF_OPEN
+                    health.probing = True
+                    probes.append(name)
+            ranked = probes + [name for _latency, _order, name in sorted(healthy)]
+            if ranked:
+                return ranked
+            return sorted(self.providers, key=lambda name: self._health[name].opened_at)
+
+    def record_success(self, provider: str, latency: float):
+        """记录一次成功调用"""
+        with self._lock:
+            health = self._health[provider]
+            health.calls += 1
+            health.outcomes.append(True)
+            if health.latency is None:
+                health.latency = latency
+            else:
+                health.latency += health.alpha * (latency - health.latency)
+            if health.state != CLOSED:
+                health.state = CLOSED
+                health.probing = False
+                health.outcomes.clear()
+
+    def record_failure(self, provider: str):
+        """记录一次失败调用，必要时熔断"""
+        with self._lock:
+            health = self._health[provider]
+            health.calls += 1
+            health.failures += 1
+            health.outcomes.append(False)
+            tripped = (
+                len(health.outcomes) >= self.min_calls
+                and health.error_rate >= self.error_threshold
+            )
+            if health.state == HALF_OPEN or (health.state == CLOSED and tripped):
+                health.state = OPEN
+                health.opened_at = time.monotonic()
+                health.probing = False
+
+    def release_probe(self, provider: str):
+        """探测请求被取消（未得出结果）时，允许下次重新探测"""
+        with self._lock:
+            health = self._health[provider]
+            if health.state == HALF_OPEN:
+                health.state = OPEN
+                health.probing = False
+
+    def stats(self) -> dict:
+        """获取各提供商的路由状态"""
+        with self._lock:
+            return {
+                "providers": {name: health.stats() for name, health in self._health.items()},
+                "hedges": self.hedges,
+                "failovers": self.failovers,
+            }
+
+
+_hedge_pool = None
+_hedge_pool_lock = threading.Lock()
+
+
+def _get_hedge_pool() -> ThreadPoolExecutor:
+    """同步调用对冲使用的共享线程池"""
+    global _hedge_pool
+    if _hedge_pool is None:
+        with _hedge_pool_lock:
+            if _hedge_pool is None:
+                _hedge_pool = ThreadPoolExecutor(
+                    max_workers=config.ROUTER_MAX_WORKERS, thread_name_prefix="router"
+                )
+    return _hedge_pool
+
+
+# 各提供商模型的调用不挂回调：令牌、用量和开始 / 结束事件只由 RoutedChatModel 自己的 run 产生
+# （上下文中继承的父 run 回调也会被覆盖，否则每个 token 会被流式输出两次）
+_INNER_CONFIG = {"callbacks": []}
+
+
+class RoutedChatModel(BaseChatModel):
+    """在多个提供商的聊天模型之间路由的聊天模型"""
+
+    router: Any
+    """ProviderRouter 实例"""
+    models: dict
+    """提供商 -> 聊天模型（或绑定了工具的 Runnable）"""
+    hedge_delay: float = 0.0
+    """首选提供商多少秒未返回时发出对冲请求，0 表示不对冲"""
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"providers": list(self.models), "hedge_delay": self.hedge_delay}
+
+    def bind_tools(self, tools, **kwargs):
+        """为每个提供商的模型分别绑定工具"""
+        return self.model_copy(update={
+            "models": {
+                provider: model.bind_tools(tools, **kwargs)
+                for provider, model in self.models.items()
+            }
+        })
+
+    # ---- 单次调用 ----
+
+    def _call(self, provider: str, messages, stop, kwargs):
+        start = time.perf_counter()
+        try:
+            message = self.models[provider].invoke(
+                messages, config=_INNER_CONFIG, stop=stop, **kwargs
+            )
+        except Exception:
+            self.router.record_failure(provider)
+            raise
+        self.router.record_success(provider, time.perf_counter() - start)
+        return message
+
+    async def _acall(self, provider: str, messages, stop, kwargs):
+        start = time.perf_counter()
+        try:
+            message = await self.models[provider].ainvoke(
+                messages, config=_INNER_CONFIG, stop=stop, **kwargs
+            )
+        except asyncio.CancelledError:
+            self.router.release_probe(provider)
+            raise
+        except Exception:
+            self.router.record_failure(provider)
+            raise
+        self.router.record_success(provider, time.perf_counter() - start)
+        return message
+
+    @staticmethod
+    def _result(provider: str, message) -> ChatResult:
+        message = message.model_copy(update={
+            "response_metadata": {**message.response_metadata, "routed_provider": provider}
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    # ---- 对冲与故障切换 ----
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        candidates = self.router.candidates()
+        pool = _get_hedge_pool()
+        pending = {}
+        errors = []
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            provider = candidates[next_index]
+            next_index += 1
+            # 在调用线程的上下文副本中执行，保留 bypass_response_cache / request_priority 等设置
+            ctx = contextvars.copy_context()
+            pending[pool.submit(ctx.run, self._call, provider, messages, stop, kwargs)] = provider
+
+        launch()
+        while pending:
+            can_hedge = self.hedge_delay > 0 and next_index < len(candidates)
+            done, _ = wait(pending, timeout=self.hedge_delay if can_hedge else None,
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                # 首选提供商未在对冲延迟内返回，同时请求下一个提供商
+                self.router.hedges += 1
+                launch()
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    # 落后的请求在后台完成，结果仍会计入延迟统计
+                    return self._result(provider, future.result())
+                except Exception as e:
+                    errors.append((provider, e))
+            if next_index < len(candidates):
+                self.router.failovers += 1
+                launch()
+        raise AllProvidersFailedError(errors)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        candidates = self.router.candidates()
+        pending = {}
+        errors = []
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            provider = candidates[next_index]
+            next_index += 1
+            task = asyncio.ensure_future(self._acall(provider, messages, stop, kwargs))
+            pending[task] = provider
+
+        launch()
+        try:
+            while pending:
+                can_hedge = self.hedge_delay > 0 and next_index < len(candidates)
+                done, _ = await asyncio.wait(
+                    pending, timeout=self.hedge_delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    self.router.hedges += 1
+                    launch()
+                    continue
+                for task in done:
+                    provider = pending.pop(task)
+                    try:
+                        return self._result(provider, task.result())
+                    except Exception as e:
+                        errors.append((provider, e))
+                if next_index < len(candidates):
+                    self.router.failovers += 1
+                    launch()
+        finally:
+            # 异步请求可以取消，落后的对冲请求不再继续消耗 token
+            for task in pending:
+                task.cancel()
+        raise AllProvidersFailedError(errors)
+
+    # ---- 流式输出 ----
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        errors = []
+        for provider in self.router.candidates():
+            start = time.perf_counter()
+            started = False
+            try:
+                for chunk in self.models[provider].stream(
+                        messages, config=_INNER_CONFIG, stop=stop, **kwargs):
+                    started = True
+                    yield ChatGenerationChunk(message=chunk)
+            except Exception as e:
+                self.router.record_failure(provider)
+                if started:
+                    raise
+                errors.append((provider, e))
+                self.router.failovers += 1
+                continue
+            self.router.record_success(provider, time.perf_counter() - start)
+            return
+        raise AllProvidersFailedError(errors)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        errors = []
+        for provider in self.router.candidates():
+            start = time.perf_counter()
+            started = False
+            try:
+                async for chunk in self.models[provider].astream(
+                        messages, config=_INNER_CONFIG, stop=stop, **kwargs):
+                    started = True
+                    yield ChatGenerationChunk(message=chunk)
+            except Exception as e:
+                self.router.record_failure(provider)
+                if started:
+                    raise
+                errors.append((provider, e))
+                self.router.failovers += 1
+                continue
+            self.router.record_success(provider, time.perf_counter() - start)
+            return
+        raise AllProvidersFailedError(errors)
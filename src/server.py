@@ -0,0 +1,517 @@
+"""
+HTTP 服务模块
+在 asyncio 事件循环上通过 HTTP 提供所有 Agent，供网关在并发负载下调用。
+
+接口:
+    GET  /health                 健康检查
+    GET  /agents                 Agent 列表
+    GET  /agents/{id}            单个 Agent 的元数据
+    POST /agents/{id}/invoke     同步调用，返回完整回复
+    POST /agents/{id}/stream     流式调用（Server-Sent Events）
+    GET  /metrics                请求排队、延迟、提供商并发和缓存统计
+
+请求体: {"input": "用户输入", "session_id": "可选，传入上次返回的 ID 以延续对话"}
+
+- 只使用标准库的 asyncio 流实现 HTTP/1.1，支持长连接
+- Agent 按 ID 构建一次，之后在所有请求间共享；会话按 session_id 保留（LRU），
+  同一会话的请求依次执行
+- 同时执行的请求数受 SERVER_MAX_CONCURRENCY 限制，其余排队；
+  排队数达到 SERVER_MAX_QUEUE 时直接返回 503，由网关重试或转发
+- MODEL_PROVIDER=fake 时完全离线运行，用于测试和压测
+"""
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, suppress
+from http import HTTPStatus
+from urllib.parse import unquote, urlsplit
+
+from .agents.checkpoint import SessionAgentMismatch
+from .agents.definitions import get_agent_info_by_id, get_all_agent_infos
+from .agents.loader import AgentLoader
+from .agents.memory import content_text
+from .agents.session import AgentSession
+from .config import config
+from .llm.concurrency import provider_limiter
+from .utils import Histogram, MetricsRegistry, extract_response
+
+
+# 请求体大小上限（字节）
+MAX_BODY_BYTES = 1 << 20
+# 请求头数量上限
+MAX_HEADERS = 100
+
+
+class HttpError(Exception):
+    """以指定状态码返回给客户端的错误"""
+
+    def __init__(self, status: int, message: str, headers: dict = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class Request:
+    """解析后的 HTTP 请求"""
+
+    __slots__ = ("method", "path", "version", "headers", "body")
+
+    def __init__(self, method: str, path: str, version: str, headers: dict, body: bytes):
+        self.method = method
+        self.path = path
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    def json(self) -> dict:
+        """解析 JSON 请求体"""
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            raise HttpError(400, "请求体不是合法的 JSON")
+        if not isinstance(data, dict):
+            raise HttpError(400, "请求体必须是 JSON 对象")
+        return data
+
+
+class ServerMetrics:
+    """请求计数、排队状态和延迟直方图"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.connections = 0
+        self.requests = 0
+        self.active = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.rejected = 0
+        self.status_counts = {}
+        self.queue_wait_ms = Histogram()
+        self.latency = MetricsRegistry()
+
+    def record(self, route: str, status: int, latency_ms: float):
+        """记录一个已完成的请求"""
+        self.requests += 1
+        key = f"{route} {status}"
+        self.status_counts[key] = self.status_counts.get(key, 0) + 1
+        self.latency.record("request_latency_ms", latency_ms, route=route)
+
+    def snapshot(self) -> dict:
+        return {
+            "uptime_s": round(time.time() - self.started_at, 3),
+            "connections": self.connections,
+            "requests": self.requests,
+            "active": self.active,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "rejected": self.rejected,
+            "queue_wait_ms": self.queue_wait_ms.summary(),
+            "responses": dict(sorted(self.status_counts.items())),
+            "latency": self.latency.snapshot(),
+        }
+
+
+def _require_input(body: dict) -> str:
+    user_input = body.get("input")
+    if not isinstance(user_input, str) or not user_input.strip():
+        raise HttpError(400, "缺少 input 字段")
+    session_id = body.get("session_id")
+    if session_id is not None and not isinstance(session_id, str):
+        raise HttpError(400, "session_id 必须是字符串")
+    return user_input
+
+
+def _sse(event: str, data: dict) -> bytes:
+    """编码一条 Server-Sent Event"""
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n".encode("utf-8")
+
+
+def _stream_events(payload) -> list:
+    """把 stream_mode="messages" 的一个分块转换为 [(事件名, 数据), ...]"""
+    message, _metadata = payload
+    message_type = getattr(message, "type", "")
+    if message_type == "tool":
+        return [("tool_result", {"name": message.name, "content": content_text(message.content)})]
+    if message_type not in ("AIMessageChunk", "ai"):
+        return []
+
+    events = []
+    # 工具调用事件（名称只出现在第一个分块中）
+    for tool_chunk in getattr(message, "tool_call_chunks", None) or []:
+        if tool_chunk.get("name"):
+            events.append(("tool_call", {"name": tool_chunk["name"]}))
+    text = content_text(message.content)
+    if text:
+        events.append(("token", {"text": text}))
+    return events
+
+
+class AgentServer:
+    """基于 asyncio 的 Agent HTTP 服务"""
+
+    def __init__(self, host: str = None, port: int = None, max_concurrency: int = None,
+                 max_queue: int = None, max_sessions: int = None,
+                 keepalive_timeout: float = None):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口，0 表示随机分配
+            max_concurrency: 同时执行的 Agent 请求数
+            max_queue: 排队请求数上限
+            max_sessions: 保留的会话数，超出时淘汰最久未使用的空闲会话
+            keepalive_timeout: 长连接空闲超时（秒）
+        """
+        self.host = host or config.SERVER_HOST
+        self.port = config.SERVER_PORT if port is None else port
+        self.max_concurrency = max_concurrency or config.SERVER_MAX_CONCURRENCY
+        self.max_queue = config.SERVER_MAX_QUEUE if max_queue is None else max_queue
+        self.max_sessions = max_sessions or config.SERVER_MAX_SESSIONS
+        self.keepalive_timeout = keepalive_timeout or config.SERVER_KEEPALIVE_TIMEOUT
+        self.metrics = ServerMetrics()
+        self._agents = {}
+        self._agent_locks = {}
+        self._sessions = OrderedDict()  # session_id -> (AgentSession, asyncio.Lock)
+        self._semaphore = None
+        self._server = None
+
+    # ---- 生命周期 ----
+
+    async def start(self):
+        """开始监听（端口为 0 时，实际端口写回 self.port）"""
+        loop = asyncio.get_running_loop()
+        # LangGraph 在默认线程池中执行同步工具，线程数需跟得上并发请求数
+        loop.set_default_executor(ThreadPoolExecutor(
+            max_workers=self.max_concurrency + 4, thread_name_prefix="server"
+        ))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self, preload: list = ()):
+        """预先构建指定的 Agent 并持续提供服务
+
+        Args:
+            preload: 启动时构建的 Agent ID，避免第一个请求承担构建开销
+        """
+        for agent_id in preload:
+            await self._get_agent(agent_id)
+        await self.start()
+        print(f"🌐 服务已启动: http://{self.host}:{self.port}"
+              f"（并发 {self.max_concurrency}，排队上限 {self.max_queue}）")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """停止监听"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    # ---- Agent 和会话 ----
+
+    async def _get_agent(self, agent_id: str):
+        """获取共享的 Agent 实例（每个 ID 只构建一次）"""
+        agent = self._agents.get(agent_id)
+        if agent is not None:
+            return agent
+        if get_agent_info_by_id(agent_id) is None:
+            raise HttpError(404, f"未找到 Agent: {agent_id}")
+        lock = self._agent_locks.setdefault(agent_id, asyncio.Lock())
+        async with lock:
+            agent = self._agents.get(agent_id)
+            if agent is None:
+                agent = await AgentLoader.acreate_agent_by_id(agent_id)
+                if agent is None:
+                    raise HttpError(404, f"未找到 Agent: {agent_id}")
+                self._agents[agent_id] = agent
+        return agent
+
+    async def _get_session(self, agent_id: str, agent, session_id: str = None) -> tuple:
+        """获取或创建会话
+
+        Returns:
+            (AgentSession, 会话锁)
+        """
+        entry = self._sessions.get(session_id) if session_id else None
+        if entry is None:
+            # 配置了检查点存储时会读取历史，放到线程中执行
+            try:
+                session = await AgentSession.acreate(agent, agent_id, session_id=session_id)
+            except SessionAgentMismatch as e:
+                raise HttpError(409, str(e))
+            entry = self._sessions.setdefault(session.session_id, (session, asyncio.Lock()))
+
+        session = entry[0]
+        if session.agent_id != agent_id:
+            raise HttpError(409, f"会话 {session_id} 属于 Agent {session.agent_id}")
+        self._sessions.move_to_end(session.session_id)
+        excess = len(self._sessions) - self.max_sessions
+        if excess > 0:
+            # 正在处理请求（锁被占用）的会话不淘汰：否则同一 ID 的下一次请求会新建会话，
+            # 与进行中的这一轮并发执行；全部被占用时暂时超出上限
+            stale = []
+            for stale_id, (_, lock) in self._sessions.items():
+                if len(stale) >= excess:
+                    break
+                if stale_id != session.session_id and not lock.locked():
+                    stale.append(stale_id)
+            for stale_id in stale:
+                del self._sessions[stale_id]
+        return entry
+
+    @asynccontextmanager
+    async def _admission(self):
+        """占用一个执行名额；排队过多时拒绝"""
+        metrics = self.metrics
+        if self._semaphore.locked() and metrics.queued >= self.max_queue:
+            metrics.rejected += 1
+            raise HttpError(503, "服务繁忙，请稍后重试", {"Retry-After": "1"})
+        metrics.queued += 1
+        metrics.max_queued = max(metrics.max_queued, metrics.queued)
+        start = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            metrics.queued -= 1
+        metrics.queue_wait_ms.record((time.perf_counter() - start) * 1000)
+        metrics.active += 1
+        try:
+            yield
+        finally:
+            metrics.active -= 1
+            self._semaphore.release()
+
+    # ---- 接口 ----
+
+    async def _health(self, request, writer):
+        return 200, {"status": "ok"}
+
+    async def _list_agents(self, request, writer):
+        return 200, {"agents": get_all_agent_infos()}
+
+    async def _agent_info(self, request, writer, agent_id: str):
+        info = get_agent_info_by_id(agent_id)
+        if info is None:
+            raise HttpError(404, f"未找到 Agent: {agent_id}")
+        return 200, info
+
+    async def _invoke(self, request, writer, agent_id: str):
+        body = request.json()
+        user_input = _require_input(body)
+        agent = await self._get_agent(agent_id)
+        async with self._admission():
+            session, lock = await self._get_session(agent_id, agent, body.get("session_id"))
+            async with lock:
+                start = time.perf_counter()
+                response = await session.ainvoke(user_input)
+        return 200, {
+            "agent_id": agent_id,
+            "session_id": session.session_id,
+            "output": extract_response(response),
+            "turns": session.turns,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+        }
+
+    async def _stream(self, request, writer, agent_id: str):
+        body = request.json()
+        user_input = _require_input(body)
+        agent = await self._get_agent(agent_id)
+        async with self._admission():
+            session, lock = await self._get_session(agent_id, agent, body.get("session_id"))
+            async with lock:
+                # 校验通过后才发送响应头，之前的错误仍以普通 JSON 响应返回
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: text/event-stream; charset=utf-8\r\n"
+                    b"Cache-Control: no-cache\r\n"
+                    b"Connection: close\r\n\r\n"
+                )
+                writer.write(_sse("session", {"session_id": session.session_id}))
+                await writer.drain()
+
+                final_state = None
+                try:
+                    async for mode, payload in session.astream(user_input):
+                        if mode == "values":
+                            final_state = payload
+                            continue
+                        for event, data in _stream_events(payload):
+                            writer.write(_sse(event, data))
+                        await writer.drain()
+                except ConnectionError:
+                    raise
+                except Exception as e:
+                    writer.write(_sse("error", {"error": str(e)}))
+                else:
+                    writer.write(_sse("done", {
+                        "session_id": session.session_id,
+                        "output": extract_response(final_state) if final_state else "",
+                        "turns": session.turns,
+                    }))
+                await writer.drain()
+        return None
+
+    async def _metrics(self, request, writer):
+        from .agents.tool_executor import tool_executor
+        from .llm.rate_limit import rate_limit_stats
+
+        return 200, {
+            "server": {
+                **self.metrics.snapshot(),
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "agents": sorted(self._agents),
+                "sessions": len(self._sessions),
+            },
+            "providers": provider_limiter.stats(),
+            "rate_limits": rate_limit_stats(),
+            "agent_cache": AgentLoader.cache_stats(),
+            "tools": tool_executor.stats(),
+        }
+
+    def _route(self, method: str, path: str) -> tuple:
+        """匹配路由
+
+        Returns:
+            (路由名, 处理函数, 路径参数)
+        """
+        parts = [unquote(part) for part in path.split("/") if part]
+        routes = []
+        if parts == ["health"]:
+            routes = [("GET", "/health", self._health, ())]
+        elif parts == ["metrics"]:
+            routes = [("GET", "/metrics", self._metrics, ())]
+        elif parts == ["agents"]:
+            routes = [("GET", "/agents", self._list_agents, ())]
+        elif len(parts) == 2 and parts[0] == "agents":
+            routes = [("GET", "/agents/{id}", self._agent_info, (parts[1],))]
+        elif len(parts) == 3 and parts[0] == "agents" and parts[2] == "invoke":
+            routes = [("POST", "/agents/{id}/invoke", self._invoke, (parts[1],))]
+        elif len(parts) == 3 and parts[0] == "agents" and parts[2] == "stream":
+            routes = [("POST", "/agents/{id}/stream", self._stream, (parts[1],))]
+        if not routes:
+            raise HttpError(404, f"未知路径: {path}")
+        for route_method, name, handler, params in routes:
+            if route_method == method:
+                return f"{method} {name}", handler, params
+        allowed = ", ".join(route[0] for route in routes)
+        raise HttpError(405, f"{path} 只支持 {allowed}", {"Allow": allowed})
+
+    # ---- HTTP ----
+
+    async def _read_request(self, reader):
+        """读取一个请求，连接已关闭时返回 None"""
+        try:
+            line = await reader.readline()
+        except ValueError:
+            raise HttpError(400, "请求行过长")
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(400, "请求行格式错误")
+
+        headers = {}
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                raise HttpError(431, "请求头过长")
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, sep, value = line.decode("latin-1").partition(":")
+            if not sep:
+                raise HttpError(400, "请求头格式错误")
+            headers[name.strip().lower()] = value.strip()
+            if len(headers) > MAX_HEADERS:
+                raise HttpError(431, "请求头过多")
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HttpError(411, "不支持分块传输的请求体，请提供 Content-Length")
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HttpError(400, "Content-Length 格式错误")
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, f"请求体超过 {MAX_BODY_BYTES} 字节")
+        body = await reader.readexactly(length) if length else b""
+        return Request(method.upper(), urlsplit(target).path, version.upper(), headers, body)
+
+    @staticmethod
+    async def _send_json(writer, status: int, payload: dict, keep_alive: bool,
+                         headers: dict = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        lines = [
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _dispatch(self, request: Request, writer) -> bool:
+        """处理一个请求
+
+        Returns:
+            是否保持连接
+        """
+        start = time.perf_counter()
+        keep_alive = request.keep_alive
+        route = "unmatched"
+        try:
+            route, handler, params = self._route(request.method, request.path)
+            result = await handler(request, writer, *params)
+            if result is None:
+                # 流式响应已经写出，结束后关闭连接
+                status, keep_alive = 200, False
+            else:
+                status, payload = result
+                await self._send_json(writer, status, payload, keep_alive)
+        except HttpError as e:
+            status = e.status
+            await self._send_json(writer, status, {"error": e.message}, keep_alive, e.headers)
+        except ConnectionError:
+            raise
+        except Exception as e:
+            status = 500
+            await self._send_json(writer, status, {"error": str(e)}, keep_alive)
+        self.metrics.record(route, status, (time.perf_counter() - start) * 1000)
+        return keep_alive
+
+    async def _handle_connection(self, reader, writer):
+        self.metrics.connections += 1
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(
+                        self._read_request(reader), self.keepalive_timeout
+                    )
+                except HttpError as e:
+                    await self._send_json(writer, e.status, {"error": e.message}, False)
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    break
+                if request is None or not await self._dispatch(request, writer):
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
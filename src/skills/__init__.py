@@ -3,11 +3,22 @@
 """
 from .basic_skills import BASIC_SKILLS
 from .advanced_skills import ADVANCED_SKILLS
+from .caching import cacheable, skill_cache_stats, clear_skill_caches
+from .process_pool import run_in_process, skill_process_pool
+from .registry import get_skill_meta, skill, skill_registry
 
 __all__ = [
     'BASIC_SKILLS',
     'ADVANCED_SKILLS',
     'get_all_skills',
+    'cacheable',
+    'skill_cache_stats',
+    'clear_skill_caches',
+    'run_in_process',
+    'skill_process_pool',
+    'skill',
+    'skill_registry',
+    'get_skill_meta',
 ]
 
 
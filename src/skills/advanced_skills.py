@@ -3,35 +3,88 @@
 包含更复杂的工具
 """
 import os
-from datetime import datetime
+from datetime import datetime, timezone as tz
 
+from .file_output import file_writer
+from .registry import skill, skill_registry
+from .reminders import format_due, get_reminder_scheduler, parse_when
+from .timezones import format_time
 
+
+@skill(tags=("advanced", "time"))
 def get_current_time(timezone: str = "Asia/Shanghai") -> str:
     """获取当前时间
     
     Args:
-        timezone: 时区
+        timezone: 时区（IANA 名称如 Asia/Shanghai、城市名如 东京、或 UTC+8）
     
     Returns:
         当前时间
     """
-    current = datetime.now()
-    return f"当前时间（{timezone}）: {current.strftime('%Y-%m-%d %H:%M:%S')}"
+    try:
+        return f"当前时间 {format_time(datetime.now(tz.utc), timezone)}"
+    except ValueError as e:
+        return f"❌ {e}"
 
 
+@skill(tags=("advanced", "time"))
+def get_current_times(timezones: list[str]) -> str:
+    """一次获取多个时区的当前时间（需要比较多个地区时间时使用）
+    
+    Args:
+        timezones: 时区列表（IANA 名称、城市名或 UTC 偏移）
+    
+    Returns:
+        每个时区一行的当前时间
+    """
+    # 所有时区使用同一时刻，结果可以直接比较
+    now = datetime.now(tz.utc)
+    lines = []
+    for name in timezones:
+        try:
+            lines.append(format_time(now, name))
+        except ValueError as e:
+            lines.append(f"❌ {e}")
+    return "当前时间:\n" + "\n".join(lines)
+
+
+@skill(tags=("advanced", "time", "reminder"), side_effects=True)
 def create_reminder(task: str, time: str) -> str:
     """创建提醒事项
     
     Args:
         task: 提醒内容
-        time: 提醒时间
+        time: 提醒时间（如 30分钟后、明天 09:00、2026-10-18 09:30）
     
     Returns:
         创建结果
     """
-    return f"⏰ 提醒已创建\n任务: {task}\n时间: {time}\n将在指定时间通知您！"
+    try:
+        due = parse_when(time)
+    except ValueError as e:
+        return f"❌ 创建提醒失败: {e}"
+    reminder_id = get_reminder_scheduler().add(task, due)
+    return (f"⏰ 提醒已创建\n任务: {task}\n时间: {format_due(due)}\n编号: {reminder_id}\n"
+            f"将在指定时间通知您！")
 
 
+@skill(tags=("advanced", "time", "reminder"), side_effects=True)
+def cancel_reminder(reminder_id: int) -> str:
+    """取消提醒事项
+    
+    Args:
+        reminder_id: create_reminder 返回的提醒编号
+    
+    Returns:
+        取消结果
+    """
+    if get_reminder_scheduler().cancel(reminder_id):
+        return f"🗑️ 提醒 #{reminder_id} 已取消"
+    return f"❌ 未找到待触发的提醒: #{reminder_id}"
+
+
+@skill(tags=("advanced", "data"), cost="medium", cacheable=True, ttl=3600, maxsize=1024,
+       timeout=5, executor="process")
 def format_data(data: str, format_type: str = "json") -> str:
     """格式化数据
     
@@ -52,28 +105,45 @@ def format_data(data: str, format_type: str = "json") -> str:
         return data
 
 
-def save_to_file(filename: str, content: str) -> str:
-    """保存内容到文件
+@skill(tags=("advanced", "data", "file"), cost="medium", side_effects=True)
+def save_to_file(filename: str, content: str, append: bool = False) -> str:
+    """保存内容到文件（在后台写入，不阻塞对话）
     
     Args:
         filename: 文件名
         content: 内容
+        append: 是否追加到文件末尾，默认覆盖整个文件
     
     Returns:
-        保存结果
+        写入句柄，可用 check_file_write 查询是否已写入
     """
-    try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(content)
+    handle = file_writer.submit(filename, content, append=append)
+    if handle.status == "done":
         return f"💾 内容已保存到文件: {filename}"
-    except Exception as e:
-        return f"❌ 保存失败: {str(e)}"
+    if handle.status == "failed":
+        return f"❌ 保存失败: {handle.future.exception()}"
+    return f"💾 已提交写入: {filename}（句柄 {handle.id}，可用 check_file_write 查询结果）"
+
+
+@skill(tags=("advanced", "data", "file"))
+def check_file_write(handle_id: str) -> str:
+    """查询 save_to_file 的写入结果
+    
+    Args:
+        handle_id: save_to_file 返回的句柄
+    
+    Returns:
+        写入状态
+    """
+    handle = file_writer.get(handle_id)
+    if handle is None:
+        return f"❌ 未找到写入句柄: {handle_id}"
+    if handle.status == "pending":
+        return f"⏳ 正在写入: {handle.path}"
+    if handle.status == "failed":
+        return f"❌ 保存失败: {handle.path}（{handle.future.exception()}）"
+    return f"💾 内容已保存到文件: {handle.path}"
 
 
-# 导出高级技能
-ADVANCED_SKILLS = [
-    get_current_time,
-    create_reminder,
-    format_data,
-    save_to_file,
-]
+# 导出高级技能（按注册表中的元数据带上结果缓存 / 进程池执行）
+ADVANCED_SKILLS = skill_registry.select(tags="advanced")
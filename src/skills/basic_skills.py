@@ -2,8 +2,13 @@
 基础技能模块
 包含常用的基础工具
 """
+import json
 
+from .expression import evaluate
+from .registry import skill, skill_registry
 
+
+@skill(tags=("basic", "weather"), cacheable=True, ttl=600)
 def get_weather(city: str) -> str:
     """获取指定城市的天气信息
     
@@ -23,9 +28,14 @@ def get_weather(city: str) -> str:
     return weather_data.get(city, f"{city} 天气晴朗，温度适宜！")
 
 
+@skill(tags=("basic", "math"), cost="medium", cacheable=True, ttl=3600, maxsize=1024,
+       timeout=5, executor="process")
 def calculate(expression: str) -> str:
     """计算数学表达式
     
+    支持 + - * / // % ** 运算、括号，以及 sqrt、sin、log、factorial 等数学函数
+    和 pi、e 常量。
+    
     Args:
         expression: 数学表达式
     
@@ -33,12 +43,13 @@ def calculate(expression: str) -> str:
         计算结果
     """
     try:
-        result = eval(expression)
+        result = evaluate(expression)
         return f"计算结果: {expression} = {result}"
     except Exception as e:
         return f"计算错误: {str(e)}"
 
 
+@skill(tags=("basic", "search"), cacheable=True, ttl=300)
 def search_info(query: str) -> str:
     """搜索信息（模拟）
     
@@ -51,9 +62,78 @@ def search_info(query: str) -> str:
     return f"关于 '{query}' 的搜索结果：这是一个模拟的搜索结果。在实际应用中，这里会返回真实的搜索信息。"
 
 
-# 导出所有基础技能
-BASIC_SKILLS = [
-    get_weather,
-    calculate,
-    search_info,
-]
+# ---- 批量技能：一次工具调用处理多个输入，省去多轮模型 → 工具往返 ----
+
+# 单次批量调用最多处理的输入数
+MAX_BULK_ITEMS = 50
+
+
+def _bulk_results(key: str, items: list, run) -> str:
+    """对去重后的输入逐个执行，按输入顺序返回 JSON 数组
+
+    Args:
+        key: 结果中输入字段的名称
+        items: 输入列表
+        run: 处理单个输入的函数
+
+    Returns:
+        [{key: 输入, "result": 结果}, ...] 的 JSON 字符串
+    """
+    results = {}
+    for item in items[:MAX_BULK_ITEMS]:
+        if item not in results:
+            try:
+                results[item] = run(item)
+            except Exception as e:
+                results[item] = f"错误: {e}"
+    payload = [{key: item, "result": results[item]} for item in items[:MAX_BULK_ITEMS]]
+    if len(items) > MAX_BULK_ITEMS:
+        payload.append({"error": f"一次最多处理 {MAX_BULK_ITEMS} 个，其余 "
+                                 f"{len(items) - MAX_BULK_ITEMS} 个未处理"})
+    return json.dumps(payload, ensure_ascii=False)
+
+
+@skill(tags=("basic", "weather", "bulk"))
+def get_weather_many(cities: list[str]) -> str:
+    """一次获取多个城市的天气信息（需要查询多个城市时使用，不要逐个调用 get_weather）
+    
+    Args:
+        cities: 城市名称列表
+    
+    Returns:
+        JSON 数组，每个城市一项 {"city": 城市, "result": 天气信息}
+    """
+    # 与 get_weather 共享结果缓存
+    return _bulk_results("city", cities, skill_registry.get("get_weather").tool)
+
+
+@skill(tags=("basic", "math", "bulk"), cost="medium", timeout=10, executor="process")
+def calculate_many(expressions: list[str]) -> str:
+    """一次计算多个数学表达式（需要计算多个表达式时使用，不要逐个调用 calculate）
+    
+    Args:
+        expressions: 数学表达式列表
+    
+    Returns:
+        JSON 数组，每个表达式一项 {"expression": 表达式, "result": 计算结果}
+    """
+    # 整批在同一个子进程任务中计算，只有一次进程间往返
+    return _bulk_results("expression", expressions, calculate)
+
+
+@skill(tags=("basic", "search", "bulk"))
+def search_info_many(queries: list[str]) -> str:
+    """一次搜索多个关键词（需要搜索多个关键词时使用，不要逐个调用 search_info）
+    
+    Args:
+        queries: 搜索关键词列表
+    
+    Returns:
+        JSON 数组，每个关键词一项 {"query": 关键词, "result": 搜索结果}
+    """
+    # 与 search_info 共享结果缓存
+    return _bulk_results("query", queries, skill_registry.get("search_info").tool)
+
+
+# 导出所有基础技能（按注册表中的元数据带上结果缓存 / 进程池执行）
+BASIC_SKILLS = skill_registry.select(tags="basic")
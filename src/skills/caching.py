@@ -0,0 +1,163 @@
+"""
+技能结果缓存模块
+对纯函数技能（相同参数总是返回相同结果）做带 TTL 的 LRU 记忆化
+"""
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+
+from ..config import config
+
+
+# 标记属性名：被 @cacheable 标记的技能会带有该属性
+CACHE_OPTIONS_ATTR = "__skill_cache__"
+
+# 原函数 -> 带缓存的包装函数，保证同一技能在各技能列表中共享一个缓存
+_memoized = {}
+_memoized_lock = threading.Lock()
+
+
+def cacheable(ttl: float = 300, maxsize: int = 256):
+    """把技能标记为可缓存（只做标记，由 memoize_skills 统一包装）
+
+    Args:
+        ttl: 结果有效期（秒），0 表示永不过期
+        maxsize: 最多缓存的不同参数组合数
+
+    用法:
+        @cacheable(ttl=600)
+        def get_weather(city: str) -> str: ...
+    """
+    def decorator(func):
+        setattr(func, CACHE_OPTIONS_ATTR, {"ttl": ttl, "maxsize": maxsize})
+        return func
+    return decorator
+
+
+class SkillCache:
+    """线程安全的 TTL + LRU 结果缓存"""
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """查询缓存
+
+        Returns:
+            (是否命中, 结果)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at >= time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        """写入缓存"""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """获取命中统计"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def _memoize(func, ttl: float, maxsize: int):
+    """为函数创建带缓存的包装函数（保留签名和文档，供工具 schema 使用）"""
+    signature = inspect.signature(func)
+    cache = SkillCache(ttl, maxsize)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # 按签名绑定参数，位置参数和关键字参数写法得到同一个键
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = tuple(bound.arguments.items())
+        try:
+            hit, value = cache.get(key)
+        except TypeError:
+            # 参数不可哈希时直接执行
+            return func(*args, **kwargs)
+        if hit:
+            return value
+        value = func(*args, **kwargs)
+        cache.put(key, value)
+        return value
+
+    wrapper.cache = cache
+    return wrapper
+
+
+def memoize_skills(skills: list) -> list:
+    """为列表中被 @cacheable 标记的技能透明地加上结果缓存
+
+    Args:
+        skills: 技能函数列表
+
+    Returns:
+        新的技能列表，未标记的技能保持不变；SKILL_CACHE=false 时原样返回
+    """
+    if not config.SKILL_CACHE:
+        return list(skills)
+
+    result = []
+    for func in skills:
+        options = getattr(func, CACHE_OPTIONS_ATTR, None)
+        if options is None or hasattr(func, "cache"):
+            result.append(func)
+            continue
+        with _memoized_lock:
+            wrapper = _memoized.get(func)
+            if wrapper is None:
+                wrapper = _memoize(func, options["ttl"], options["maxsize"])
+                _memoized[func] = wrapper
+        result.append(wrapper)
+    return result
+
+
+def skill_cache_stats() -> dict:
+    """获取所有技能缓存的命中统计
+
+    Returns:
+        字典，键为技能名，值为统计信息
+    """
+    with _memoized_lock:
+        return {func.__name__: wrapper.cache.stats()
+                for func, wrapper in _memoized.items()}
+
+
+def clear_skill_caches():
+    """清空所有技能缓存"""
+    with _memoized_lock:
+        for wrapper in _memoized.values():
+            wrapper.cache.clear()
@@ -0,0 +1,343 @@
+"""
+安全表达式计算模块
+基于 AST 的算术表达式求值器，替代 eval
+
+- 只允许白名单内的运算符、数学函数和常量
+- 表达式编译为闭包树并缓存，重复计算无需再次解析
+- 限制表达式长度、节点数、整数位数和计算时间，防止 9**9**9 之类的表达式卡死进程
+- evaluate_many 对同一表达式批量代入多组变量，只编译一次
+"""
+import ast
+import math
+import operator
+import time
+from functools import lru_cache
+
+
+# 表达式最大长度（字符）
+MAX_EXPRESSION_LENGTH = 1000
+# 表达式最大 AST 节点数（即单次求值的最大运算次数）
+MAX_NODES = 200
+# 整数操作数和结果的最大位数
+MAX_INT_BITS = 4096
+# factorial 允许的最大参数
+MAX_FACTORIAL = 500
+# 默认单次求值的时间上限（秒）
+DEFAULT_TIMEOUT = 1.0
+
+
+class ExpressionError(ValueError):
+    """表达式不合法或超出计算限制"""
+
+
+def _check_int(value):
+    """检查整数结果的位数"""
+    if isinstance(value, int) and value.bit_length() > MAX_INT_BITS:
+        raise ExpressionError(f"数值过大（超过 {MAX_INT_BITS} 位）")
+    return value
+
+
+def _safe_mul(a, b):
+    if isinstance(a, int) and isinstance(b, int) \
+            and a.bit_length() + b.bit_length() > MAX_INT_BITS + 1:
+        raise ExpressionError(f"数值过大（超过 {MAX_INT_BITS} 位）")
+    return a * b
+
+
+def _safe_pow(base, exponent):
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0:
+        # 预估结果位数，超限时不做计算
+        if abs(base) > 1 and (abs(base).bit_length() - 1) * exponent > MAX_INT_BITS:
+            raise ExpressionError(f"数值过大（超过 {MAX_INT_BITS} 位）")
+    try:
+        result = base ** exponent
+    except OverflowError:
+        raise ExpressionError("计算结果溢出")
+    if isinstance(result, complex):
+        # 负数的非整数次幂在实数范围内无定义，Python 会返回复数
+        raise ExpressionError("负数不能开非整数次幂")
+    return result
+
+
+def _safe_factorial(n):
+    if not isinstance(n, int) and not (isinstance(n, float) and n.is_integer()):
+        raise ExpressionError("factorial 只接受整数")
+    n = int(n)
+    if n < 0 or n > MAX_FACTORIAL:
+        raise ExpressionError(f"factorial 参数必须在 0 到 {MAX_FACTORIAL} 之间")
+    return math.factorial(n)
+
+
+def _safe_div(a, b):
+    if b == 0:
+        raise ExpressionError("除数不能为 0")
+    return a / b
+
+
+def _safe_floordiv(a, b):
+    if b == 0:
+        raise ExpressionError("除数不能为 0")
+    return a // b
+
+
+def _safe_mod(a, b):
+    if b == 0:
+        raise ExpressionError("除数不能为 0")
+    return a % b
+
+
+# 允许的二元运算符
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: _safe_mul,
+    ast.Div: _safe_div,
+    ast.FloorDiv: _safe_floordiv,
+    ast.Mod: _safe_mod,
+    ast.Pow: _safe_pow,
+}
+
+# 允许的一元运算符
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+# 允许的函数
+FUNCTIONS = {
+    "abs": abs,
+    "round": round,
+    "min": min,
+    "max": max,
+    "pow": _safe_pow,
+    "sqrt": math.sqrt,
+    "exp": math.exp,
+    "log": math.log,
+    "log10": math.log10,
+    "log2": math.log2,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "asin": math.asin,
+    "acos": math.acos,
+    "atan": math.atan,
+    "atan2": math.atan2,
+    "hypot": math.hypot,
+    "degrees": math.degrees,
+    "radians": math.radians,
+    "floor": math.floor,
+    "ceil": math.ceil,
+    "factorial": _safe_factorial,
+}
+
+# 允许的常量
+CONSTANTS = {
+    "pi": math.pi,
+    "e": math.e,
+    "tau": math.tau,
+}
+
+
+class _Context:
+    """单次求值的上下文：变量表和截止时间"""
+
+    __slots__ = ("variables", "deadline")
+
+    def __init__(self, variables: dict, deadline: float):
+        self.variables = variables
+        self.deadline = deadline
+
+
+def _check_deadline(ctx: _Context):
+    if time.monotonic() > ctx.deadline:
+        raise ExpressionError("计算超时")
+
+
+class CompiledExpression:
+    """编译后的表达式，可反复代入不同变量求值"""
+
+    def __init__(self, source: str, evaluator, variables: frozenset, node_count: int):
+        self.source = source
+        self.variables = variables
+        self.node_count = node_count
+        self._evaluator = evaluator
+
+    def evaluate(self, variables: dict = None, timeout: float = DEFAULT_TIMEOUT):
+        """求值
+
+        Args:
+            variables: 变量取值
+            timeout: 时间上限（秒）
+
+        Returns:
+            计算结果
+        """
+        variables = variables or {}
+        missing = self.variables - variables.keys()
+        if missing:
+            raise ExpressionError(f"缺少变量: {', '.join(sorted(missing))}")
+        ctx = _Context(variables, time.monotonic() + timeout)
+        try:
+            return _check_int(self._evaluator(ctx))
+        except ExpressionError:
+            raise
+        except (ArithmeticError, ValueError, TypeError) as e:
+            raise ExpressionError(str(e)) from e
+
+    def __call__(self, **variables):
+        return self.evaluate(variables)
+
+
+class _Compiler:
+    """把 AST 编译为闭包树，同时完成白名单校验"""
+
+    def __init__(self):
+        self.node_count = 0
+        self.variables = set()
+
+    def compile(self, node):
+        self.node_count += 1
+        if self.node_count > MAX_NODES:
+            raise ExpressionError(f"表达式过于复杂（超过 {MAX_NODES} 个节点）")
+
+        if isinstance(node, ast.Expression):
+            return self.compile(node.body)
+
+        if isinstance(node, ast.Constant):
+            value = node.value
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ExpressionError(f"不支持的常量: {value!r}")
+            _check_int(value)
+            return lambda ctx: value
+
+        if isinstance(node, ast.Name):
+            name = node.id
+            if name in CONSTANTS:
+                value = CONSTANTS[name]
+                return lambda ctx: value
+            if name in FUNCTIONS:
+                raise ExpressionError(f"函数 {name} 需要调用")
+            self.variables.add(name)
+            return lambda ctx: ctx.variables[name]
+
+        if isinstance(node, ast.BinOp):
+            op = BINARY_OPERATORS.get(type(node.op))
+            if op is None:
+                raise ExpressionError(f"不支持的运算符: {type(node.op).__name__}")
+            left = self.compile(node.left)
+            right = self.compile(node.right)
+
+            def binary(ctx):
+                a, b = left(ctx), right(ctx)
+                _check_deadline(ctx)
+                return _check_int(op(a, b))
+            return binary
+
+        if isinstance(node, ast.UnaryOp):
+            op = UNARY_OPERATORS.get(type(node.op))
+            if op is None:
+                raise ExpressionError(f"不支持的运算符: {type(node.op).__name__}")
+            operand = self.compile(node.operand)
+            return lambda ctx: op(operand(ctx))
+
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+                name = getattr(node.func, "id", ast.dump(node.func))
+                raise ExpressionError(f"不支持的函数: {name}")
+            if node.keywords:
+                raise ExpressionError("函数调用不支持关键字参数")
+            func = FUNCTIONS[node.func.id]
+            args = [self.compile(arg) for arg in node.args]
+
+            def call(ctx):
+                values = [arg(ctx) for arg in args]
+                _check_deadline(ctx)
+                return _check_int(func(*values))
+            return call
+
+        raise ExpressionError(f"不支持的语法: {type(node).__name__}")
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str) -> CompiledExpression:
+    """编译表达式（结果按表达式文本缓存）
+
+    Raises:
+        ExpressionError: 表达式不合法或超出限制
+    """
+    source = expression.strip()
+    if not source:
+        raise ExpressionError("表达式为空")
+    if len(source) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"表达式过长（超过 {MAX_EXPRESSION_LENGTH} 个字符）")
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"语法错误: {e.msg}") from e
+
+    compiler = _Compiler()
+    evaluator = compiler.compile(tree)
+    return CompiledExpression(
+        source, evaluator, frozenset(compiler.variables), compiler.node_count
+    )
+
+
+def evaluate(expression: str, variables: dict = None, timeout: float = DEFAULT_TIMEOUT):
+    """安全地计算表达式
+
+    Args:
+        expression: 算术表达式，例如 "2 * (3 + 4) ** 2" 或 "sqrt(x) + 1"
+        variables: 变量取值
+        timeout: 时间上限（秒）
+
+    Returns:
+        计算结果
+
+    Raises:
+        ExpressionError: 表达式不合法、超出限制或计算出错
+    """
+    return compile_expression(expression).evaluate(variables, timeout)
+
+
+def evaluate_many(expression: str, variables: dict, timeout: float = DEFAULT_TIMEOUT,
+                  strict: bool = True) -> list:
+    """对同一个表达式批量代入多组变量求值（只编译一次）
+
+    Args:
+        expression: 算术表达式
+        variables: 变量名 -> 取值列表；标量会广播到所有行
+        timeout: 整批计算的时间上限（秒）
+        strict: 为 True 时任意一行出错即抛出异常，否则该行结果为 None
+
+    Returns:
+        每一行的计算结果列表
+
+    示例:
+        evaluate_many("x ** 2 + y", {"x": [1, 2, 3], "y": 1})  # [2, 5, 10]
+    """
+    compiled = compile_expression(expression)
+
+    lengths = {len(v) for v in variables.values() if isinstance(v, (list, tuple))}
+    if len(lengths) > 1:
+        raise ExpressionError("各变量的取值个数不一致")
+    size = lengths.pop() if lengths else 1
+
+    columns = {
+        name: value if isinstance(value, (list, tuple)) else [value] * size
+        for name, value in variables.items()
+    }
+    names = list(columns)
+    deadline = time.monotonic() + timeout
+
+    results = []
+    for row in zip(*(columns[name] for name in names)) if names else [()] * size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise ExpressionError("计算超时")
+        try:
+            results.append(compiled.evaluate(dict(zip(names, row)), remaining))
+        except ExpressionError:
+            if strict:
+                raise
+            results.append(None)
+    return results
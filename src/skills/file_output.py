@@ -0,0 +1,257 @@
+"""
+文件输出模块
+在后台线程中合并、批量写入技能产生的文件，不阻塞对话。
+
+- 写入请求立即返回句柄，Agent 可以用句柄查询是否已写入磁盘
+- 后台线程把 FILE_OUTPUT_FLUSH_INTERVAL 内到达的写入合并为一批：
+  同一文件的多次追加合并为一次写入，覆盖写只保留最后一次（及其后的追加）
+- 覆盖写先写临时文件再原子替换，写入中途退出不会留下半个文件
+- 每批每个文件最多 fsync 一次（FILE_OUTPUT_FSYNC=false 时不 fsync）
+- 进程退出前自动写完队列中的请求
+
+FILE_OUTPUT_ASYNC=false 时在调用线程中同步写入，行为与后台写入相同。
+"""
+import asyncio
+import atexit
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from ..config import config
+
+
+class WriteHandle:
+    """一次写入请求的句柄"""
+
+    __slots__ = ("id", "path", "content", "size", "append", "submitted_at", "future")
+
+    def __init__(self, handle_id: str, path: str, content: str, append: bool):
+        self.id = handle_id
+        self.path = path
+        self.content = content
+        self.size = len(content)
+        self.append = append
+        self.submitted_at = time.time()
+        self.future = Future()
+
+    @property
+    def status(self) -> str:
+        """pending / done / failed"""
+        if not self.future.done():
+            return "pending"
+        return "failed" if self.future.exception() is not None else "done"
+
+    def wait(self, timeout: float = None) -> bool:
+        """等待写入完成
+
+        Returns:
+            是否写入成功；超时返回 False
+        """
+        try:
+            self.future.result(timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    def to_dict(self) -> dict:
+        error = self.future.exception() if self.status == "failed" else None
+        return {
+            "id": self.id,
+            "path": self.path,
+            "mode": "append" if self.append else "write",
+            "size": self.size,
+            "status": self.status,
+            "error": str(error) if error else None,
+        }
+
+
+class BufferedFileWriter:
+    """合并小写入的后台文件写入器"""
+
+    def __init__(self, flush_interval: float = None, batch_size: int = None,
+                 fsync: bool = None, background: bool = None, max_handles: int = 1024):
+        """
+        Args:
+            flush_interval: 收到第一个写入后最多等待多少秒再批量写出
+            batch_size: 排队内容达到该字符数时立即写出
+            fsync: 写出后是否 fsync
+            background: 是否在后台线程中写入
+            max_handles: 保留多少个最近的句柄供查询
+        """
+        self.flush_interval = (config.FILE_OUTPUT_FLUSH_INTERVAL
+                               if flush_interval is None else flush_interval)
+        self.batch_size = batch_size or config.FILE_OUTPUT_BATCH_SIZE
+        self.fsync = config.FILE_OUTPUT_FSYNC if fsync is None else fsync
+        self.background = config.FILE_OUTPUT_ASYNC if background is None else background
+        self.max_handles = max_handles
+        self._queue = deque()
+        self._queued_chars = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._handles = OrderedDict()
+        self._ids = itertools.count(1)
+        self._last = None
+        # 统计
+        self.submitted = 0
+        self.batches = 0
+        self.file_writes = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.chars_written = 0
+
+    # ---- 提交 ----
+
+    def submit(self, path: str, content: str, append: bool = False) -> WriteHandle:
+        """提交一次写入
+
+        Args:
+            path: 文件路径
+            content: 内容
+            append: 追加到文件末尾；否则覆盖整个文件
+
+        Returns:
+            WriteHandle 句柄
+        """
+        with self._cond:
+            handle = WriteHandle(f"w{next(self._ids)}", path, content, append)
+            self._handles[handle.id] = handle
+            while len(self._handles) > self.max_handles:
+                self._handles.popitem(last=False)
+            self.submitted += 1
+            self._last = handle
+            if self.background:
+                self._queue.append(handle)
+                self._queued_chars += len(content)
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="file-writer", daemon=True
+                    )
+                    self._thread.start()
+                self._cond.notify()
+                return handle
+        self._write_batch([handle])
+        return handle
+
+    async def awrite(self, path: str, content: str, append: bool = False) -> WriteHandle:
+        """提交写入并异步等待完成（失败时抛出异常）"""
+        handle = self.submit(path, content, append=append)
+        await asyncio.wrap_future(handle.future)
+        return handle
+
+    def get(self, handle_id: str):
+        """按 ID 查询句柄，不存在（或已过旧被丢弃）时返回 None"""
+        return self._handles.get(handle_id)
+
+    def flush(self, timeout: float = None) -> bool:
+        """等待已提交的写入全部完成
+
+        Returns:
+            是否在超时前完成
+        """
+        last = self._last
+        if last is None:
+            return True
+        try:
+            last.future.exception(timeout=timeout)
+            return True
+        except FutureTimeoutError:
+            return False
+
+    # ---- 后台写入 ----
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                # 等一小段时间，让同一时段的小写入合并为一批
+                deadline = time.monotonic() + self.flush_interval
+                while self._queued_chars < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = list(self._queue)
+                self._queue.clear()
+                self._queued_chars = 0
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: list):
+        """按文件分组写出一批请求（同一文件内保持提交顺序）"""
+        by_path = {}
+        for handle in batch:
+            by_path.setdefault(handle.path, []).append(handle)
+        self.batches += 1
+
+        for path, handles in by_path.items():
+            # 最后一次覆盖写之前的请求都会被它覆盖，不必写出
+            start = 0
+            for idx, handle in enumerate(handles):
+                if not handle.append:
+                    start = idx
+            base = handles[start]
+            text = "".join(handle.content for handle in handles[start:])
+            try:
+                if base.append:
+                    self._append(path, text)
+                else:
+                    self._replace(path, text)
+            except Exception as e:
+                self.failures += len(handles)
+                for handle in handles:
+                    handle.future.set_exception(e)
+                continue
+            self.file_writes += 1
+            self.coalesced += len(handles) - 1
+            self.chars_written += len(text)
+            for handle in handles:
+                # 句柄会保留一段时间供查询，写出后不再持有内容
+                handle.content = None
+                handle.future.set_result(path)
+
+    def _append(self, path: str, text: str):
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(text)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _replace(self, path: str, text: str):
+        """先写临时文件再原子替换"""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def stats(self) -> dict:
+        """获取写入统计"""
+        with self._cond:
+            queued = len(self._queue)
+        return {
+            "background": self.background,
+            "queued": queued,
+            "submitted": self.submitted,
+            "batches": self.batches,
+            "file_writes": self.file_writes,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "chars_written": self.chars_written,
+        }
+
+
+# 进程级共享的文件写入器
+file_writer = BufferedFileWriter()
+
+# 进程退出前写完队列中的请求
+atexit.register(file_writer.flush, 10)
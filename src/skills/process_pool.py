@@ -0,0 +1,246 @@
+"""
+技能进程池模块
+把 CPU 密集的技能放到常驻子进程中执行，绕开 GIL，使多个会话的计算类工具调用
+随 CPU 核数扩展。
+
+- @run_in_process 只做标记，由 offload_skills 统一包装（与 @cacheable 相同的模式）
+- 子进程启动时预先导入 src.skills，池创建后立即预热全部进程
+- 只向子进程发送 (模块名, 函数名) 和参数，不序列化函数对象；子进程按引用查找原函数
+- 每个任务有执行时间上限，超时后回收整个进程池（卡住的子进程无法单独中断）
+
+SKILL_PROCESSES=0（默认）时不启用，标记的技能仍在线程中执行。
+"""
+import functools
+import importlib
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from ..config import config
+
+
+# 标记属性名：被 @run_in_process 标记的技能会带有该属性
+PROCESS_OPTIONS_ATTR = "__skill_process__"
+
+# 与 agents.tool_executor.TIMEOUT_ATTR 相同，工具执行器按它确定单个技能的超时
+TIMEOUT_ATTR = "__skill_timeout__"
+
+# 原函数 -> 进程池派发函数
+_offloaded = {}
+_offloaded_lock = threading.Lock()
+
+
+class SkillProcessTimeout(RuntimeError):
+    """技能在子进程中超过了执行时间上限
+
+    不继承 TimeoutError：工具执行器会把 TimeoutError 当成自己的等待超时，
+    报出的时间上限与子进程的不一致。
+    """
+
+
+def run_in_process(timeout: float = None):
+    """把技能标记为在进程池中执行（只做标记，由 offload_skills 统一包装）
+
+    被标记的技能必须是模块级函数，参数和返回值可以被 pickle。
+
+    Args:
+        timeout: 单次执行的时间上限（秒），默认使用 SKILL_PROCESS_TIMEOUT
+
+    用法:
+        @run_in_process(timeout=5)
+        def calculate(expression: str) -> str: ...
+    """
+    def decorator(func):
+        setattr(func, PROCESS_OPTIONS_ATTR, {"timeout": timeout})
+        return func
+    return decorator
+
+
+# ---- 子进程 ----
+
+_worker_targets = {}
+
+
+def _init_worker():
+    """子进程初始化：忽略 Ctrl+C（由主进程统一处理）并预先导入技能模块"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    importlib.import_module("src.skills")
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _run_skill(target: tuple, args: tuple, kwargs: dict):
+    """在子进程中按引用查找并执行技能"""
+    func = _worker_targets.get(target)
+    if func is None:
+        module_name, name = target
+        func = getattr(importlib.import_module(module_name), name)
+        _worker_targets[target] = func
+    return func(*args, **kwargs)
+
+
+# ---- 主进程 ----
+
+class SkillProcessPool:
+    """常驻的技能子进程池"""
+
+    def __init__(self, workers: int = None, default_timeout: float = None,
+                 start_method: str = None):
+        """
+        Args:
+            workers: 子进程数，默认使用 SKILL_PROCESSES
+            default_timeout: 单个任务的默认时间上限（秒）
+            start_method: 子进程启动方式（spawn / forkserver / fork）
+        """
+        self.workers = workers or config.SKILL_PROCESSES or os.cpu_count() or 1
+        self.default_timeout = default_timeout or config.SKILL_PROCESS_TIMEOUT
+        self.start_method = start_method or config.SKILL_PROCESS_START_METHOD
+        self._pool = None
+        self._lock = threading.Lock()
+        # 同时提交的任务数不超过进程数，超时只计算执行时间而不含排队时间
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self.tasks = 0
+        self.timeouts = 0
+        self.recycles = 0
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_worker,
+        )
+        # 预热：每个进程都需要一个任务才会被启动
+        for _ in range(self.workers):
+            pool.submit(_ping)
+        return pool
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        """按需创建并预热进程池"""
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = self._create_pool()
+        return self._pool
+
+    def warm(self, timeout: float = 30) -> list:
+        """创建进程池并等待全部子进程就绪
+
+        Returns:
+            子进程 PID 列表
+        """
+        pool = self.pool
+        for future in [pool.submit(_ping) for _ in range(self.workers)]:
+            future.result(timeout=timeout)
+        return sorted(getattr(pool, "_processes", None) or {})
+
+    def _recycle(self, broken: ProcessPoolExecutor):
+        """终止并替换进程池（超时的子进程无法单独中断）"""
+        with self._lock:
+            if self._pool is not broken:
+                return
+            self._pool = None
+            self.recycles += 1
+        for process in list(getattr(broken, "_processes", {}).values()):
+            process.terminate()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def call(self, target: tuple, args: tuple, kwargs: dict, timeout: float = None):
+        """在子进程中执行技能
+
+        Args:
+            target: (模块名, 函数名)
+            args: 位置参数
+            kwargs: 关键字参数
+            timeout: 时间上限（秒）
+
+        Returns:
+            技能的返回值
+        """
+        timeout = timeout or self.default_timeout
+        self.tasks += 1
+        with self._slots:
+            for attempt in range(2):
+                pool = self.pool
+                try:
+                    future = pool.submit(_run_skill, target, args, kwargs)
+                    return future.result(timeout=timeout)
+                except FutureTimeoutError:
+                    self.timeouts += 1
+                    self._recycle(pool)
+                    raise SkillProcessTimeout(f"{target[1]} 执行超过 {timeout}s")
+                except BrokenProcessPool:
+                    # 进程池被其他任务的超时回收或子进程崩溃，换新池重试一次
+                    self._recycle(pool)
+                    if attempt:
+                        raise
+
+    def stats(self) -> dict:
+        """获取进程池统计"""
+        return {
+            "workers": self.workers,
+            "start_method": self.start_method,
+            "started": self._pool is not None,
+            "tasks": self.tasks,
+            "timeouts": self.timeouts,
+            "recycles": self.recycles,
+        }
+
+    def shutdown(self):
+        """关闭进程池"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# 进程级共享的技能进程池
+skill_process_pool = SkillProcessPool()
+
+
+def _dispatcher(func, timeout: float):
+    """为技能创建派发到进程池的包装函数（保留签名和文档，供工具 schema 使用）"""
+    target = (func.__module__, func.__name__)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return skill_process_pool.call(target, args, kwargs, timeout)
+
+    # 子进程池自己按 timeout 限时；线程级超时另加 TOOL_TIMEOUT 作为排队时间，
+    # 避免任务还在等空闲子进程时就被工具执行器判为超时
+    limit = timeout or skill_process_pool.default_timeout
+    setattr(wrapper, TIMEOUT_ATTR, limit + config.TOOL_TIMEOUT)
+    wrapper.process_pool = skill_process_pool
+    return wrapper
+
+
+def offload_skills(skills: list) -> list:
+    """把列表中被 @run_in_process 标记的技能包装为进程池执行
+
+    Args:
+        skills: 技能函数列表
+
+    Returns:
+        新的技能列表，未标记的技能保持不变；SKILL_PROCESSES=0 时原样返回
+    """
+    if config.SKILL_PROCESSES <= 0:
+        return list(skills)
+
+    result = []
+    for func in skills:
+        options = getattr(func, PROCESS_OPTIONS_ATTR, None)
+        if options is None or hasattr(func, "process_pool"):
+            result.append(func)
+            continue
+        with _offloaded_lock:
+            wrapper = _offloaded.get(func)
+            if wrapper is None:
+                wrapper = _dispatcher(func, options["timeout"])
+                _offloaded[func] = wrapper
+        result.append(wrapper)
+    return result
@@ -0,0 +1,180 @@
+"""
+技能注册表模块
+用 @skill 声明技能的元数据（标签、开销、可缓存、超时、副作用、执行方式），
+Agent 按标签选择技能，调度和缓存层按元数据做决策。
+
+- @skill 只做标记和登记，结果缓存 / 进程池包装仍由 memoize_skills / offload_skills 完成
+  （每个技能只包装一次，之后直接复用）
+- 工具 schema 由实际绑定给 Agent 的工具对象生成一次，提示词前缀直接复用
+- 元数据挂在函数属性上，经过 functools.wraps 的各层包装后仍然可以读取
+
+用法:
+    @skill(tags=("basic", "weather"), cacheable=True, ttl=600)
+    def get_weather(city: str) -> str: ...
+
+    tools = skill_registry.select(tags=["weather", "math"])
+"""
+import threading
+
+from .caching import cacheable as mark_cacheable, memoize_skills
+from .process_pool import TIMEOUT_ATTR, offload_skills, run_in_process
+
+
+# 标记属性名：被 @skill 登记的技能会带有该属性（值为 SkillSpec）
+SKILL_META_ATTR = "__skill_meta__"
+
+# 开销等级，按从低到高排列
+COST_CLASSES = ("low", "medium", "high")
+
+EXECUTORS = ("thread", "process")
+
+
+class SkillSpec:
+    """技能的元数据和预先构建的工具"""
+
+    __slots__ = ("name", "func", "tags", "cost", "cacheable", "ttl", "maxsize",
+                 "timeout", "side_effects", "executor", "_tool", "_schema")
+
+    def __init__(self, func, tags, cost, cacheable, ttl, maxsize,
+                 timeout, side_effects, executor):
+        self.name = func.__name__
+        self.func = func
+        self.tags = frozenset(tags)
+        self.cost = cost
+        self.cacheable = cacheable
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.side_effects = side_effects
+        self.executor = executor
+        self._tool = None
+        self._schema = None
+
+    @property
+    def tool(self):
+        """Agent 使用的技能函数（按标记带上结果缓存 / 进程池执行，只包装一次）"""
+        if self._tool is None:
+            self._tool = memoize_skills(offload_skills([self.func]))[0]
+        return self._tool
+
+    @property
+    def tool_schema(self) -> dict:
+        """绑定给 Agent 的工具对象的 schema（OpenAI 函数调用格式，只生成一次）"""
+        if self._schema is None:
+            from langchain_core.utils.function_calling import convert_to_openai_tool
+            from ..agents.tool_executor import tool_executor
+
+            self._schema = convert_to_openai_tool(tool_executor.as_tool(self.tool))
+        return self._schema
+
+
+class SkillRegistry:
+    """按名称和标签索引的技能注册表"""
+
+    def __init__(self):
+        self._specs = {}
+        self._lock = threading.Lock()
+
+    def register(self, spec: SkillSpec):
+        """登记技能，不同模块中的同名技能视为冲突"""
+        with self._lock:
+            existing = self._specs.get(spec.name)
+            if existing is not None and existing.func.__module__ != spec.func.__module__:
+                raise ValueError(
+                    f"技能名称重复: {spec.name} "
+                    f"({existing.func.__module__}, {spec.func.__module__})"
+                )
+            self._specs[spec.name] = spec
+
+    def get(self, name: str):
+        """按名称获取技能元数据，未登记时返回 None"""
+        return self._specs.get(name)
+
+    def specs(self) -> list:
+        """全部技能元数据（按登记顺序）"""
+        return list(self._specs.values())
+
+    def select(self, tags=None, names=None, max_cost: str = None,
+               side_effects: bool = None) -> list:
+        """按条件选择技能
+
+        Args:
+            tags: 标签，技能带有其中任意一个即选中；为 None 时不按标签筛选
+            names: 技能名称，为 None 时不按名称筛选
+            max_cost: 最高开销等级（low / medium / high）
+            side_effects: 为 False 时排除有副作用的技能，为 True 时只保留有副作用的技能
+
+        Returns:
+            技能函数列表（按登记顺序）
+        """
+        if isinstance(tags, str):
+            tags = [tags]
+        if isinstance(names, str):
+            names = [names]
+        tags = set(tags) if tags is not None else None
+        names = set(names) if names is not None else None
+        if names is not None:
+            missing = names - set(self._specs)
+            if missing:
+                raise KeyError(f"未登记的技能: {', '.join(sorted(missing))}")
+        max_rank = COST_CLASSES.index(max_cost) if max_cost else len(COST_CLASSES)
+
+        return [
+            spec.tool for spec in self.specs()
+            if (tags is None or spec.tags & tags)
+            and (names is None or spec.name in names)
+            and COST_CLASSES.index(spec.cost) <= max_rank
+            and (side_effects is None or spec.side_effects == side_effects)
+        ]
+
+
+# 进程级共享的技能注册表
+skill_registry = SkillRegistry()
+
+
+def get_skill_meta(func):
+    """获取技能的元数据（原函数或经过包装的函数均可）
+
+    Returns:
+        SkillSpec 实例；未用 @skill 登记时返回 None
+    """
+    return getattr(func, SKILL_META_ATTR, None)
+
+
+def skill(tags=(), cost: str = "low", cacheable: bool = False, ttl: float = 300,
+          maxsize: int = 256, timeout: float = None, side_effects: bool = False,
+          executor: str = "thread"):
+    """声明技能的元数据并登记到注册表
+
+    Args:
+        tags: 标签，供 Agent 按标签选择技能
+        cost: 开销等级（low / medium / high）
+        cacheable: 相同参数是否总是返回相同结果（开启 TTL + LRU 结果缓存）
+        ttl: 结果缓存有效期（秒）
+        maxsize: 结果缓存容量
+        timeout: 单次执行的时间上限（秒），默认使用工具执行器的全局超时
+        side_effects: 是否有副作用（写文件、创建提醒等）
+        executor: 执行方式，thread（共享线程池）或 process（子进程池，用于 CPU 密集技能）
+    """
+    if cost not in COST_CLASSES:
+        raise ValueError(f"未知的开销等级: {cost}（可选 {', '.join(COST_CLASSES)}）")
+    if executor not in EXECUTORS:
+        raise ValueError(f"未知的执行方式: {executor}（可选 {', '.join(EXECUTORS)}）")
+    if cacheable and side_effects:
+        raise ValueError("有副作用的技能不能标记为可缓存")
+
+    def decorator(func):
+        if cacheable:
+            mark_cacheable(ttl=ttl, maxsize=maxsize)(func)
+        if executor == "process":
+            # 启用进程池时由派发函数另设包含排队时间的线程级超时
+            run_in_process(timeout=timeout)(func)
+        if timeout:
+            # SKILL_PROCESSES=0 时进程技能也在线程中执行，同样需要这个超时
+            setattr(func, TIMEOUT_ATTR, timeout)
+        spec = SkillSpec(func, tags, cost, cacheable, ttl, maxsize,
+                         timeout, side_effects, executor)
+        setattr(func, SKILL_META_ATTR, spec)
+        skill_registry.register(spec)
+        return func
+    return decorator
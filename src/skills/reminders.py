@@ -0,0 +1,451 @@
+"""
+提醒调度模块
+在内存中按触发时间排列待触发的提醒，由定时线程在到期时触发；提醒持久化到只追加的日志中。
+
+- 待触发提醒保存在最小堆中，每个条目是把（触发毫秒数, 编号）打包成的一个整数，
+  提醒内容单独按编号保存；百万级提醒也只占用很少的内存
+- 取消和触发只从内容表中删除，堆中的条目在到达堆顶时惰性丢弃；
+  已取消的条目多于待触发提醒时（以及重写快照时）按待触发提醒重建堆
+- 定时线程只在最早的提醒到期或有更早的提醒加入时被唤醒，不轮询
+- 到期的提醒通过回调（subscribe）或队列（events）通知，默认打印到终端
+- 不带时区的提醒时间按 DEFAULT_TIMEZONE（Asia/Shanghai）解释，与 get_current_time 一致
+- 日志记录经由 BufferedFileWriter 合并批量写入；记录数明显多于待触发提醒时
+  原子地重写为快照，重启时读取一次日志即可恢复（错过的提醒立即触发）
+
+日志格式（每行一个 JSON 数组）:
+    ["a", 编号, 触发时间戳, 内容]   新建
+    ["f", 编号]                     已触发
+    ["c", 编号]                     已取消
+"""
+import atexit
+import heapq
+import json
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+from ..config import config
+from .file_output import BufferedFileWriter
+from .timezones import DEFAULT_TIMEZONE, resolve_timezone
+
+
+# 堆条目: (触发毫秒数 << _ID_BITS) | 编号
+_ID_BITS = 40
+_ID_MASK = (1 << _ID_BITS) - 1
+
+# 已取消的条目多于待触发提醒时重建堆；堆小于该值时不值得重建
+_REBUILD_MIN_HEAP = 64
+
+
+def _pack(due: float, reminder_id: int) -> int:
+    return (int(due * 1000) << _ID_BITS) | reminder_id
+
+
+def _unpack(key: int) -> tuple:
+    return (key >> _ID_BITS) / 1000, key & _ID_MASK
+
+
+# ---- 时间解析 ----
+
+_RELATIVE_UNITS = {
+    "秒": 1, "秒钟": 1, "s": 1, "sec": 1, "second": 1, "seconds": 1,
+    "分": 60, "分钟": 60, "m": 60, "min": 60, "minute": 60, "minutes": 60,
+    "小时": 3600, "个小时": 3600, "h": 3600, "hour": 3600, "hours": 3600,
+    "天": 86400, "d": 86400, "day": 86400, "days": 86400,
+}
+_RELATIVE_RE = re.compile(
+    r"^(?:in\s+)?(\d+(?:\.\d+)?)\s*([a-z一-鿿]+?)\s*(?:后|之后|以后|later)?$"
+)
+_CLOCK_RE = re.compile(r"^(今天|明天|后天)?\s*(\d{1,2})[:：](\d{2})(?:[:：](\d{2}))?$")
+
+
+def format_due(due: float) -> str:
+    """按 DEFAULT_TIMEZONE 格式化触发时间"""
+    tz, _label = resolve_timezone(DEFAULT_TIMEZONE)
+    return datetime.fromtimestamp(due, tz).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def parse_when(text: str, now: datetime = None) -> float:
+    """把提醒时间解析为时间戳
+
+    支持的写法:
+        2026-10-18 09:30 / 2026-10-18T09:30:00   绝对时间（未带时区时按 DEFAULT_TIMEZONE）
+        09:30 / 明天 09:30 / 后天 8:00           DEFAULT_TIMEZONE 的时刻（今天已过则为明天）
+        30分钟后 / 2小时后 / 1天后 / in 10 minutes  相对时间
+
+    Args:
+        text: 提醒时间
+        now: 当前时间，默认为 DEFAULT_TIMEZONE 的当前时间
+
+    Raises:
+        ValueError: 无法解析
+    """
+    tz, _label = resolve_timezone(DEFAULT_TIMEZONE)
+    now = now or datetime.now(tz)
+    text = text.strip().lower()
+
+    match = _RELATIVE_RE.match(text)
+    if match and match.group(2) in _RELATIVE_UNITS:
+        seconds = float(match.group(1)) * _RELATIVE_UNITS[match.group(2)]
+        return (now + timedelta(seconds=seconds)).timestamp()
+
+    match = _CLOCK_RE.match(text)
+    if match:
+        day, hour, minute, second = match.groups()
+        when = now.replace(hour=int(hour), minute=int(minute),
+                           second=int(second or 0), microsecond=0)
+        offset = {"明天": 1, "后天": 2}.get(day, 0)
+        when += timedelta(days=offset)
+        if day is None and when <= now:
+            when += timedelta(days=1)
+        return when.timestamp()
+
+    try:
+        when = datetime.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"无法识别的时间: {text}（示例: 30分钟后、明天 09:00、2026-10-18 09:30）")
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=tz)
+    return when.timestamp()
+
+
+# ---- 持久化 ----
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+class ReminderStore:
+    """只追加的提醒日志"""
+
+    def __init__(self, path: str, writer: BufferedFileWriter = None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        if writer is None:
+            writer = BufferedFileWriter(background=True)
+            # 进程退出前写完队列中的日志记录
+            atexit.register(writer.flush, 10)
+        self.writer = writer
+
+    @staticmethod
+    def _lines(records: list) -> str:
+        return "".join(_encode(record) + "\n" for record in records)
+
+    def load(self) -> tuple:
+        """读取日志
+
+        Returns:
+            (编号 -> (触发时间, 内容), 最大编号, 日志记录数, 是否需要重写)
+        """
+        pending = {}
+        max_id = 0
+        count = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return pending, max_id, count, False
+
+        # 进程在写入中途退出时最后一行可能不完整
+        dirty = bool(data) and not data.endswith("\n")
+        for line in data.splitlines():
+            try:
+                record = json.loads(line)
+                op, reminder_id = record[0], record[1]
+            except (ValueError, IndexError, TypeError):
+                dirty = True
+                continue
+            count += 1
+            max_id = max(max_id, reminder_id)
+            if op == "a":
+                pending[reminder_id] = (record[2], record[3])
+            else:
+                pending.pop(reminder_id, None)
+        return pending, max_id, count, dirty
+
+    def append(self, records: list):
+        """追加记录（后台批量写入）"""
+        if records:
+            self.writer.submit(self.path, self._lines(records), append=True)
+
+    def rewrite(self, records: list):
+        """用快照替换整个日志（原子替换，排在之前提交的追加之后）"""
+        self.writer.submit(self.path, self._lines(records))
+
+    def flush(self, timeout: float = None) -> bool:
+        return self.writer.flush(timeout)
+
+
+# ---- 调度 ----
+
+def _print_reminder(reminder_id: int, due: float, task: str):
+    print(f"\n⏰ 提醒 #{reminder_id}（{format_due(due)}）: {task}", flush=True)
+
+
+class ReminderScheduler:
+    """基于最小堆的提醒调度器"""
+
+    def __init__(self, store: ReminderStore = None, compact_records: int = None):
+        """
+        Args:
+            store: 提醒日志，为 None 时只保存在内存中
+            compact_records: 日志记录数超过该值且超过待触发提醒数的两倍时重写为快照
+        """
+        self.store = store
+        self.compact_records = compact_records or config.REMINDER_COMPACT_RECORDS
+        self._heap = []
+        self._tasks = {}
+        self._cond = threading.Condition()
+        self._next_id = 1
+        self._subscribers = []
+        self._thread = None
+        self._closed = False
+        self._log_records = 0
+        # 统计
+        self.created = 0
+        self.fired = 0
+        self.cancelled = 0
+        self.compactions = 0
+
+    # ---- 生命周期 ----
+
+    def recover(self) -> int:
+        """从日志恢复待触发的提醒并启动定时线程
+
+        Returns:
+            恢复的提醒数
+        """
+        if self.store is not None:
+            pending, max_id, count, dirty = self.store.load()
+            with self._cond:
+                self._tasks.update((rid, task) for rid, (_due, task) in pending.items())
+                self._heap.extend(_pack(due, rid) for rid, (due, _task) in pending.items())
+                heapq.heapify(self._heap)
+                self._next_id = max(self._next_id, max_id + 1)
+                self._log_records = count
+                if dirty:
+                    self._compact()
+            self._maybe_compact()
+        self.start()
+        return len(self._tasks)
+
+    def start(self):
+        """启动定时线程"""
+        if self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="reminders", daemon=True
+                )
+                self._thread.start()
+
+    def close(self, timeout: float = 5):
+        """停止定时线程并写完日志"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self.store is not None:
+            self.store.flush(timeout)
+
+    # ---- 提醒 ----
+
+    def add(self, task: str, due: float) -> int:
+        """新建提醒
+
+        Args:
+            task: 提醒内容
+            due: 触发时间戳
+
+        Returns:
+            提醒编号
+        """
+        with self._cond:
+            reminder_id = self._next_id
+            self._next_id += 1
+            key = _pack(due, reminder_id)
+            heapq.heappush(self._heap, key)
+            self._tasks[reminder_id] = task
+            self.created += 1
+            self._log([["a", reminder_id, due, task]])
+            if self._heap[0] == key:
+                # 新提醒比之前最早的还早，唤醒定时线程重新计算等待时间
+                self._cond.notify()
+        self._maybe_compact()
+        self.start()
+        return reminder_id
+
+    def cancel(self, reminder_id: int) -> bool:
+        """取消提醒
+
+        Returns:
+            是否取消了一个待触发的提醒
+        """
+        with self._cond:
+            if self._tasks.pop(reminder_id, None) is None:
+                return False
+            self.cancelled += 1
+            self._log([["c", reminder_id]])
+            if len(self._heap) > max(2 * len(self._tasks), _REBUILD_MIN_HEAP):
+                self._rebuild_heap()
+        self._maybe_compact()
+        return True
+
+    def pending(self, limit: int = 20) -> list:
+        """最早的若干个待触发提醒 [(编号, 触发时间, 内容), ...]"""
+        with self._cond:
+            result = []
+            for key in heapq.nsmallest(limit + len(self._heap) - len(self._tasks), self._heap):
+                due, reminder_id = _unpack(key)
+                task = self._tasks.get(reminder_id)
+                if task is not None:
+                    result.append((reminder_id, due, task))
+                    if len(result) >= limit:
+                        break
+            return result
+
+    def subscribe(self, callback):
+        """注册到期回调 callback(编号, 触发时间, 内容)，在定时线程中调用"""
+        with self._cond:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._cond:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def events(self) -> queue.Queue:
+        """获取一个接收到期提醒 (编号, 触发时间, 内容) 的队列"""
+        events = queue.Queue()
+        self.subscribe(lambda *reminder: events.put(reminder))
+        return events
+
+    # ---- 定时线程 ----
+
+    def _run(self):
+        while True:
+            with self._cond:
+                due_now = self._pop_due()
+                while not due_now and not self._closed:
+                    if self._heap:
+                        due, _reminder_id = _unpack(self._heap[0])
+                        self._cond.wait(max(0.0, due - time.time()))
+                    else:
+                        self._cond.wait()
+                    due_now = self._pop_due()
+                if self._closed:
+                    return
+                self.fired += len(due_now)
+                self._log([["f", reminder_id] for reminder_id, _due, _task in due_now])
+            self._maybe_compact()
+            self._fire(due_now)
+
+    def _pop_due(self) -> list:
+        """弹出已到期的提醒（调用方持有锁）"""
+        now = time.time()
+        due_now = []
+        heap, tasks = self._heap, self._tasks
+        while heap:
+            due, reminder_id = _unpack(heap[0])
+            task = tasks.get(reminder_id)
+            if task is None:
+                # 已取消或已触发
+                heapq.heappop(heap)
+                continue
+            if due > now:
+                break
+            heapq.heappop(heap)
+            del tasks[reminder_id]
+            due_now.append((reminder_id, due, task))
+        return due_now
+
+    def _rebuild_heap(self, keys: list = None):
+        """丢弃堆中已取消的条目（调用方持有锁）
+
+        Args:
+            keys: 待触发提醒的堆条目，为 None 时从当前堆中筛选
+        """
+        if keys is None:
+            tasks = self._tasks
+            keys = [key for key in self._heap if (key & _ID_MASK) in tasks]
+        heapq.heapify(keys)
+        self._heap = keys
+
+    def _fire(self, reminders: list):
+        for reminder in reminders:
+            for callback in list(self._subscribers):
+                try:
+                    callback(*reminder)
+                except Exception as e:
+                    print(f"⚠️  提醒回调出错: {e}")
+
+    # ---- 日志 ----
+
+    def _log(self, records: list):
+        """追加日志记录（调用方持有锁，保证同一提醒的记录按发生顺序写入）"""
+        if self.store is None:
+            return
+        self.store.append(records)
+        self._log_records += len(records)
+
+    def _maybe_compact(self):
+        if self.store is None:
+            return
+        with self._cond:
+            if self._log_records > self.compact_records \
+                    and self._log_records > 2 * len(self._tasks):
+                self._compact()
+
+    def _compact(self):
+        """把待触发的提醒重写为快照（调用方持有锁）"""
+        snapshot = []
+        live = []
+        for key in self._heap:
+            due, reminder_id = _unpack(key)
+            task = self._tasks.get(reminder_id)
+            if task is not None:
+                snapshot.append(["a", reminder_id, due, task])
+                live.append(key)
+        self._rebuild_heap(live)
+        # 写入器按提交顺序处理：快照排在之前的追加之后，之后的追加排在快照之后
+        self.store.rewrite(snapshot)
+        self._log_records = len(snapshot)
+        self.compactions += 1
+
+    def stats(self) -> dict:
+        """获取调度统计"""
+        with self._cond:
+            return {
+                "pending": len(self._tasks),
+                "heap_size": len(self._heap),
+                "created": self.created,
+                "fired": self.fired,
+                "cancelled": self.cancelled,
+                "log_records": self._log_records,
+                "compactions": self.compactions,
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_reminder_scheduler() -> ReminderScheduler:
+    """获取进程级共享的提醒调度器（第一次调用时恢复日志并启动定时线程）"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                store = ReminderStore(config.REMINDER_STORE_PATH) \
+                    if config.REMINDER_STORE_PATH else None
+                scheduler = ReminderScheduler(store)
+                scheduler.subscribe(_print_reminder)
+                recovered = scheduler.recover()
+                if recovered:
+                    print(f"⏰ 已恢复 {recovered} 个待触发的提醒")
+                _scheduler = scheduler
+    return _scheduler
@@ -0,0 +1,127 @@
+"""
+时区解析模块
+把用户或模型给出的时区写法（IANA 名称、城市名、UTC 偏移）解析为 tzinfo。
+
+- 优先使用 IANA 名称（Asia/Shanghai）；大小写或空格不同的写法在第一次遇到时建立索引后匹配
+- 常见中英文城市 / 国家名映射到 IANA 时区（北京、东京、纽约、london ...）
+- UTC+8 / GMT-05:30 这类写法解析为固定偏移
+- 解析结果按原始写法缓存，时区对象本身由 zoneinfo 缓存
+
+没有系统时区数据库的平台（如 Windows）需要安装 tzdata。
+"""
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, available_timezones
+
+
+DEFAULT_TIMEZONE = "Asia/Shanghai"
+
+# 常用别名 -> IANA 时区（键为小写、去掉空白）
+TIMEZONE_ALIASES = {
+    # 中国
+    "北京": "Asia/Shanghai", "上海": "Asia/Shanghai", "中国": "Asia/Shanghai",
+    "北京时间": "Asia/Shanghai", "beijing": "Asia/Shanghai", "china": "Asia/Shanghai",
+    "香港": "Asia/Hong_Kong", "hongkong": "Asia/Hong_Kong",
+    "台北": "Asia/Taipei", "taipei": "Asia/Taipei",
+    # 亚太
+    "东京": "Asia/Tokyo", "日本": "Asia/Tokyo", "tokyo": "Asia/Tokyo", "japan": "Asia/Tokyo",
+    "首尔": "Asia/Seoul", "韩国": "Asia/Seoul", "seoul": "Asia/Seoul",
+    "新加坡": "Asia/Singapore", "singapore": "Asia/Singapore",
+    "曼谷": "Asia/Bangkok", "bangkok": "Asia/Bangkok",
+    "新德里": "Asia/Kolkata", "孟买": "Asia/Kolkata", "印度": "Asia/Kolkata",
+    "delhi": "Asia/Kolkata", "mumbai": "Asia/Kolkata", "india": "Asia/Kolkata",
+    "迪拜": "Asia/Dubai", "dubai": "Asia/Dubai",
+    "悉尼": "Australia/Sydney", "sydney": "Australia/Sydney",
+    "墨尔本": "Australia/Melbourne", "melbourne": "Australia/Melbourne",
+    "奥克兰": "Pacific/Auckland", "auckland": "Pacific/Auckland",
+    # 欧洲
+    "伦敦": "Europe/London", "英国": "Europe/London", "london": "Europe/London",
+    "巴黎": "Europe/Paris", "法国": "Europe/Paris", "paris": "Europe/Paris",
+    "柏林": "Europe/Berlin", "德国": "Europe/Berlin", "berlin": "Europe/Berlin",
+    "莫斯科": "Europe/Moscow", "俄罗斯": "Europe/Moscow", "moscow": "Europe/Moscow",
+    # 美洲
+    "纽约": "America/New_York", "美东": "America/New_York", "华盛顿": "America/New_York",
+    "newyork": "America/New_York", "nyc": "America/New_York",
+    "est": "America/New_York", "edt": "America/New_York",
+    "芝加哥": "America/Chicago", "chicago": "America/Chicago",
+    "洛杉矶": "America/Los_Angeles", "旧金山": "America/Los_Angeles",
+    "硅谷": "America/Los_Angeles", "美西": "America/Los_Angeles",
+    "losangeles": "America/Los_Angeles", "sanfrancisco": "America/Los_Angeles",
+    "pst": "America/Los_Angeles", "pdt": "America/Los_Angeles",
+    "多伦多": "America/Toronto", "toronto": "America/Toronto",
+    "圣保罗": "America/Sao_Paulo", "巴西": "America/Sao_Paulo", "saopaulo": "America/Sao_Paulo",
+    # 协调世界时
+    "utc": "UTC", "gmt": "UTC", "世界时": "UTC", "格林尼治": "UTC",
+}
+
+_OFFSET_RE = re.compile(r"^(?:utc|gmt)([+-])(\d{1,2})(?::?(\d{2}))?$")
+
+
+@lru_cache(maxsize=1)
+def _iana_names() -> dict:
+    """小写 IANA 名称 -> 标准写法（第一次用到时扫描一次时区数据库）"""
+    return {name.lower(): name for name in available_timezones()}
+
+
+@lru_cache(maxsize=512)
+def resolve_timezone(name: str):
+    """把时区写法解析为 tzinfo
+
+    Args:
+        name: IANA 名称、城市 / 国家名或 UTC 偏移（如 UTC+8）
+
+    Returns:
+        (tzinfo, 显示名称)
+
+    Raises:
+        ValueError: 无法识别的时区
+    """
+    text = name.strip()
+    key = re.sub(r"\s+", "", text).lower()
+    if not key:
+        text = key = DEFAULT_TIMEZONE
+
+    match = _OFFSET_RE.match(key)
+    if match:
+        sign, hours, minutes = match.groups()
+        offset = timedelta(hours=int(hours), minutes=int(minutes or 0))
+        if offset >= timedelta(hours=24):
+            raise ValueError(f"无效的 UTC 偏移: {text}")
+        label = f"UTC{sign}{int(hours):02d}:{int(minutes or 0):02d}"
+        return timezone(-offset if sign == "-" else offset, label), label
+
+    iana = TIMEZONE_ALIASES.get(key)
+    if iana is None:
+        # 标准写法直接加载，不扫描时区数据库
+        try:
+            return ZoneInfo(text), text
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+        # 大小写或空格不同的写法再查索引
+        iana = _iana_names().get(text.replace(" ", "_").lower())
+    if iana is None:
+        raise ValueError(f"未知时区: {text}（示例: Asia/Shanghai、东京、UTC+8）")
+    try:
+        return ZoneInfo(iana), iana
+    except ZoneInfoNotFoundError:
+        raise ValueError(f"缺少时区数据: {iana}（请安装 tzdata）")
+
+
+def format_time(now: datetime, name: str) -> str:
+    """按指定时区格式化时间
+
+    Args:
+        now: 带时区的时间
+        name: 时区写法
+
+    Returns:
+        "Asia/Shanghai: 2026-10-18 09:30:00 (UTC+08:00)" 形式的字符串
+
+    Raises:
+        ValueError: 无法识别的时区
+    """
+    tz, label = resolve_timezone(name)
+    local = now.astimezone(tz)
+    offset = local.strftime("%z")
+    return f"{label}: {local.strftime('%Y-%m-%d %H:%M:%S')} (UTC{offset[:3]}:{offset[3:]})"
@@ -2,5 +2,13 @@
 工具模块
 """
 from .helpers import print_header, print_separator, extract_response
+from .metrics import Histogram, MetricsRegistry, JsonlEventWriter
 
-__all__ = ['print_header', 'print_separator', 'extract_response']
+__all__ = [
+    'print_header',
+    'print_separator',
+    'extract_response',
+    'Histogram',
+    'MetricsRegistry',
+    'JsonlEventWriter',
+]
@@ -0,0 +1,132 @@
+"""
+指标模块
+对数分桶的延迟直方图、按标签聚合的指标注册表和 JSONL 事件输出
+"""
+import bisect
+import json
+import math
+import os
+import threading
+import time
+
+
+def _default_bounds() -> list:
+    """默认桶边界（毫秒）：0.1ms 到约 10 分钟，每档约 1.25 倍"""
+    bounds = []
+    value = 0.1
+    while value < 600_000:
+        bounds.append(round(value, 3))
+        value *= 1.25
+    return bounds
+
+
+_DEFAULT_BOUNDS = _default_bounds()
+
+
+class Histogram:
+    """固定桶边界的直方图，记录开销为 O(log 桶数)，内存固定"""
+
+    def __init__(self, bounds: list = None):
+        self.bounds = bounds or _DEFAULT_BOUNDS
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def record(self, value: float):
+        """记录一个值"""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        """估算分位数（返回所在桶的上边界，不超过最大值）"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for idx, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                upper = self.bounds[idx] if idx < len(self.bounds) else self.max
+                return min(upper, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        """汇总统计"""
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3),
+            "min": round(self.min, 3),
+            "p50": round(self.percentile(0.5), 3),
+            "p90": round(self.percentile(0.9), 3),
+            "p99": round(self.percentile(0.99), 3),
+            "max": round(self.max, 3),
+        }
+
+
+class MetricsRegistry:
+    """按 (指标名, 标签) 聚合的直方图集合"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, value: float, **labels):
+        """记录一个值
+
+        Args:
+            name: 指标名，例如 model_latency_ms
+            value: 数值
+            labels: 标签，例如 agent_id="basic", provider="deepseek"
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.record(value)
+
+    def snapshot(self) -> list:
+        """导出所有直方图的汇总"""
+        with self._lock:
+            return [
+                {"metric": name, "labels": dict(labels), **histogram.summary()}
+                for (name, labels), histogram in sorted(self._histograms.items())
+            ]
+
+    def reset(self):
+        """清空所有指标"""
+        with self._lock:
+            self._histograms.clear()
+
+
+class JsonlEventWriter:
+    """线程安全的 JSONL 事件输出"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+
+    def write(self, event: dict):
+        """写入一条事件（自动补充时间戳）"""
+        event.setdefault("ts", time.time())
+        line = json.dumps(event, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def close(self):
+        """关闭文件"""
+        with self._lock:
+            self._file.close()